@@ -0,0 +1,65 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.limpiar import TEXT_DTYPES, clean_data
+
+
+# Implementación anterior (una pasada por columna), usada como referencia
+def clean_data_per_column(df):
+    df = df.copy()
+    df = df.drop_duplicates()
+    for col in df.select_dtypes(include=np.number).columns:
+        df[col] = df[col].fillna(df[col].mean())
+    for col in df.select_dtypes(include=TEXT_DTYPES).columns:
+        df[col] = df[col].fillna(df[col].mode()[0])
+    return df
+
+# Function to build a wide frame where only some columns contain nulls
+def make_frame(rows, numeric_cols, text_cols, null_cols=0.2, null_ratio=0.05, seed=0):
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(numeric_cols):
+        values = rng.normal(size=rows)
+        if rng.random() < null_cols:
+            values[rng.random(rows) < null_ratio] = np.nan
+        data[f"num_{i}"] = values
+    for i in range(text_cols):
+        values = rng.choice(np.array([f"cat_{k}" for k in range(50)], dtype=object), size=rows)
+        if rng.random() < null_cols:
+            values[rng.random(rows) < null_ratio] = None
+        data[f"text_{i}"] = values
+    return pd.DataFrame(data)
+
+def best_of(func, df, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(df)
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark clean_data against the per-column implementation")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--numeric-cols", type=int, default=150)
+    parser.add_argument("--text-cols", type=int, default=50)
+    parser.add_argument("--null-cols", type=float, default=0.2, help="fraction of columns that contain nulls")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows, args.numeric_cols, args.text_cols, null_cols=args.null_cols)
+    old_time, old_result = best_of(clean_data_per_column, df, args.repeat)
+    new_time, new_result = best_of(clean_data, df, args.repeat)
+    pd.testing.assert_frame_equal(old_result, new_result)
+
+    print(f"rows={args.rows} numeric={args.numeric_cols} text={args.text_cols} null_cols={args.null_cols}")
+    print(f"per-column clean_data: {old_time:.3f}s")
+    print(f"fused clean_data:      {new_time:.3f}s")
+    print(f"speedup:               {old_time / new_time:.2f}x")
@@ -0,0 +1,57 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.limpiar import clean_data, remove_outliers, remove_outliers_iqr
+from src.parallel import BACKENDS, clean_data_parallel, remove_outliers_iqr_parallel, remove_outliers_parallel
+
+# Function to build a numeric-heavy frame with nulls and heavy tails
+def make_frame(rows, numeric_cols, text_cols, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.standard_t(3, size=(rows, numeric_cols)), columns=[f"num_{i}" for i in range(numeric_cols)])
+    df = df.mask(rng.random(df.shape) < 0.02)
+    for i in range(text_cols):
+        df[f"text_{i}"] = rng.choice(np.array(["a", "b", "c", None], dtype=object), size=rows)
+    return df
+
+def best_of(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark how the parallel cleaning backend scales with workers")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--numeric-cols", type=int, default=64)
+    parser.add_argument("--text-cols", type=int, default=8)
+    parser.add_argument("--backend", choices=BACKENDS, default="thread")
+    parser.add_argument("--workers", type=int, nargs="+", default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows, args.numeric_cols, args.text_cols)
+    workers = args.workers or sorted({1, 2, 4, 8, 16, 32, os.cpu_count() or 1})
+    cases = [
+        ("clean_data", lambda: clean_data(df), lambda w: clean_data_parallel(df, w, args.backend)),
+        ("remove_outliers", lambda: remove_outliers(df), lambda w: remove_outliers_parallel(df, workers=w, backend=args.backend)),
+        ("remove_outliers_iqr", lambda: remove_outliers_iqr(df), lambda w: remove_outliers_iqr_parallel(df, w, args.backend)),
+    ]
+
+    print(f"rows={args.rows} numeric={args.numeric_cols} text={args.text_cols} backend={args.backend} cpus={os.cpu_count()}")
+    for name, serial, parallel in cases:
+        serial_time, expected = best_of(serial, args.repeat)
+        print(f"{name:<22} serial      {serial_time:8.3f}s")
+        for w in workers:
+            parallel_time, result = best_of(lambda: parallel(w), args.repeat)
+            # El resultado paralelo debe ser idéntico al serie
+            pd.testing.assert_frame_equal(expected, result, check_exact=True)
+            print(f"{name:<22} workers={w:<3} {parallel_time:8.3f}s  speedup {serial_time / parallel_time:5.2f}x")
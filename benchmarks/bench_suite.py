@@ -0,0 +1,234 @@
+import argparse
+import ast
+import fnmatch
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, "src")
+# Referencia guardada con `--sizes 1e4 --save benchmarks/baseline.json`; los tiempos dependen de la máquina, así que
+# conviene regenerarla en la máquina donde se compara
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from src.correlation import correlation_matrix
+from src.dtypes import optimize_dtypes
+from src.formats import export_table, read_table, write_table
+from src.grouping import group_aggregate
+from src.limpiar import clean_data, remove_outliers, remove_outliers_iqr
+from src.plan import (apply_step, clean_step, delete_step, encode_step, filter_step, iqr_step, normalize_step,
+                      rename_step, sort_step, zscore_step)
+from src.preview import visible_positions
+from src.profiling import DataProfile
+from src.rendering import null_fraction_grid
+from src.streaming import clean_csv_in_chunks
+from synthetic import make_dataset, write_dataset
+
+
+DEFAULT_SIZES = (10**4, 10**5, 10**6)
+# Más filas que estas no se generan en memoria (con 12 columnas, ~1 GB más las copias de cada caso): a esos tamaños
+# solo se miden los casos de streaming, que leen un fichero escrito bloque a bloque
+MAX_IN_MEMORY_ROWS = 10**7
+STREAM_CHUNK_ROWS = 1_000_000
+TIME_TOLERANCE = 0.25  # Más de un 25 % más lento que la referencia es una regresión
+MEMORY_TOLERANCE = 0.25
+MIN_SECONDS = 0.005  # Diferencias menores son ruido del reloj
+MIN_MB = 1.0
+
+
+# Function to list the benchmark cases: each one prepares its input (not timed) and returns the call to time
+def benchmark_cases():
+    def data_step(step):
+        return lambda df: lambda: apply_step(df, step)
+
+    def read_case(fmt):
+        def prepare(df):
+            data = write_table(df, fmt)
+            return lambda: read_table(data, fmt)
+        return prepare
+
+    return {
+        # Funciones de limpiar.py
+        "limpiar.clean_data": lambda df: lambda: clean_data(df),
+        "limpiar.remove_outliers": lambda df: lambda: remove_outliers(df),
+        "limpiar.remove_outliers_iqr": lambda df: lambda: remove_outliers_iqr(df),
+        # Acciones de app.py, con las mismas funciones que usa la aplicación
+        "app.load_csv": read_case("csv"),
+        "app.load_parquet": read_case("parquet"),
+        "app.optimize_memory": lambda df: lambda: optimize_dtypes(df),
+        "app.overview_profile": lambda df: lambda: DataProfile(df),
+        "app.clean_data": data_step(clean_step()),
+        "app.remove_outliers_zscore": data_step(zscore_step()),
+        "app.remove_outliers_iqr": data_step(iqr_step()),
+        "app.normalize_data": data_step(normalize_step()),
+        "app.encode_categorical": data_step(encode_step()),
+        "app.delete_columns": data_step(delete_step(["num_0"])),
+        "app.rename_column": data_step(rename_step("num_1", "renamed")),
+        "app.filter_rows": data_step(filter_step("num_0", ">", 0)),
+        "app.sort_data": data_step(sort_step("num_1")),
+        "app.sort_top_n": data_step(sort_step(["num_1", "text_0"], False, limit=100)),
+        "app.descriptive_statistics": lambda df: lambda: df.describe(),
+        "app.group_data": lambda df: lambda: group_aggregate(df, ["text_0"], [("num_0", "mean"), ("num_1", "sum")]),
+        "app.correlation_matrix": lambda df: lambda: correlation_matrix(df),
+        "app.missing_values_heatmap": lambda df: lambda: null_fraction_grid(df),
+        "app.preview_sort_search": lambda df: lambda: visible_positions(df, "num_2", True, "cat_1"),
+        "app.download_csv": lambda df: lambda: export_table(df, "csv").close(),
+        "app.download_parquet": lambda df: lambda: export_table(df, "parquet").close(),
+    }
+
+# Function to list the streaming cases: each one reads a CSV block by block, so it runs at any size
+def streaming_cases():
+    def clean_file(steps, **options):
+        def prepare(source, destination):
+            return lambda: clean_csv_in_chunks(source, destination, steps, chunksize=STREAM_CHUNK_ROWS, **options)
+        return prepare
+
+    return {
+        "streaming.clean_csv": clean_file(("clean",)),
+        "streaming.clean_outliers_csv": clean_file(("clean", "zscore"), approximate=True),
+    }
+
+# Function to list the imports app.py runs when it starts, as source lines
+def app_imports():
+    with open(os.path.join(SRC, "app.py")) as file:
+        tree = ast.parse(file.read())
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+# Function to list the start-up cases: code run in a new Python process, so nothing is imported or cached yet
+def startup_cases():
+    setup = f"import sys\nsys.path.insert(0, {SRC!r})\n"
+    return {
+        # Lo que cuesta importar lo que app.py importa arriba del todo
+        "startup.cold_import": setup + "\n".join(app_imports()),
+        # Primera ejecución completa del script, hasta la página inicial (sin fichero subido)
+        "startup.first_paint": setup + "from streamlit.testing.v1 import AppTest\n"
+                               f"AppTest.from_file({os.path.join(SRC, 'app.py')!r}, default_timeout=120).run()",
+    }
+
+# Function to run some code in a new Python process
+def run_process(code):
+    return lambda: subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True, capture_output=True)
+
+# Function to time a call (best of several runs) and measure the peak memory it allocates in a separate run
+def measure(call, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        times.append(time.perf_counter() - start)
+    # tracemalloc ve las reservas de numpy y pandas (no las del pool de Arrow); se mide aparte para no inflar los tiempos
+    tracemalloc.start()
+    try:
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": min(times), "peak_mb": peak / 1024 / 1024}
+
+# Function to print one result line
+def report(name, rows, result):
+    print(f"{name:<32} {rows:>12,} rows  {result['seconds']:9.4f} s  {result['peak_mb']:10.1f} MB", flush=True)
+
+# Function to run the chosen cases at every size, returning the results keyed as "case@rows"
+def run_suite(sizes=DEFAULT_SIZES, pattern="*", repeat=3, dataset=None, max_rows=MAX_IN_MEMORY_ROWS):
+    dataset = dataset or {}
+    cases = {name: prepare for name, prepare in benchmark_cases().items() if fnmatch.fnmatch(name, pattern)}
+    streaming = {name: prepare for name, prepare in streaming_cases().items() if fnmatch.fnmatch(name, pattern)}
+    results = {}
+    # El arranque no depende del tamaño de los datos: se mide una sola vez
+    for name, code in startup_cases().items():
+        if fnmatch.fnmatch(name, pattern):
+            result = measure(run_process(code), repeat)
+            results[f"{name}@cold"] = result
+            print(f"{name:<32} {'new process':>17}  {result['seconds']:9.4f} s", flush=True)
+    for rows in sizes:
+        if cases and rows > max_rows:
+            print(f"Skipping the in-memory cases at {rows:,} rows (more than {max_rows:,}); "
+                  f"only the streaming cases run at this size", flush=True)
+        elif cases:
+            df = make_dataset(rows, **dataset)
+            for name, prepare in cases.items():
+                result = measure(prepare(df), repeat)
+                results[f"{name}@{rows}"] = result
+                report(name, rows, result)
+            del df
+        if streaming:
+            # El fichero se escribe bloque a bloque: nunca hay más de STREAM_CHUNK_ROWS filas en memoria
+            with tempfile.TemporaryDirectory(prefix="cleanly-bench-") as directory:
+                source, destination = os.path.join(directory, "data.csv"), os.path.join(directory, "clean.csv")
+                write_dataset(source, rows, STREAM_CHUNK_ROWS, **dataset)
+                for name, prepare in streaming.items():
+                    result = measure(prepare(source, destination), repeat)
+                    results[f"{name}@{rows}"] = result
+                    report(name, rows, result)
+    return {
+        "environment": {"python": platform.python_version(), "pandas": pd.__version__, "numpy": np.__version__,
+                        "machine": platform.machine(), "cpus": os.cpu_count()},
+        "dataset": dataset,
+        "results": results,
+    }
+
+# Function to list the results that are slower or use more memory than the baseline, beyond the tolerances
+def find_regressions(current, baseline, time_tolerance=TIME_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE):
+    regressions = []
+    for name, result in current["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            continue
+        for metric, tolerance, noise in (("seconds", time_tolerance, MIN_SECONDS), ("peak_mb", memory_tolerance, MIN_MB)):
+            before, after = reference[metric], result[metric]
+            if after > before * (1 + tolerance) and after - before > noise:
+                regressions.append({"case": name, "metric": metric, "baseline": before, "current": after,
+                                    "ratio": after / before if before else float("inf")})
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time and memory-profile the cleaning functions and app actions")
+    parser.add_argument("--sizes", nargs="+", type=lambda value: int(float(value)), default=list(DEFAULT_SIZES),
+                        help="row counts to run, e.g. 1e4 1e6 1e8. Sizes above --max-rows only run the "
+                             "streaming cases, on a CSV written block by block")
+    parser.add_argument("--max-rows", type=lambda value: int(float(value)), default=MAX_IN_MEMORY_ROWS,
+                        help="largest frame generated in memory for the in-memory cases (default 1e7, about 1 GB "
+                             "plus the copies each case makes)")
+    parser.add_argument("--cases", default="*", help="only run the cases matching this pattern, e.g. 'limpiar.*'")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--numeric-cols", type=int, default=8)
+    parser.add_argument("--text-cols", type=int, default=4)
+    parser.add_argument("--null-ratio", type=float, default=0.05)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.05)
+    parser.add_argument("--outlier-ratio", type=float, default=0.01)
+    parser.add_argument("--save", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", nargs="?", const=BASELINE,
+                        help="JSON baseline to compare against (benchmarks/baseline.json if no path is given); "
+                             "exits with 1 if anything regressed")
+    parser.add_argument("--time-tolerance", type=float, default=TIME_TOLERANCE)
+    parser.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE)
+    args = parser.parse_args()
+
+    dataset = {"numeric_cols": args.numeric_cols, "text_cols": args.text_cols, "null_ratio": args.null_ratio,
+               "duplicate_ratio": args.duplicate_ratio, "outlier_ratio": args.outlier_ratio}
+    current = run_suite(args.sizes, args.cases, args.repeat, dataset, args.max_rows)
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(current, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if baseline.get("dataset") != current["dataset"]:
+            print("Warning: the baseline was recorded with different dataset parameters")
+        regressions = find_regressions(current, baseline, args.time_tolerance, args.memory_tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression['case']} {regression['metric']}: {regression['baseline']:.4f} -> "
+                  f"{regression['current']:.4f} ({regression['ratio']:.2f}x)")
+        print(f"{len(regressions)} regression(s) against {args.compare}")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,82 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.formats import detect_format
+
+
+# Function to build a reproducible dataset with a numeric/categorical mix, nulls, exact duplicates and outliers
+def make_dataset(rows, numeric_cols=8, text_cols=4, null_ratio=0.05, duplicate_ratio=0.05, outlier_ratio=0.01,
+                 categories=50, seed=0):
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(numeric_cols):
+        # Escalas y centros distintos por columna; una de cada cuatro solo tiene valores enteros
+        values = rng.normal(loc=rng.uniform(-100, 100), scale=rng.uniform(1, 50), size=rows)
+        outliers = rng.random(rows) < outlier_ratio
+        values[outliers] += rng.choice([-1, 1], outliers.sum()) * rng.uniform(20, 50, outliers.sum()) * values.std()
+        if i % 4 == 3:
+            values = np.round(values)
+        values[rng.random(rows) < null_ratio] = np.nan
+        data[f"num_{i}"] = values
+    names = np.array([f"cat_{k}" for k in range(categories)], dtype=object)
+    for i in range(text_cols):
+        # Frecuencias desiguales (Zipf), como en los datos reales
+        weights = 1 / np.arange(1, categories + 1)
+        values = rng.choice(names, size=rows, p=weights / weights.sum())
+        values[rng.random(rows) < null_ratio] = None
+        data[f"text_{i}"] = values
+    # Duplicados exactos: copias de otras filas, nulos incluidos
+    duplicates = np.flatnonzero(rng.random(rows) < duplicate_ratio)
+    sources = rng.integers(0, max(rows, 1), len(duplicates))
+    for values in data.values():
+        values[duplicates] = values[sources]
+    return pd.DataFrame(data)
+
+# Function to generate a dataset in blocks, each with its own seed, so files larger than memory can be written
+def iter_dataset(rows, chunk_rows=1_000_000, seed=0, **params):
+    for number, start in enumerate(range(0, rows, chunk_rows)):
+        yield make_dataset(min(chunk_rows, rows - start), seed=seed + number, **params)
+
+# Function to write a generated dataset to a CSV or Parquet file block by block
+def write_dataset(path, rows, chunk_rows=1_000_000, seed=0, **params):
+    fmt = detect_format(path)
+    writer = None
+    with open(path, "wb") as file:
+        for number, chunk in enumerate(iter_dataset(rows, chunk_rows, seed, **params)):
+            if fmt == "csv":
+                chunk.to_csv(file, index=False, header=number == 0)
+            elif fmt == "parquet":
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                writer = writer or pq.ParquetWriter(file, table.schema, compression="zstd")
+                writer.write_table(table)
+            else:
+                raise ValueError(f"Cannot write generated data as '{fmt}': use a .csv or .parquet file")
+        if writer is not None:
+            writer.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a reproducible synthetic dataset for benchmarks")
+    parser.add_argument("path", help="output file (.csv or .parquet)")
+    parser.add_argument("--rows", type=lambda value: int(float(value)), default=1_000_000, help="e.g. 1e8")
+    parser.add_argument("--numeric-cols", type=int, default=8)
+    parser.add_argument("--text-cols", type=int, default=4)
+    parser.add_argument("--null-ratio", type=float, default=0.05)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.05)
+    parser.add_argument("--outlier-ratio", type=float, default=0.01)
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--chunk-rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    write_dataset(args.path, args.rows, args.chunk_rows, args.seed, numeric_cols=args.numeric_cols,
+                  text_cols=args.text_cols, null_ratio=args.null_ratio, duplicate_ratio=args.duplicate_ratio,
+                  outlier_ratio=args.outlier_ratio, categories=args.categories)
+    print(f"Wrote {args.rows:,} rows to {args.path}")
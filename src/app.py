@@ -1,11 +1,33 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
-from io import BytesIO
-from limpiar import clean_data, remove_outliers, remove_outliers_iqr
+import pyarrow as pa
+from cache import StepCache, chain_key, content_hash
+from dtypes import memory_usage, optimize_dtypes
+from limpiar import TEXT_DTYPES
+from profiling import DataProfile
+from summaries import frame_summary
+from rendering import (SCATTER_POINTS, draw_histogram, draw_scatter, dtype_chart, missing_values_chart,
+                       null_fraction_grid, outlier_chart, plotting)
+from formats import (CSV_COMPRESSIONS, FILTER_OPS, FORMATS, detect_format, export_mime_type, export_name, export_table,
+                     read_schema, read_table)
+from correlation import CORRELATION_METHODS, correlation_key, correlation_matrix, mean_strength, top_pairs
+from grouping import AGG_FUNCS, group_aggregate
+from jobs import JobManager
+from spill import SpillStore
+from preview import PAGE_SIZES, page_count, page_window, visible_positions
+from instrumentation import Capture, Recorder
+from sorting import sort_order
+from plan import (SINK, clean_step, defer_final_sort, delete_step, encode_step, execute, execute_job, explain,
+                  expression_filter_step, filter_columns, filter_step, iqr_step, is_cached, normalize_step, optimize,
+                  output_key, prototype_at, rename_step, signature, sink_step, sort_step, step_keys, zscore_step)
+import json
 import os
+import uuid
+
+
+JOB_WAIT_SECONDS = 0.5  # Los planes que terminan antes se dibujan en la misma ejecución, sin barra de progreso
+JOB_POLL_SECONDS = 0.5
 
 
 # Configuración de la página - debe ir antes de cualquier otra llamada a st
@@ -26,9 +48,6 @@ st.set_page_config(
     }
 )
 
-# Configuración de estilo para gráficos
-sns.set_theme(style="whitegrid")
-
 # Obtener la ruta absoluta del directorio actual
 current_dir = os.path.dirname(os.path.abspath(__file__))
 
@@ -98,546 +117,713 @@ Simply upload your CSV file to get started, and use the options below to clean a
 """)
 
 
-# File uploader
-uploaded_file = st.file_uploader("Upload a CSV file", type="csv")
-
-if uploaded_file:
-    df = pd.read_csv(uploaded_file)
-    st.write("### Original Data")
-    st.write(df)
-
-    # Mostrar información inicial
-    st.write("### Data Overview")
-    st.write(f"Number of rows: {df.shape[0]}")
-    st.write(f"Number of columns: {df.shape[1]}")
-
-    # Mostrar tipos de datos
-    st.write("### Data Types")
-    # Crear un DataFrame para mostrar los tipos de datos de forma más elegante
-    dtypes_df = pd.DataFrame({
-        'Column': df.columns,
-        'Data Type': [str(df[col].dtype) for col in df.columns],
-        'First 3 Values': [str(df[col].iloc[0:3].tolist()) if not df[col].empty else "N/A" for col in df.columns]
-    })
-    st.write(dtypes_df)
-    
-    # Visualizar distribución de tipos de datos
-    dtype_counts = df.dtypes.value_counts().reset_index()
-    dtype_counts.columns = ['Data Type', 'Count']
-
-    # Crear figura con mejor resolución y tamaño
-    fig, ax = plt.subplots(figsize=(10, 5), dpi=100)
-
-    # Crear gráfico de barras con estilo mejorado
-    bars = sns.barplot(
-        x='Data Type', 
-        y='Count', 
-        data=dtype_counts, 
-        palette='viridis',
-        ax=ax,
-        edgecolor='black',
-        linewidth=1.5,
-        alpha=0.85
-    )
-
-    # Añadir etiquetas con el conteo en cada barra
-    for i, p in enumerate(bars.patches):
-        count = int(p.get_height())
-        percentage = 100 * count / sum(dtype_counts['Count'])
-        ax.annotate(
-            f'{count}\n({percentage:.1f}%)',
-            (p.get_x() + p.get_width() / 2., p.get_height()),
-            ha='center',
-            va='bottom',
-            fontsize=11,
-            fontweight='bold',
-            color='black'
-        )
-
-    # Personalizar ejes y título
-    ax.set_title('Distribution of Column Data Types', fontsize=16, fontweight='bold', pad=20)
-    ax.set_xlabel('Data Type', fontsize=12, fontweight='bold')
-    ax.set_ylabel('Number of Columns', fontsize=12, fontweight='bold')
-
-    # Mejorar la rejilla
-    ax.grid(axis='y', linestyle='--', alpha=0.7)
-    ax.set_axisbelow(True)
-
-    # Ajustar bordes
-    for spine in ax.spines.values():
-        spine.set_linewidth(1.5)
-
-    # Añadir contexto
-    if len(dtype_counts) > 1:
-        main_type = dtype_counts.iloc[0]['Data Type']
-        plt.figtext(0.5, 0.01, 
-                    f'This dataset primarily contains {main_type} columns ({dtype_counts.iloc[0]["Count"]} columns)', 
-                    ha='center', fontsize=10, fontstyle='italic')
-
-    # Ajuste de diseño
-    plt.tight_layout()
-
-    # Mostrar el gráfico
-    st.pyplot(fig)
-
-    # Mostrar duplicados
-    st.write("### Duplicates")
-    duplicates = df[df.duplicated()]
-    st.write(f"Number of duplicate rows: {len(duplicates)}")
-    if not duplicates.empty:
-        st.write(duplicates)
-
-    # Mostrar valores nulos
-    st.write("### Missing Values")
-    missing_values = df.isnull().sum()
-    st.write(missing_values[missing_values > 0])
-
-    # Visualización de valores nulos
-    st.write("### Missing Values Heatmap")
-
-    # Calcular estadísticas de valores nulos
-    missing_count = df.isnull().sum().sum()
-    missing_percent = (missing_count / (df.shape[0] * df.shape[1])) * 100
-
-    # Ajustar tamaño según el número de filas y columnas
-    rows, cols = df.shape
-    figsize = (min(14, max(10, cols * 0.5)), min(10, max(6, rows * 0.02)))
-
-    # Crear figura
-    fig, ax = plt.subplots(figsize=figsize, dpi=100)
-
-    # Crear heatmap con estilo mejorado
-    heatmap = sns.heatmap(
-        df.isnull(), 
-        cbar=True,
-        cmap="YlGnBu",  # Cambio de paleta de colores
-        ax=ax,
-        yticklabels=False,  # Ocultar etiquetas de filas para datasets grandes
-        cbar_kws={'label': 'Missing Values', 'shrink': 0.8}
-    )
-
-    # Personalizar ejes y título
-    ax.set_title('Heatmap of Missing Values', fontsize=16, fontweight='bold', pad=20)
-    ax.set_xlabel('Columns', fontsize=12, fontweight='bold')
-    ax.set_ylabel('Rows', fontsize=12, fontweight='bold')
-
-    # Rotar etiquetas del eje X para mejor legibilidad
-    plt.xticks(rotation=45, ha='right', fontsize=10)
-
-    # Bordes y estructura
-    for spine in ax.spines.values():
-        spine.set_linewidth(1.5)
-        spine.set_color('gray')
-
-    # Añadir información sobre valores nulos
-    if missing_count > 0:
-        plt.figtext(
-            0.5, 0.01, 
-            f'Dataset contains {missing_count:,} missing values ({missing_percent:.2f}% of total)', 
-            ha='center', 
-            fontsize=10, 
-            fontstyle='italic',
-            bbox={'facecolor': 'lightgray', 'alpha': 0.5, 'pad': 5, 'boxstyle': 'round,pad=0.5'}
-        )
-    else:
-        plt.figtext(
-            0.5, 0.01, 
-            'No missing values found in the dataset', 
-            ha='center', 
-            fontsize=10, 
-            fontstyle='italic',
-            color='green',
-            bbox={'facecolor': 'lightgreen', 'alpha': 0.5, 'pad': 5, 'boxstyle': 'round,pad=0.5'}
-        )
-
-    # Ajuste de diseño
-    plt.tight_layout(rect=[0, 0.03, 1, 0.97])  # Dejar espacio para el texto inferior
-
-    # Mostrar el gráfico
-    st.pyplot(fig)
-
-    # Detección básica de outliers
-    # Definir columnas numéricas
-    numeric_cols = df.select_dtypes(include=np.number).columns
-    st.write("### Potential Outliers in Numeric Columns")
-    if len(numeric_cols) > 0:
-        outlier_stats = []
-        for col in numeric_cols:
-            q1 = df[col].quantile(0.25)
-            q3 = df[col].quantile(0.75)
-            iqr = q3 - q1
-            lower_bound = q1 - 1.5 * iqr
-            upper_bound = q3 + 1.5 * iqr
-            outliers = df[(df[col] < lower_bound) | (df[col] > upper_bound)][col].count()
-            outlier_pct = (outliers / len(df)) * 100
-            outlier_stats.append({"Column": col, "Outliers Count": outliers, "Percentage": f"{outlier_pct:.2f}%"})
-        
-        outlier_df = pd.DataFrame(outlier_stats)
-        st.write(outlier_df)
-        
-        # Visualizar columnas con más outliers
-        if not outlier_df.empty:
-            # Preparar los datos
-            plot_data = outlier_df.sort_values('Outliers Count', ascending=False).head(5)
-            
-            # Crear figura con tamaño adecuado y mejor resolución
-            fig, ax = plt.subplots(figsize=(12, 6), dpi=100)
-            
-            # Crear gráfico de barras con estilo mejorado
-            bars = sns.barplot(
-                x='Column', 
-                y='Outliers Count', 
-                data=plot_data, 
-                palette='viridis',  # Paleta de colores más atractiva
-                ax=ax,
-                edgecolor='black',  # Borde negro para mejor definición
-                linewidth=1.5,      # Ancho del borde
-                alpha=0.8           # Transparencia para efecto visual
-            )
-            
-            # Añadir etiquetas con el número de outliers y porcentaje
-            for i, p in enumerate(bars.patches):
-                percentage = plot_data.iloc[i]['Percentage']
-                count = int(p.get_height())
-                ax.annotate(
-                    f'{count}\n({percentage})',
-                    (p.get_x() + p.get_width() / 2., p.get_height()),
-                    ha='center',
-                    va='bottom',
-                    fontsize=11,
-                    fontweight='bold',
-                    color='black'
-                )
-            
-            # Personalizar ejes y título
-            ax.set_title('Top 5 Columns with Most Potential Outliers', fontsize=16, fontweight='bold', pad=20)
-            ax.set_xlabel('Column Name', fontsize=12, fontweight='bold')
-            ax.set_ylabel('Number of Outliers', fontsize=12, fontweight='bold')
-            
-            # Mejorar etiquetas del eje X
-            plt.xticks(rotation=45, ha='right', fontsize=10, fontweight='semibold')
-            
-            # Personalizar rejilla y fondo
-            ax.grid(axis='y', linestyle='--', alpha=0.7)
-            ax.set_axisbelow(True)  # Poner la rejilla detrás de las barras
-            
-            # Bordes y acabado
-            for spine in ax.spines.values():
-                spine.set_linewidth(1.5)
-            
-            # Añadir un título descriptivo
-            plt.figtext(0.5, 0.01, 'Columns that may require outlier treatment', 
-                        ha='center', fontsize=10, fontstyle='italic')
-            
-            # Ajuste de diseño
-            plt.tight_layout()
-            
-            # Mostrar el gráfico
+# Function to encode an export when its download is requested; only the finished file is read back into memory
+def read_export(df, fmt, compression=None):
+    with export_table(df, fmt, compression) as file:
+        return file.read()
+
+# Function to draw the statistics, charts and downloads of the action plan with the data they receive; order is a
+# final sort step that was not applied to the data (only the export needs it)
+def render_sink(action, df, profile=None, key=None, order=None):
+    if action == "Show Descriptive Statistics":
+        st.write("### Descriptive Statistics")
+        # Con el DataFrame original, las estadísticas ya están en el perfil
+        st.write(profile.describe() if profile is not None and len(profile.numeric_columns) else df.describe())
+    elif action == "Visualize Histograms":
+        plt, sns = plotting()
+        selected_cols = st.multiselect("Select numeric columns for histograms:", df.select_dtypes(include=np.number).columns)
+        if selected_cols:
+            # Histogramas y KDE desde el resumen de la caché (cubetas fijas), sin recorrer las filas en cada rerun
+            summary = frame_summary(df, get_cache(), key)
+        for col in selected_cols:
+            fig, ax = plt.subplots()
+            draw_histogram(ax, summary, col, color="blue")
+            ax.set_title(f"Histogram of {col}")
             st.pyplot(fig)
 
-    # Menú para acciones
-    st.write("### What would you like to do next with your data?")
-    options = [
-        "Show Descriptive Statistics",
-        "Basic Data Cleaning",
-        "Remove Outliers (Z-Score)",
-        "Remove Outliers (IQR)",
-        "Normalize Data",
-        "Encode Categorical Columns",
-        "Delete Specific Columns",
-        "Rename Columns",
-        "Filter Rows",
-        "Sort Data",
-        "Visualize Histograms",
-        "Visualize Bar Charts",
-        "Scatter Plot",
-        "Group Data",
-        "Correlation Matrix",  # Nueva opción para la matriz de correlación
-        "Download Cleaned Data"
-    ]
-    selected_actions = st.multiselect("Choose one or more actions:", options)
-
-    for action in selected_actions:
-        if action == "Show Descriptive Statistics":
-            st.write("### Descriptive Statistics")
-            st.write(df.describe())
-        elif action == "Basic Data Cleaning":
-            df = clean_data(df)
-            st.write("### Data after basic cleaning")
-            st.write("✅ Duplicates removed")
-            st.write("✅ Missing numeric values filled with mean")
-            st.write("✅ Missing text values filled with mode")
-            st.write(df)
-        elif action == "Remove Outliers (Z-Score)":
-            df = remove_outliers(df)
-            st.write("Data after removing outliers (Z-Score):")
-            st.write(df)
-        elif action == "Remove Outliers (IQR)":
-            df = remove_outliers_iqr(df)
-            st.write("Data after removing outliers (IQR):")
-            st.write(df)
-        elif action == "Normalize Data":
-            numeric_cols = df.select_dtypes(include=np.number).columns
-            for col in numeric_cols:
-                df[col] = (df[col] - df[col].min()) / (df[col].max() - df[col].min())
-            st.write("Data after normalization:")
-            st.write(df)
-        elif action == "Encode Categorical Columns":
-            categorical_cols = df.select_dtypes(include='object').columns
-            for col in categorical_cols:
-                df[col] = pd.factorize(df[col])[0]
-            st.write("Data after encoding categorical columns:")
-            st.write(df)
-        elif action == "Delete Specific Columns":
-            columns_to_delete = st.multiselect("Select columns to delete:", df.columns)
-            df = df.drop(columns=columns_to_delete)
-            st.write("Data after deleting columns:")
-            st.write(df)
-        elif action == "Rename Columns":
-            selected_col = st.selectbox("Select a column to rename:", df.columns)
-            new_name = st.text_input("Enter the new name for the column:")
-            if new_name:
-                df.rename(columns={selected_col: new_name}, inplace=True)
-                st.write(f"Column '{selected_col}' renamed to '{new_name}'")
-                st.write(df)
-        elif action == "Filter Rows":
-            try:
-                # Primero, verificar que el DataFrame no esté vacío
-                if df.empty:
-                    st.warning("The dataset is empty. Please upload data first.")
-                else:
-                    # Mostrar información sobre el dataset
-                    st.info(f"Current dataset has {len(df)} rows and {len(df.columns)} columns.")
-                    
-                    # Seleccionar columna para filtrar
-                    filter_column = st.selectbox("Select column to filter by:", df.columns)
-                    
-                    # Determinar el tipo de columna y mostrar valores únicos
-                    is_numeric = pd.api.types.is_numeric_dtype(df[filter_column])
-                    
-                    # Mostrar información de la columna seleccionada
-                    if is_numeric:
-                        st.info(f"Column '{filter_column}' is numeric. Range: {df[filter_column].min()} to {df[filter_column].max()}")
-                    else:
-                        unique_values = df[filter_column].nunique()
-                        st.info(f"Column '{filter_column}' has {unique_values} unique values.")
-                    
-                    # Opciones de filtrado basadas en el tipo de columna
-                    if is_numeric:
-                        filter_type = st.radio("Filter type:", ["Equal to", "Greater than", "Less than"], horizontal=True)
-                    else:
-                        filter_type = st.radio("Filter type:", ["Equal to", "Contains"], horizontal=True)
-                    
-                    # Entrada del valor de filtro
-                    filter_value = st.text_input("Enter value to filter by:")
-                    
-                    # Botón para aplicar el filtro (para asegurar que la acción sea explícita)
-                    apply_filter = st.button("Apply Filter")
-                    
-                    if filter_value and apply_filter:
-                        # Crear una copia temporal para filtrar
-                        filtered_df = df.copy()
-                        
-                        # Aplicar el filtro según el tipo seleccionado
-                        if is_numeric:
-                            try:
-                                # Convertir a número
-                                num_value = float(filter_value)
-                                
-                                if filter_type == "Equal to":
-                                    filtered_df = filtered_df[filtered_df[filter_column] == num_value]
-                                elif filter_type == "Greater than":
-                                    filtered_df = filtered_df[filtered_df[filter_column] > num_value]
-                                else:  # Less than
-                                    filtered_df = filtered_df[filtered_df[filter_column] < num_value]
-                                    
-                            except ValueError:
-                                st.error(f"Please enter a valid number for column '{filter_column}'")
-                                st.stop()  # Detener la ejecución si hay un error
-                        else:
-                            # Para texto
-                            if filter_type == "Equal to":
-                                filtered_df = filtered_df[filtered_df[filter_column].astype(str) == filter_value]
-                            else:  # Contains
-                                filtered_df = filtered_df[filtered_df[filter_column].astype(str).str.contains(filter_value, case=False, na=False)]
-                        
-                        # Mostrar resultados
-                        if len(filtered_df) > 0:
-                            st.success(f"Filter applied successfully. Found {len(filtered_df)} matching rows.")
-                            # Actualizar el DataFrame principal directamente
-                            df = filtered_df
-                            st.write("Data after filtering:")
-                            st.write(df)
-                        else:
-                            st.warning("No rows match your filter criteria. Try different values.")
-            
-            except Exception as e:
-                st.error(f"Error during filtering: {str(e)}")
-                st.write("Please try a different filter or contact support if the issue persists.")
-        elif action == "Sort Data":
-            sort_column = st.selectbox("Select column to sort by:", df.columns)
-            sort_order = st.radio("Sort order:", ["Ascending", "Descending"])
-            df = df.sort_values(by=sort_column, ascending=(sort_order == "Ascending"))
-            st.write("Data after sorting:")
-            st.write(df)
-
-        elif action == "Visualize Histograms":
-            selected_cols = st.multiselect("Select numeric columns for histograms:", df.select_dtypes(include=np.number).columns)
-            for col in selected_cols:
-                fig, ax = plt.subplots()
-                sns.histplot(df[col], bins=20, kde=True, color="blue", ax=ax)
-                ax.set_title(f"Histogram of {col}")
-                st.pyplot(fig)
-
-        elif action == "Visualize Bar Charts":
-            # Verificar si hay columnas categóricas
-            cat_cols = df.select_dtypes(include=['object', 'category']).columns
-            
-            if len(cat_cols) == 0:
-                # No hay columnas categóricas, ofrecer columnas numéricas con pocos valores únicos
-                num_cols = df.select_dtypes(include=np.number).columns
-                # Filtrar columnas numéricas con menos de 20 valores únicos para barras
-                viable_cols = [col for col in num_cols if df[col].nunique() <= 20]
-                
-                if len(viable_cols) == 0:
-                    st.warning("No categorical columns or numeric columns with few unique values found. Bar charts are best for categorical data.")
-                    st.info("Try using 'Visualize Histograms' for your numeric columns instead.")
-                else:
-                    selected_col = st.selectbox("Select column for bar chart:", viable_cols)
-                    fig, ax = plt.subplots(figsize=(10, 6))
-                    
-                    # Convertir a cadena para tratar como categórico
-                    value_counts = df[selected_col].value_counts().sort_index()
-                    sns.barplot(x=value_counts.index.astype(str), y=value_counts.values, ax=ax, palette="Set2")
-                    ax.set_title(f"Bar Chart of {selected_col}")
-                    ax.set_xticklabels(ax.get_xticklabels(), rotation=45, ha='right')
-                    plt.tight_layout()
-                    st.pyplot(fig)
+    elif action == "Visualize Bar Charts":
+        plt, sns = plotting()
+        # Verificar si hay columnas categóricas
+        cat_cols = df.select_dtypes(include=TEXT_DTYPES + ['category']).columns
+        # Cuentas de valores ya calculadas en el resumen de la caché
+        summary = frame_summary(df, get_cache(), key)
+
+        if len(cat_cols) == 0:
+            # No hay columnas categóricas, ofrecer columnas numéricas con pocos valores únicos
+            num_cols = df.select_dtypes(include=np.number).columns
+            # Filtrar columnas numéricas con menos de 20 valores únicos para barras
+            viable_cols = [col for col in num_cols if summary.value_counts(col) is not None]
+
+            if len(viable_cols) == 0:
+                st.warning("No categorical columns or numeric columns with few unique values found. Bar charts are best for categorical data.")
+                st.info("Try using 'Visualize Histograms' for your numeric columns instead.")
             else:
-                # Hay columnas categóricas, usar código original mejorado
-                selected_col = st.selectbox("Select a categorical column for bar chart:", cat_cols)
+                selected_col = st.selectbox("Select column for bar chart:", viable_cols)
                 fig, ax = plt.subplots(figsize=(10, 6))
-                
-                # Limitar a 15 categorías más frecuentes si hay demasiadas
-                value_counts = df[selected_col].value_counts()
-                if len(value_counts) > 15:
-                    st.info(f"Showing top 15 categories out of {len(value_counts)}")
-                    top_cats = value_counts.nlargest(15).index
-                    chart_data = df[df[selected_col].isin(top_cats)]
-                    sns.countplot(y=selected_col, data=chart_data, order=value_counts.nlargest(15).index, ax=ax, palette="Set2")
-                else:
-                    sns.countplot(y=selected_col, data=df, order=value_counts.index, ax=ax, palette="Set2")
-                
+
+                # Convertir a cadena para tratar como categórico
+                value_counts = summary.value_counts(selected_col).sort_index()
+                sns.barplot(x=value_counts.index.astype(str), y=value_counts.values, ax=ax, palette="Set2")
                 ax.set_title(f"Bar Chart of {selected_col}")
+                ax.set_xticklabels(ax.get_xticklabels(), rotation=45, ha='right')
                 plt.tight_layout()
                 st.pyplot(fig)
+        else:
+            # Hay columnas categóricas, usar código original mejorado
+            selected_col = st.selectbox("Select a categorical column for bar chart:", cat_cols)
+            fig, ax = plt.subplots(figsize=(10, 6))
+
+            # Limitar a 15 categorías más frecuentes si hay demasiadas
+            value_counts = summary.value_counts(selected_col)
+            if summary.distinct[selected_col] > 15:
+                st.info(f"Showing top 15 categories out of {summary.distinct[selected_col]}")
+                value_counts = value_counts.iloc[:15]
+            sns.barplot(x=value_counts.to_numpy(), y=value_counts.index.astype(str), ax=ax, palette="Set2")
+            ax.set_xlabel("count")
+            ax.set_ylabel(selected_col)
+
+            ax.set_title(f"Bar Chart of {selected_col}")
+            plt.tight_layout()
+            st.pyplot(fig)
+
+    elif action == "Scatter Plot":
+        plt, sns = plotting()
+        st.write("### Scatter Plot")
+        numeric_cols = df.select_dtypes(include=np.number).columns
+        if len(numeric_cols) >= 2:
+            x_col = st.selectbox("Select X-axis column:", numeric_cols, key="scatter_x")
+            y_col = st.selectbox("Select Y-axis column:", numeric_cols, key="scatter_y")
+            method = "points"
+            if len(df) > SCATTER_POINTS:
+                # Con muchas filas se dibuja la densidad o una muestra, no un marcador por fila
+                method = st.radio("Large dataset: how should the points be drawn?", ["hexbin", "sample"],
+                                  format_func={"hexbin": "Density (hexbin)", "sample": "Stratified sample"}.get,
+                                  horizontal=True, key="scatter_method")
+            fig, ax = plt.subplots()
+            description = draw_scatter(ax, df, x_col, y_col, method=method)
+            ax.set_title(f"Scatter Plot: {x_col} vs {y_col}")
+            st.pyplot(fig)
+            st.caption(description)
+        else:
+            st.write("Not enough numeric columns to create a scatter plot.")
+
+    elif action == "Group Data":
+        plt, sns = plotting()
+        try:
+            # Seleccionar una o varias columnas para agrupar
+            group_columns = st.multiselect("Select columns to group by:", df.columns, default=list(df.columns[:1]))
 
-        elif action == "Scatter Plot":
-            st.write("### Scatter Plot")
+            # Filtrar columnas numéricas excluyendo las columnas de agrupación
             numeric_cols = df.select_dtypes(include=np.number).columns
-            if len(numeric_cols) >= 2:
-                x_col = st.selectbox("Select X-axis column:", numeric_cols, key="scatter_x")
-                y_col = st.selectbox("Select Y-axis column:", numeric_cols, key="scatter_y")
-                fig, ax = plt.subplots()
-                sns.scatterplot(data=df, x=x_col, y=y_col, ax=ax, color="blue", alpha=0.7)
-                ax.set_title(f"Scatter Plot: {x_col} vs {y_col}")
-                st.pyplot(fig)
+            available_agg_cols = [col for col in numeric_cols if col not in group_columns]
+
+            if not group_columns:
+                st.info("Select at least one column to group by.")
+            elif len(available_agg_cols) == 0:
+                # Si no hay columnas numéricas disponibles después de excluir las columnas de agrupación
+                st.warning("No numeric columns available for aggregation. Please select a different column for grouping or add more numeric columns to your dataset.")
             else:
-                st.write("Not enough numeric columns to create a scatter plot.")
-
-        elif action == "Group Data":
-            try:
-                # Seleccionar columna para agrupar
-                group_column = st.selectbox("Select column to group by:", df.columns)
-                
-                # Filtrar columnas numéricas excluyendo la columna de agrupación
-                numeric_cols = df.select_dtypes(include=np.number).columns
-                available_agg_cols = [col for col in numeric_cols if col != group_column]
-                
-                if len(available_agg_cols) == 0:
-                    # Si no hay columnas numéricas disponibles después de excluir la columna de agrupación
-                    st.warning("No numeric columns available for aggregation. Please select a different column for grouping or add more numeric columns to your dataset.")
+                # Seleccionar columnas para agregar y funciones de agregación
+                agg_columns = st.multiselect("Select columns to aggregate:", available_agg_cols, default=available_agg_cols[:1])
+                agg_funcs = st.multiselect("Select aggregation functions:", AGG_FUNCS, default=["mean"])
+
+                if not agg_columns or not agg_funcs:
+                    st.info("Select at least one column to aggregate and one aggregation function.")
                 else:
-                    # Seleccionar columna para agregar y función de agregación
-                    agg_column = st.selectbox("Select column to aggregate:", available_agg_cols)
-                    agg_func = st.selectbox("Select aggregation function:", ["mean", "sum", "count", "max", "min"])
-                    
-                    # Realizar el agrupamiento
-                    grouped_df = df.groupby(group_column)[agg_column].agg(agg_func).reset_index()
-                    
+                    # Realizar el agrupamiento: los agregados parciales de estas claves quedan en la caché,
+                    # así que cambiar de función o añadir una columna no vuelve a agrupar las filas
+                    aggregations = [(col, func) for col in agg_columns for func in agg_funcs]
+                    grouped_df = group_aggregate(df, group_columns, aggregations, get_cache(), key)
+
                     # Mostrar resultados
-                    st.write(f"Data after grouping by '{group_column}' and aggregating '{agg_column}' with '{agg_func}':")
+                    st.write(f"Data after grouping by {', '.join(map(str, group_columns))} and aggregating "
+                             f"{', '.join(map(str, agg_columns))} with {', '.join(agg_funcs)}:")
                     st.write(grouped_df)
-                    
-                    # Visualizar los resultados en un gráfico de barras si no hay demasiados grupos
+
+                    # Visualizar la primera agregación en un gráfico de barras si no hay demasiados grupos
                     if len(grouped_df) <= 20:  # Limitar para legibilidad
                         st.write("### Visualization of Grouped Data")
+                        agg_column, agg_func = aggregations[0]
+                        value_column = f"{agg_column}_{agg_func}"
+                        labels = grouped_df[group_columns].astype(str).agg(" / ".join, axis=1)
                         fig, ax = plt.subplots(figsize=(10, 5))
-                        sns.barplot(x=group_column, y=agg_column, data=grouped_df, ax=ax)
-                        ax.set_title(f"{agg_func.capitalize()} of {agg_column} by {group_column}")
+                        sns.barplot(x=labels, y=grouped_df[value_column], ax=ax)
+                        ax.set_xlabel(" / ".join(map(str, group_columns)))
+                        ax.set_ylabel(value_column)
+                        ax.set_title(f"{agg_func.capitalize()} of {agg_column} by {' / '.join(map(str, group_columns))}")
                         if len(grouped_df) > 5:  # Rotar etiquetas si hay muchos grupos
                             ax.set_xticklabels(ax.get_xticklabels(), rotation=45, ha='right')
                         plt.tight_layout()
                         st.pyplot(fig)
-            
-            except Exception as e:
-                st.error(f"An error occurred during data grouping: {str(e)}")
-                st.info("Try selecting different columns or handling missing values first.")
 
-        elif action == "Correlation Matrix":
-            st.write("### Correlation Matrix")
-            numeric_cols = df.select_dtypes(include=np.number).columns
-            if len(numeric_cols) > 1:
-                # Calcular la matriz de correlación
-                corr = df[numeric_cols].corr()
-                
+        except Exception as e:
+            st.error(f"An error occurred during data grouping: {str(e)}")
+            st.info("Try selecting different columns or handling missing values first.")
+
+    elif action == "Correlation Matrix":
+        plt, sns = plotting()
+        st.write("### Correlation Matrix")
+        numeric_cols = df.select_dtypes(include=np.number).columns
+        if len(numeric_cols) > 1:
+            method = st.radio("Correlation method:", CORRELATION_METHODS, format_func=str.capitalize,
+                              horizontal=True, key="corr_method")
+            selected_cols = st.multiselect("Columns to correlate:", numeric_cols, default=list(numeric_cols),
+                                           key="corr_columns")
+            if len(selected_cols) < 2:
+                st.info("Select at least two numeric columns.")
+            else:
+                # Calcular la matriz de correlación (o recogerla de la caché si la calculó el trabajo en segundo plano);
+                # añadir o quitar columnas reutiliza las sumas de los pares ya calculados
+                corr = correlation_matrix(df, selected_cols, method, get_cache(), key)
+
                 # Crear la visualización sin anotaciones numéricas
                 fig, ax = plt.subplots(figsize=(10, 6))
                 sns.heatmap(corr, annot=False, cmap="coolwarm", ax=ax)
-                ax.set_title("Correlation Matrix")
+                ax.set_title(f"Correlation Matrix ({method.capitalize()})")
                 st.pyplot(fig)
-                
+
                 # Generar insights automáticos
                 st.write("### Key Insights from Correlation Analysis")
-                
-                # Encontrar las correlaciones más fuertes (positivas)
-                corr_flat = corr.abs().unstack()
-                corr_flat = corr_flat[corr_flat < 1.0]  # Eliminar diagonales (correlación de variables consigo mismas)
-                strongest_corrs = corr_flat.sort_values(ascending=False)[:5]  # Top 5
-                
-                if not strongest_corrs.empty:
+
+                # Encontrar las correlaciones más fuertes (solo el triángulo superior, sin ordenar todos los pares)
+                strongest_corrs = top_pairs(corr)
+
+                if strongest_corrs:
                     st.write("#### Strongest relationships:")
-                    for idx, val in strongest_corrs.items():
-                        var1, var2 = idx
-                        corr_val = corr.loc[var1, var2]
+                    for var1, var2, corr_val in strongest_corrs:
                         relationship = "positive" if corr_val > 0 else "negative"
                         st.write(f"• **{var1}** and **{var2}**: {relationship} correlation ({corr_val:.2f})")
-                        
+
                         # Mostrar pequeño scatter plot para las correlaciones más fuertes
                         if abs(corr_val) > 0.5:  # Solo para correlaciones significativas
                             fig, ax = plt.subplots(figsize=(6, 4))
-                            sns.scatterplot(data=df, x=var1, y=var2, ax=ax)
+                            draw_scatter(ax, df, var1, var2, color=None)
                             ax.set_title(f"Relationship: {var1} vs {var2}")
                             st.pyplot(fig)
-                
+
                 # Insight general
-                avg_corr = corr_flat.mean()
+                avg_corr = mean_strength(corr)
                 if avg_corr > 0.7:
                     st.info("📊 Your dataset has strongly correlated variables, which could indicate redundancy or strong relationships.")
                 elif avg_corr > 0.4:
                     st.info("📊 Your dataset has moderately correlated variables.")
                 else:
                     st.info("📊 Most variables in your dataset appear to be weakly correlated.")
+        else:
+            st.write("Not enough numeric columns for a correlation matrix.")
+
+    elif action == "Download Cleaned Data":
+        # Parquet (zstd) y Feather (Arrow IPC) conservan los tipos y se leen mucho más rápido que un CSV
+        fmt = st.selectbox("Export format", FORMATS, format_func=str.upper, key="export_format")
+        compression = None
+        if fmt == "csv":
+            compression = st.selectbox("Compression", CSV_COMPRESSIONS, format_func=lambda c: c or "none",
+                                       key="export_compression")
+        # El fichero solo se genera al pulsar el botón (no en cada rerun), por bloques y en un fichero temporal;
+        # una ordenación final se aplica aquí, con la permutación que ya calculó la vista previa
+        def export_rows():
+            if order is None:
+                return df
+            return df.take(sort_order(df, order.params["by"], order.params["ascending"], cache=get_cache(), key=key))
+
+        st.download_button(
+            label=f"Download Cleaned {fmt.upper()}",
+            data=lambda: read_export(export_rows(), fmt, compression),
+            file_name=export_name("cleaned_data", fmt, compression),
+            mime=export_mime_type(fmt, compression)
+        )
+
+
+# Function to draw a chart only while its expander is open: a closed expander does not build its figure (nor
+# import the plotting libraries) on each rerun
+def lazy_chart(label, key, build):
+    expander = st.expander(label, key=key, on_change="rerun")
+    if expander.open:
+        with expander:
+            st.pyplot(build())
+
+
+# Function to show the dataset and column information of the "Filter Rows" action
+def show_filter_info(df, filter_column, profile=None):
+    if df.empty:
+        st.warning("The dataset is empty. Please upload data first.")
+        return
+    st.info(f"Current dataset has {len(df)} rows and {len(df.columns)} columns.")
+    if filter_column in df.columns:
+        if pd.api.types.is_numeric_dtype(df[filter_column]):
+            if profile is not None:
+                # El perfil guarda los extremos como float64: se devuelven al tipo de la columna
+                cast = df[filter_column].dtype.type
+                low, high = cast(profile.minimum[filter_column]), cast(profile.maximum[filter_column])
+            else:
+                low, high = df[filter_column].min(), df[filter_column].max()
+            st.info(f"Column '{filter_column}' is numeric. Range: {low} to {high}")
+        else:
+            unique_values = profile.cardinality[filter_column] if profile is not None else df[filter_column].nunique()
+            st.info(f"Column '{filter_column}' has {unique_values} unique values.")
+
+
+# Function to show one page of a DataFrame, sorted and searched on the server; only the visible rows reach the browser.
+# order is a final sort step that was not applied to the data: it is the order shown by default
+@st.fragment
+def show_preview(df, name, key, order=None):
+    cache = get_cache()
+    size_mb = cache.get_or_compute(chain_key(key, "memory_usage"), lambda: memory_usage(df)) / 1024 / 1024
+    st.caption(f"{len(df):,} rows · {df.shape[1]} columns · {size_mb:.2f} MB in memory")
+    search_col, sort_col, order_col, size_col = st.columns([3, 2, 1, 1])
+    with search_col:
+        query = st.text_input("Search", key=f"{name}_search", placeholder="Text or exact number")
+    with sort_col:
+        default_label = "(original order)" if order is None else "(sorted as planned)"
+        sort_column = st.selectbox("Sort by", [None] + list(df.columns), key=f"{name}_sort",
+                                   format_func=lambda col: default_label if col is None else str(col))
+    with order_col:
+        ascending = st.radio("Order", ["Ascending", "Descending"], key=f"{name}_order") == "Ascending"
+    with size_col:
+        page_size = st.selectbox("Rows per page", PAGE_SIZES, key=f"{name}_page_size")
+    base_order = None if order is None else (order.params["by"], order.params["ascending"])
+    positions = visible_positions(df, sort_column, ascending, query, cache, key, base_order)
+    pages = page_count(len(positions), page_size)
+    # La página vuelve a 1 cuando cambian la búsqueda o el tamaño de página
+    page = st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, value=1,
+                           key=f"{name}_page_{query}_{page_size}")
+    st.dataframe(page_window(df, positions, page, page_size))
+    if query:
+        st.caption(f"{len(positions):,} matching rows")
+
+
+# Function to show, after the plan runs, the output of each step in the place where the action was selected
+def show_step(step, before, after, profile=None):
+    container = step.params.get("container")
+    if container is None:
+        return
+    if step.kind == SINK:
+        with container:
+            if step.params["action"] == "Filter Info":
+                show_filter_info(before, step.params["column"], profile)
+            else:
+                render_sink(step.params["action"], before, profile, step.params.get("key"), step.params.get("order"))
+    elif step.kind == "filter":
+        with step.params["info_container"]:
+            show_filter_info(before, step.params.get("column"), profile)
+        with container:
+            if after is before:
+                st.warning("No rows match your filter criteria. Try different values.")
+            else:
+                st.success(f"Filter applied successfully. Found {len(after)} matching rows.")
+    else:
+        container.write(f"Rows: {len(before):,} → {len(after):,} · Columns: {before.shape[1]} → {after.shape[1]}")
+
+
+# Caché compartida entre reruns: clave = hash del contenido subido + parámetros de cada paso. Los frames que no
+# caben en memoria pasan a ficheros mapeados en CLEANLY_SPILL_DIR (por defecto, un directorio temporal)
+@st.cache_resource
+def get_cache():
+    return StepCache(spill=SpillStore(os.environ.get("CLEANLY_SPILL_DIR")))
+
+# Trabajos en segundo plano compartidos por todas las sesiones del servidor
+@st.cache_resource
+def get_jobs():
+    return JobManager()
+
+# Function to precompute, inside the background job, what a sink step will need when it is drawn
+def prepare_sink(cache, step, df):
+    if step.kind == SINK and step.params["action"] == "Correlation Matrix":
+        correlation_matrix(df, cache=cache, key=step.params["key"])
+
+# Function to show the progress of a background job, refreshing itself until the job finishes
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def show_job_progress(job):
+    if job.done:
+        st.rerun()  # Ejecutar el script entero: ahora los resultados están en la caché
+    st.progress(job.progress, text=f"⏳ {job.message}")
+    if st.button("Cancel", key=f"cancel_job_{job.id}"):
+        job.cancel()
+        st.rerun()
+
+
+# Function to show the instrumentation panel of this rerun, with its exports and the last profile captured
+def show_instrumentation(recorder, capture_result=None):
+    with st.expander("⏱️ Performance"):
+        st.caption("Wall and CPU time, peak memory (with memory tracing on), rows and columns in and out, and cache "
+                   "hits of each section and action step of the last rerun")
+        st.dataframe(recorder.table())
+        json_col, otel_col = st.columns(2)
+        json_col.download_button("Download spans (JSON)", json.dumps(recorder.to_json(), indent=2),
+                                 file_name="cleanly_spans.json", mime="application/json")
+        otel_col.download_button("Download OpenTelemetry spans (OTLP JSON)", json.dumps(recorder.to_otel()),
+                                 file_name="cleanly_otel.json", mime="application/json")
+        if capture_result is not None:
+            st.write("#### Profile of the captured rerun")
+            st.download_button("Download profile (.prof)", capture_result["profile_bytes"],
+                               file_name="cleanly.prof", mime="application/octet-stream")
+            st.text(capture_result["profile_text"])
+            st.write("#### Largest memory allocations")
+            st.text(capture_result["allocations_text"])
+
+
+# Instrumentación: cada rerun mide sus secciones y los pasos del plan
+st.sidebar.write("### ⏱️ Performance")
+trace_memory = st.sidebar.checkbox("Trace memory per step (slower)", key="trace_memory")
+# Captura con cProfile y tracemalloc del rerun que provoca el botón, para adjuntarla a un informe de errores
+st.sidebar.button("Profile one rerun", on_click=lambda: st.session_state.update(capture_next=True))
+if st.session_state.pop("capture_next", False):
+    capture = Capture()
+    if capture.active:
+        st.session_state["capture"] = capture
+    else:
+        st.sidebar.info("Another session is profiling a rerun. Try again when it finishes.")
+recorder = Recorder(cache=get_cache(), trace_memory=trace_memory)
+
+try:
+    # File uploader
+    uploaded_file = st.file_uploader("Upload a CSV, Parquet or Feather file", type=["csv", "parquet", "pq", "feather", "arrow"])
+
+    if uploaded_file:
+        cache = get_cache()
+        # Lo que esta sesión lee o guarda en la caché se expulsa cuando la sesión lleva tiempo abandonada
+        owner = st.session_state.setdefault("job_owner", uuid.uuid4().hex)
+        cache.session(owner)
+        data = uploaded_file.getvalue()
+        upload_key = content_hash(data)
+        fmt = detect_format(uploaded_file.name)
+        recorder.section("Load data", file=uploaded_file.name, bytes=len(data))
+
+        # Opciones de carga: en Parquet y Feather solo se decodifican las columnas elegidas,
+        # y en Parquet el filtro se usa para saltarse los row groups que no lo cumplen
+        schema = cache.get_or_compute(chain_key(upload_key, "schema"), lambda: read_schema(data, fmt))
+        with st.expander("⚙️ Load Options"):
+            load_columns = st.multiselect("Columns to load", list(schema), default=list(schema))
+            filters = []
+            if st.checkbox("Only load rows matching a condition"):
+                load_col1, load_col2, load_col3 = st.columns(3)
+                with load_col1:
+                    load_filter_column = st.selectbox("Column", list(schema), key="load_filter_column")
+                with load_col2:
+                    load_filter_op = st.selectbox("Condition", FILTER_OPS, key="load_filter_op")
+                with load_col3:
+                    load_filter_value = st.text_input("Value", key="load_filter_value")
+                if load_filter_value:
+                    column_type = schema[load_filter_column]
+                    numeric = (pa.types.is_integer(column_type) or pa.types.is_floating(column_type)
+                               if isinstance(column_type, pa.DataType) else pd.api.types.is_numeric_dtype(column_type))
+                    try:
+                        filters.append((load_filter_column, load_filter_op,
+                                        float(load_filter_value) if numeric else load_filter_value))
+                    except ValueError:
+                        st.error(f"Column '{load_filter_column}' is numeric. Please enter a number.")
+            compact = st.checkbox("Optimize memory (smaller numeric types, categorical text)", value=True)
+        if not load_columns:
+            st.warning("Select at least one column to load.")
+            st.stop()
+        columns = None if load_columns == list(schema) else load_columns
+        # Todo lo que se calcula a partir del DataFrame cargado cuelga de frame_key, que incluye las opciones de carga
+        frame_key = chain_key(upload_key, "read", fmt, columns, filters)
+        if compact:
+            frame_key = chain_key(frame_key, "optimize_dtypes")
+            # El informe va en su propia entrada: así el DataFrame se puede volcar a disco como cualquier otro paso
+            report_key = chain_key(frame_key, "memory_report")
+            df = cache.get(frame_key)
+            memory_report = cache.get(report_key)
+            if df is None or memory_report is None:
+                df, memory_report = optimize_dtypes(read_table(data, fmt, columns=columns, filters=filters))
+                cache.put(frame_key, df)
+                cache.put(report_key, memory_report)
+        else:
+            df = cache.get_or_compute(frame_key, lambda: read_table(data, fmt, columns=columns, filters=filters))
+            memory_report = None
+        recorder.annotate(rows_out=len(df), columns_out=df.shape[1])
+        recorder.section("Profile and summaries", df)
+        # Perfil de una sola pasada: tipos, nulos, duplicados, cuantiles, outliers, cardinalidad y extremos
+        data_profile = cache.get_or_compute(chain_key(frame_key, "profile"), lambda: DataProfile(df))
+        # Histogramas y cuentas de valores de todas las columnas; los pasos del plan los actualizan sin recorrer todo
+        frame_summary(df, cache, frame_key)
+        recorder.section("Original data preview", df)
+        st.write("### Original Data")
+        show_preview(df, "original", frame_key)
+
+        recorder.section("Overview: data types", df)
+        # Mostrar información inicial
+        st.write("### Data Overview")
+        st.write(f"Number of rows: {df.shape[0]}")
+        st.write(f"Number of columns: {df.shape[1]}")
+        if memory_report is not None:
+            before_mb, after_mb = memory_report["before"] / 1024 / 1024, memory_report["after"] / 1024 / 1024
+            st.write(f"Memory usage: {before_mb:.2f} MB → {after_mb:.2f} MB after optimizing {len(memory_report['changes'])} columns")
+
+        # Mostrar tipos de datos
+        st.write("### Data Types")
+        # Crear un DataFrame para mostrar los tipos de datos de forma más elegante
+        dtypes_df = data_profile.dtypes_table()
+        st.write(dtypes_df)
+    
+        # Visualizar distribución de tipos de datos
+        dtype_counts = df.dtypes.value_counts().reset_index()
+        dtype_counts.columns = ['Data Type', 'Count']
+        lazy_chart("📊 Distribution of column data types", "overview_dtype_chart", lambda: dtype_chart(dtype_counts))
+
+        recorder.section("Overview: duplicates", df)
+        # Mostrar duplicados
+        st.write("### Duplicates")
+        duplicates = df[data_profile.duplicated]
+        st.write(f"Number of duplicate rows: {len(duplicates)}")
+        if not duplicates.empty:
+            st.write(duplicates)
+
+        recorder.section("Overview: missing values", df)
+        # Mostrar valores nulos
+        st.write("### Missing Values")
+        missing_values = data_profile.null_counts
+        st.write(missing_values[missing_values > 0])
+
+        recorder.section("Overview: missing values heatmap", df)
+        # Visualización de valores nulos
+        st.write("### Missing Values Heatmap")
+
+        # Calcular estadísticas de valores nulos
+        missing_count = data_profile.missing_count
+        missing_percent = (missing_count / (df.shape[0] * df.shape[1])) * 100
+        st.write(f"Missing values: {missing_count:,} ({missing_percent:.2f}% of all cells)")
+
+        # Fracción de nulos por bloque de filas: el heatmap tiene siempre el mismo tamaño, sea cual sea el número de filas
+        def build_heatmap():
+            null_grid = cache.get_or_compute(chain_key(frame_key, "null_grid"), lambda: null_fraction_grid(df))
+            return missing_values_chart(null_grid, missing_count, missing_percent, df.shape)
+
+        lazy_chart("🗺️ Heatmap of missing values", "overview_null_heatmap", build_heatmap)
+
+        recorder.section("Overview: outliers", df)
+        # Detección básica de outliers
+        # Definir columnas numéricas
+        numeric_cols = data_profile.numeric_columns
+        st.write("### Potential Outliers in Numeric Columns")
+        if len(numeric_cols) > 0:
+            outlier_df = data_profile.outlier_table()
+            st.write(outlier_df)
+        
+            # Visualizar columnas con más outliers
+            if not outlier_df.empty:
+                # Preparar los datos
+                plot_data = outlier_df.sort_values('Outliers Count', ascending=False).head(5)
+            
+                lazy_chart("📊 Columns with the most potential outliers", "overview_outlier_chart",
+                           lambda: outlier_chart(plot_data))
+
+        recorder.section("Choose actions", df)
+        # Menú para acciones
+        st.write("### What would you like to do next with your data?")
+        options = [
+            "Show Descriptive Statistics",
+            "Basic Data Cleaning",
+            "Remove Outliers (Z-Score)",
+            "Remove Outliers (IQR)",
+            "Normalize Data",
+            "Encode Categorical Columns",
+            "Delete Specific Columns",
+            "Rename Columns",
+            "Filter Rows",
+            "Sort Data",
+            "Visualize Histograms",
+            "Visualize Bar Charts",
+            "Scatter Plot",
+            "Group Data",
+            "Correlation Matrix",  # Nueva opción para la matriz de correlación
+            "Download Cleaned Data"
+        ]
+        selected_actions = st.multiselect("Choose one or more actions:", options)
+        plan_container = st.container()
+
+        # 1) Construir el plan: recoger los parámetros de cada acción sin tocar todavía los datos.
+        #    Los widgets solo necesitan columnas y tipos, que salen de un prototipo vacío del DataFrame.
+        steps = []
+        prototype = df.iloc[:0]
+        for action in selected_actions:
+            if action == "Basic Data Cleaning":
+                st.write("### Data after basic cleaning")
+                st.write("✅ Duplicates removed")
+                st.write("✅ Missing numeric values filled with mean")
+                st.write("✅ Missing text values filled with mode")
+                keys = st.multiselect("Columns that identify a duplicate (leave empty to compare whole rows):",
+                                      prototype.columns, key="duplicate_keys")
+                steps.append(clean_step(keys).replace(container=st.container()))
+            elif action == "Remove Outliers (Z-Score)":
+                st.write("Data after removing outliers (Z-Score):")
+                steps.append(zscore_step().replace(container=st.container()))
+            elif action == "Remove Outliers (IQR)":
+                st.write("Data after removing outliers (IQR):")
+                steps.append(iqr_step().replace(container=st.container()))
+            elif action == "Normalize Data":
+                st.write("Data after normalization:")
+                steps.append(normalize_step().replace(container=st.container()))
+            elif action == "Encode Categorical Columns":
+                st.write("Data after encoding categorical columns:")
+                steps.append(encode_step().replace(container=st.container()))
+            elif action == "Delete Specific Columns":
+                columns_to_delete = st.multiselect("Select columns to delete:", prototype.columns)
+                if columns_to_delete:
+                    st.write("Data after deleting columns:")
+                    steps.append(delete_step(columns_to_delete).replace(container=st.container()))
+            elif action == "Rename Columns":
+                selected_col = st.selectbox("Select a column to rename:", prototype.columns)
+                new_name = st.text_input("Enter the new name for the column:")
+                if new_name:
+                    st.write(f"Column '{selected_col}' renamed to '{new_name}'")
+                    steps.append(rename_step(selected_col, new_name).replace(container=st.container()))
+            elif action == "Filter Rows":
+                if len(prototype.columns) == 0:
+                    st.warning("The dataset is empty. Please upload data first.")
+                else:
+                    # Información del dataset y de la columna, rellenada al ejecutar el plan
+                    info_container = st.container()
+
+                    # Varias condiciones con AND / OR: se evalúan juntas, con los índices de cada columna
+                    if st.checkbox("Combine several conditions (AND / OR)", key="filter_use_expression"):
+                        filter_expression = st.text_input(
+                            "Filter expression:", key="filter_expression",
+                            placeholder='price > 10 and (city contains "mad" or city == "Rome")')
+                        st.caption("Conditions: ==, !=, >, >=, <, <=, contains. Quote text values and "
+                                   "wrap column names with spaces in `backticks`.")
+                        apply_filter = st.button("Apply Filter")
+                        if filter_expression and apply_filter:
+                            try:
+                                step = expression_filter_step(filter_expression, keep_if_empty=True)
+                            except ValueError as e:
+                                st.error(str(e))
+                                st.stop()
+                            missing = filter_columns(step) - set(prototype.columns)
+                            if missing:
+                                st.error(f"Unknown columns in the filter expression: {sorted(missing)}")
+                                st.stop()
+                            steps.append(step.replace(container=st.container(), info_container=info_container))
+                        else:
+                            steps.append(sink_step("Filter Info", container=info_container, column=None))
+                        prototype = prototype_at(prototype, steps[-1:])
+                        continue
+
+                    # Seleccionar columna para filtrar
+                    filter_column = st.selectbox("Select column to filter by:", prototype.columns)
+
+                    # Opciones de filtrado basadas en el tipo de columna
+                    is_numeric = pd.api.types.is_numeric_dtype(prototype[filter_column])
+                    if is_numeric:
+                        filter_type = st.radio("Filter type:", ["Equal to", "Greater than", "Less than"], horizontal=True)
+                    else:
+                        filter_type = st.radio("Filter type:", ["Equal to", "Contains"], horizontal=True)
+
+                    # Entrada del valor de filtro
+                    filter_value = st.text_input("Enter value to filter by:")
+
+                    # Botón para aplicar el filtro (para asegurar que la acción sea explícita)
+                    apply_filter = st.button("Apply Filter")
+
+                    if filter_value and apply_filter:
+                        if is_numeric:
+                            try:
+                                float(filter_value)
+                            except ValueError:
+                                st.error(f"Please enter a valid number for column '{filter_column}'")
+                                st.stop()  # Detener la ejecución si hay un error
+                        step = filter_step(filter_column, filter_type, filter_value, keep_if_empty=True)
+                        steps.append(step.replace(container=st.container(), info_container=info_container))
+                    else:
+                        steps.append(sink_step("Filter Info", container=info_container, column=filter_column))
+            elif action == "Sort Data":
+                sort_columns = st.multiselect("Select columns to sort by (in order of priority):", prototype.columns,
+                                              default=list(prototype.columns[:1]))
+                sort_direction = st.radio("Sort order:", ["Ascending", "Descending"])
+                # Top-N: con una selección parcial, quedarse con N filas cuesta O(n) en lugar de ordenarlas todas
+                sort_limit = st.number_input("Keep only the first N rows (0 keeps every row):", min_value=0, value=0,
+                                             step=1, help="With 'Descending', the first N rows are the N largest values")
+                if sort_columns:
+                    st.write("Data after sorting:")
+                    step = sort_step(sort_columns, sort_direction == "Ascending", int(sort_limit) or None)
+                    steps.append(step.replace(container=st.container()))
+                else:
+                    st.warning("Please select at least one column to sort by.")
+            else:
+                # Estadísticas, gráficos y descarga: se dibujan con los datos que les lleguen al ejecutar el plan
+                steps.append(sink_step(action, container=st.container()))
+            prototype = prototype_at(prototype, steps[-1:])
+
+        # 2) Optimizar el plan y 3) ejecutarlo una sola vez
+        if steps:
+            recorder.section("Run actions", df)
+            plan, notes = optimize(steps, df.iloc[:0])
+            plan, final_sort = defer_final_sort(plan, notes)
+            # Cada paso de salida recibe la clave de su entrada para guardar en la caché lo que calcule
+            plan = [step.replace(key=input_key) if step.kind == SINK else step
+                    for step, input_key in zip(plan, step_keys(plan, frame_key))]
+            corr_keys = [correlation_key(step.params["key"]) for step in plan
+                         if step.kind == SINK and step.params["action"] == "Correlation Matrix"]
+
+            # Los cálculos pesados van a un trabajo en segundo plano: la interfaz no se bloquea, y un rerun
+            # con el mismo plan se engancha al trabajo en curso en lugar de empezar de nuevo
+            jobs = get_jobs()
+            job_key = chain_key(frame_key, [signature(step) for step in plan])
+            jobs.cancel_others(owner, job_key)
+            job = jobs.get(job_key)
+            if job is None and not (is_cached(plan, cache, frame_key) and all(corr_key in cache for corr_key in corr_keys)):
+                job = jobs.submit(owner, job_key, execute_job, plan, df, cache, frame_key, profile=data_profile,
+                                  prepare=lambda step, before: prepare_sink(cache, step, before))
+                job.wait(JOB_WAIT_SECONDS)
+            if job is not None and job.state == "failed":
+                jobs.forget(job_key)  # Al ejecutar el plan aquí se muestra el error; el siguiente rerun lo reintenta
+
+            timings = None
+            if job is not None and not job.done:
+                with plan_container:
+                    show_job_progress(job)
+            elif job is not None and job.state == "cancelled":
+                with plan_container:
+                    st.warning("The selected actions were cancelled.")
+                    if st.button("Run again"):
+                        jobs.forget(job_key)
+                        st.rerun()
             else:
-                st.write("Not enough numeric columns for a correlation matrix.")
-
-        elif action == "Download Cleaned Data":
-            buffer = BytesIO()
-            df.to_csv(buffer, index=False)
-            buffer.seek(0)
-            st.download_button(
-                label="Download Cleaned CSV",
-                data=buffer,
-                file_name="cleaned_data.csv",
-                mime="text/csv"
-            )
\ No newline at end of file
+                # Con los resultados ya en la caché, esta pasada solo dibuja cada paso
+                try:
+                    df, timings = execute(
+                        plan, df, cache=cache, key=frame_key, profile=data_profile,
+                        on_step=lambda step, before, after: show_step(step, before, after,
+                                                                      data_profile if before is df else None))
+                    if job is not None and job.state == "done":
+                        # Tiempos reales del trabajo, no los de leer la caché, más lo que tardó dibujar cada paso aquí
+                        timings = [{**computed, **{name: (computed.get(name) or 0) + (drawn.get(name) or 0)
+                                                   for name in ("render_seconds", "render_cpu_seconds")}}
+                                   for computed, drawn in zip(job.result, timings)]
+                except Exception as e:
+                    timings = None
+                    st.error(f"Error while running the selected actions: {str(e)}")
+                    st.write("Please try different options or contact support if the issue persists.")
+
+            if timings is not None:
+                recorder.annotate(rows_out=len(df), columns_out=df.shape[1])
+                recorder.add_steps(timings)
+            with plan_container.expander("🧭 Execution Plan"):
+                st.markdown(explain(plan, notes, timings))
+
+            if timings is not None and (any(step.kind != SINK for step in plan) or final_sort is not None):
+                recorder.section("Result preview", df)
+                st.write("### Resulting Data")
+                if final_sort is not None and final_sort.params.get("container") is not None:
+                    final_sort.params["container"].write(f"Rows: {len(df):,} · The order is applied in the preview below "
+                                                         f"and in the download, without copying the data")
+                show_preview(df, "result", output_key(plan, frame_key), final_sort)
+
+        # Estadísticas de la caché en la barra lateral
+        cache_stats = cache.stats()
+        st.sidebar.caption(
+            f"🗄️ Cache: {cache_stats['hits']} hits · {cache_stats['misses']} misses · "
+            f"{cache_stats['entries']} entries · {cache_stats['used_mb']:.1f} / {cache_stats['budget_mb']:.0f} MB · "
+            f"{cache_stats['spilled']} on disk ({cache_stats['spilled_mb']:.1f} MB, {cache_stats['reloads']} reloads)"
+        )
+
+finally:
+    # Cerrar las medidas en esta misma ejecución, aunque el script termine antes (st.stop, st.rerun, un error o la
+    # sesión cerrada): tracemalloc y el bloqueo de cProfile son de todo el proceso y no pueden quedar activos
+    recorder.finish()
+    if "capture" in st.session_state:
+        st.session_state["capture_result"] = st.session_state.pop("capture").stop()
+
+# Panel de instrumentación, dibujado al final para que sus tiempos no se midan a sí mismos
+show_instrumentation(recorder, st.session_state.get("capture_result"))
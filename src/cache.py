@@ -0,0 +1,181 @@
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_BUDGET_MB = int(os.environ.get("CLEANLY_CACHE_MB", "512"))
+DEFAULT_SESSION_MINUTES = float(os.environ.get("CLEANLY_SESSION_MINUTES", "30"))
+
+
+# Function to hash the content of an upload
+def content_hash(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+# Function to derive the key of a step from the key of its input and the step parameters
+def chain_key(parent, *parts):
+    digest = hashlib.blake2b(str(parent).encode(), digest_size=16)
+    for part in parts:
+        digest.update(repr(part).encode())
+    return digest.hexdigest()
+
+# Function to estimate the memory used by a cached value
+def estimate_size(value):
+    if isinstance(value, pd.DataFrame):
+        size = int(value.memory_usage(index=True, deep=False).sum())
+        # Para columnas de objetos, estimar el tamaño de los objetos con una muestra en lugar de recorrerlos todos;
+        # las de texto (str) guardan sus cadenas en un buffer de Arrow que memory_usage ya cuenta
+        for col in [col for col, dtype in value.dtypes.items() if dtype == object]:
+            sample = value[col].iloc[:1000]
+            if len(sample):
+                size += int(np.mean([sys.getsizeof(v) for v in sample]) * len(value))
+        return size
+    if isinstance(value, (pd.Series, pd.Index)):
+        return estimate_size(value.to_frame())
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(estimate_size(v) for v in value)
+    if isinstance(value, dict):
+        return sum(estimate_size(v) for v in value.values())
+    return sys.getsizeof(value)
+
+
+# Class implementing an LRU cache of frames and intermediate results with a memory budget. With a spill store,
+# the frames it evicts go to memory-mapped files instead of being dropped, and are read back without copying.
+# Each entry remembers the sessions that used it: when they are all abandoned, the entry is dropped
+class StepCache:
+    def __init__(self, budget_mb=DEFAULT_BUDGET_MB, spill=None, session_minutes=DEFAULT_SESSION_MINUTES):
+        self.budget = int(budget_mb * 1024 * 1024)
+        self.entries = OrderedDict()
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.reloads = 0
+        self.spill = spill
+        self.session_seconds = session_minutes * 60
+        self.sessions = {}  # Sesión -> última vez que se usó
+        self.owners = {}  # Clave -> sesiones que la han leído o guardado
+        self.local = threading.local()  # Sesión del hilo actual
+        self.lock = threading.Lock()  # Streamlit sirve cada sesión en su propio hilo
+
+    def own(self, key):
+        owner = getattr(self.local, "owner", None)
+        if owner is not None:
+            self.owners.setdefault(key, set()).add(owner)
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                self.own(key)
+                return self.entries[key][0]
+        # Un frame volcado a disco se lee con un memory map: no ocupa memoria del proceso hasta que se usa
+        value = self.spill.read(key) if self.spill is not None else None
+        with self.lock:
+            if value is not None:
+                self.hits += 1
+                self.reloads += 1
+                self.own(key)
+                return value
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        size = estimate_size(value)
+        evicted = []
+        with self.lock:
+            self.own(key)
+            if key in self.entries:
+                self.used -= self.entries.pop(key)[1]
+            if size > self.budget:
+                evicted.append((key, value))  # No cabe en memoria: solo puede ir a disco
+            else:
+                self.entries[key] = (value, size)
+                self.used += size
+            # Expulsar las entradas usadas hace más tiempo hasta volver al presupuesto
+            while self.used > self.budget:
+                evicted_key, (evicted_value, evicted_size) = self.entries.popitem(last=False)
+                self.used -= evicted_size
+                self.evictions += 1
+                evicted.append((evicted_key, evicted_value))
+        if self.spill is not None:
+            if all(evicted_key != key for evicted_key, _ in evicted):
+                self.spill.remove(key)  # La versión en memoria sustituye a la del disco
+            # Escribir fuera del lock: las demás sesiones siguen leyendo mientras tanto
+            for evicted_key, evicted_value in evicted:
+                if not self.spill.write(evicted_key, evicted_value):
+                    with self.lock:
+                        self.owners.pop(evicted_key, None)
+        else:
+            with self.lock:
+                for evicted_key, _ in evicted:
+                    self.owners.pop(evicted_key, None)
+        return value
+
+    def session(self, owner):
+        # Marca la sesión como activa y como dueña de lo que este hilo lea o guarde; de paso, expulsa lo que solo
+        # usaban sesiones abandonadas (sin actividad durante session_minutes)
+        now = time.time()
+        with self.lock:
+            self.local.owner = owner
+            self.sessions[owner] = now
+            expired = {name for name, seen in self.sessions.items() if now - seen > self.session_seconds}
+            for name in expired:
+                del self.sessions[name]
+            abandoned = [key for key, owners in self.owners.items() if owners and owners <= expired] if expired else []
+            for key in abandoned:
+                del self.owners[key]
+                if key in self.entries:
+                    self.used -= self.entries.pop(key)[1]
+                    self.evictions += 1
+            for key, owners in self.owners.items():
+                owners -= expired
+        if self.spill is not None:
+            for key in abandoned:
+                self.spill.remove(key)
+        return abandoned
+
+    def get_or_compute(self, key, compute):
+        marker = object()
+        value = self.get(key, marker)
+        if value is marker:
+            value = self.put(key, compute())
+        return value
+
+    def __contains__(self, key):
+        with self.lock:
+            if key in self.entries:
+                return True
+        return self.spill is not None and key in self.spill
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.owners.clear()
+            self.used = 0
+        if self.spill is not None:
+            for key in self.spill.keys():
+                self.spill.remove(key)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self.entries),
+                "used_mb": self.used / 1024 / 1024,
+                "budget_mb": self.budget / 1024 / 1024,
+                "reloads": self.reloads,
+                "spilled": len(self.spill.files) if self.spill is not None else 0,
+                "spilled_mb": self.spill.used / 1024 / 1024 if self.spill is not None else 0.0,
+                "sessions": len(self.sessions),
+            }
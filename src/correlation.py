@@ -0,0 +1,173 @@
+import copy
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .cache import chain_key
+except ImportError:  # Ejecutado como script desde src/ (streamlit run src/app.py)
+    from cache import chain_key
+
+
+CORRELATION_METHODS = ("pearson", "spearman")
+CHUNK_ROWS = 65_536  # Filas convertidas a float32 a la vez: la memoria extra no crece con el fichero
+TOP_PAIRS = 5
+STATS = ("count", "sums", "squares", "products")
+
+
+# Function to get the values a correlation method compares: the numbers themselves (Pearson) or their ranks (Spearman)
+def method_values(df, columns, method="pearson"):
+    if method not in CORRELATION_METHODS:
+        raise ValueError(f"Unknown correlation method '{method}'. Expected one of {CORRELATION_METHODS}")
+    values = df[list(columns)]
+    # Rangos medios en caso de empate, como corr(method="spearman"); los nulos siguen siendo nulos
+    return values.rank() if method == "spearman" else values
+
+# Function to cut a block of rows of some columns as a standardized float32 matrix (NaN where the value is null)
+def standardized_chunk(values, start, stop, shift, scale):
+    chunk = values.iloc[start:stop].to_numpy(dtype=np.float64, na_value=np.nan)
+    # Centrar y escalar en float64 antes de bajar a float32: los enteros grandes no pierden precisión relativa
+    return ((chunk - shift) / scale).astype(np.float32)
+
+# Function to compute the sums of one block of rows between columns a and b with matrix products (BLAS)
+def block_stats(xa, xb):
+    valid_a, valid_b = ~np.isnan(xa), ~np.isnan(xb)
+    if valid_a.all() and valid_b.all():
+        # Sin nulos: cada par ve todas las filas, y las sumas salen de una sola pasada por columna
+        rows = np.float64(len(xa))
+        sums = xa.sum(axis=0, dtype=np.float64)
+        squares = np.square(xa, dtype=np.float64).sum(axis=0)
+        shape = (xa.shape[1], xb.shape[1])
+        return {"count": np.full(shape, rows), "sums": np.broadcast_to(sums[:, None], shape),
+                "squares": np.broadcast_to(squares[:, None], shape), "products": xa.T @ xb}
+    # Con nulos: cada par usa las filas donde las dos columnas tienen valor, como pandas (pairwise)
+    ma, mb = valid_a.astype(np.float32), valid_b.astype(np.float32)
+    xa, xb = np.where(valid_a, xa, 0), np.where(valid_b, xb, 0)
+    return {"count": ma.T @ mb, "sums": xa.T @ mb, "squares": (xa * xa).T @ mb, "products": xa.T @ xb}
+
+
+# Class accumulating, block by block, the sums a pairwise correlation needs: for each pair of columns (i, j),
+# the rows where both have a value, the sum and sum of squares of i over those rows, and the sum of products
+class CorrelationStats:
+    def __init__(self, columns, shift, scale):
+        self.columns = list(columns)
+        self.shift = np.asarray(shift, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        size = len(self.columns)
+        self.stats = {name: np.zeros((size, size)) for name in STATS}
+
+    @classmethod
+    def from_values(cls, values):
+        # Media y desviación de cada columna para estandarizar; una columna constante no se escala
+        shift = values.mean().to_numpy(dtype=np.float64, na_value=0.0)
+        scale = values.std().to_numpy(dtype=np.float64, na_value=1.0)
+        return cls(values.columns, np.nan_to_num(shift), np.where(np.nan_to_num(scale) > 0, scale, 1.0))
+
+    def update(self, chunk):
+        # Bloque de filas ya estandarizado con shift y scale: sumas mezclables entre bloques
+        for name, value in block_stats(chunk, chunk).items():
+            self.stats[name] += value
+        return self
+
+    def accumulate(self, values, chunk_rows=CHUNK_ROWS):
+        for start in range(0, len(values), chunk_rows):
+            self.update(standardized_chunk(values, start, start + chunk_rows, self.shift, self.scale))
+        return self
+
+    def extended(self, values, chunk_rows=CHUNK_ROWS):
+        # Columnas nuevas: solo se calculan sus pares con las demás; los pares ya sumados no se tocan
+        new = [col for col in values.columns if col not in self.columns]
+        if not new:
+            return self
+        added = CorrelationStats.from_values(values[new])
+        columns = self.columns + new
+        shift = np.concatenate([self.shift, added.shift])
+        scale = np.concatenate([self.scale, added.scale])
+        result = CorrelationStats(columns, shift, scale)
+        old = len(self.columns)
+        for name in STATS:
+            result.stats[name][:old, :old] = self.stats[name]
+        ordered = values[columns]
+        for start in range(0, len(values), chunk_rows):
+            chunk = standardized_chunk(ordered, start, start + chunk_rows, shift, scale)
+            # Filas de todas las columnas frente a las nuevas, y de las nuevas frente a todas
+            for name, value in block_stats(chunk, chunk[:, old:]).items():
+                result.stats[name][:, old:] += value
+            for name, value in block_stats(chunk[:, old:], chunk[:, :old]).items():
+                result.stats[name][old:, :old] += value
+        return result
+
+    def subset(self, columns):
+        positions = [self.columns.index(col) for col in columns]
+        result = copy.copy(self)
+        result.columns = list(columns)
+        result.shift, result.scale = self.shift[positions], self.scale[positions]
+        result.stats = {name: value[np.ix_(positions, positions)] for name, value in self.stats.items()}
+        return result
+
+    def matrix(self):
+        n, products = self.stats["count"], self.stats["products"]
+        sums, squares = self.stats["sums"], self.stats["squares"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            covariance = n * products - sums * sums.T
+            variance = (n * squares - sums ** 2) * (n * squares.T - sums.T ** 2)
+            corr = np.clip(covariance / np.sqrt(variance), -1.0, 1.0)
+        corr[variance <= 0] = np.nan  # Columnas constantes en las filas compartidas, como pandas
+        diagonal = np.diag_indices(len(self.columns))
+        corr[diagonal] = np.where(np.isnan(corr[diagonal]), np.nan, 1.0)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+    def __sizeof__(self):
+        return sum(value.nbytes for value in self.stats.values()) + self.shift.nbytes + self.scale.nbytes
+
+
+# Function to compute a correlation matrix from chunks that arrive one after another (e.g. pd.read_csv(chunksize=...))
+def correlation_from_chunks(chunks, columns=None):
+    stats = None
+    for chunk in chunks:
+        if stats is None:
+            values = chunk[list(columns) if columns is not None else chunk.select_dtypes(include=np.number).columns]
+            # Sin una pasada previa, el primer bloque fija la media y la escala con las que se estandariza
+            stats = CorrelationStats.from_values(values)
+        values = chunk[stats.columns]
+        stats.update(standardized_chunk(values, 0, len(values), stats.shift, stats.scale))
+    return stats.matrix() if stats is not None else pd.DataFrame()
+
+# Function to compute the correlation matrix of some numeric columns, reusing the sums cached for the same data
+def correlation_matrix(df, columns=None, method="pearson", cache=None, key=None):
+    columns = list(df.select_dtypes(include=np.number).columns if columns is None else columns)
+    if cache is None or key is None:
+        values = method_values(df, columns, method)
+        return CorrelationStats.from_values(values).accumulate(values).matrix()
+    cache_key = correlation_key(key, method)
+    stats = cache.get(cache_key)
+    if stats is None:
+        values = method_values(df, columns, method)
+        stats = cache.put(cache_key, CorrelationStats.from_values(values).accumulate(values))
+    elif any(col not in stats.columns for col in columns):
+        # Al añadir columnas se suman solo sus pares; al quitarlas basta con recortar la matriz
+        new = [col for col in columns if col not in stats.columns]
+        stats = cache.put(cache_key, stats.extended(method_values(df, stats.columns + new, method)))
+    return stats.subset(columns).matrix()
+
+# Function to get the cache key of the correlation sums of some data
+def correlation_key(key, method="pearson"):
+    return chain_key(key, "corr", method)
+
+# Function to find the k most correlated pairs looking only at the upper triangle, without sorting every pair
+def top_pairs(corr, k=TOP_PAIRS):
+    values = corr.to_numpy()
+    rows, cols = np.triu_indices(len(values), 1)
+    strength = np.abs(values[rows, cols])
+    valid = np.flatnonzero(~np.isnan(strength))
+    if len(valid) > k:
+        valid = valid[np.argpartition(-strength[valid], k - 1)[:k]]
+    valid = valid[np.argsort(-strength[valid], kind="stable")]
+    return [(corr.index[rows[i]], corr.columns[cols[i]], float(values[rows[i], cols[i]])) for i in valid]
+
+# Function to compute the mean strength of the correlations between different columns
+def mean_strength(corr):
+    values = corr.to_numpy()
+    strength = np.abs(values[np.triu_indices(len(values), 1)])
+    strength = strength[~np.isnan(strength)]
+    return float(strength.mean()) if len(strength) else float("nan")
@@ -0,0 +1,180 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+
+NULL_HASH = np.uint64(0x9E3779B97F4A7C15)  # hash_array(0.0) es 0, así que los nulos necesitan otro valor
+SECOND_HASH_KEY = "cleanly-dedup128"  # Segunda clave (16 caracteres) para la otra mitad de las huellas de 128 bits
+SECOND_SALT = np.uint64(0xC2B2AE3D27D4EB4F)
+BITS = (64, 128)
+
+
+# Function to get hashable keys for an object column: text as it is, anything else with its type name in front,
+# since hash_pandas_object turns objects into text and 1 and '1' would otherwise get the same hash
+def object_keys(values):
+    # Separador \x1f: el hash corta las cadenas en el primer \x00
+    return pd.Series([value if isinstance(value, str) else f"\x1f{type(value).__name__}\x1f{value}"
+                      for value in values.to_numpy()], dtype=object)
+
+# Function to hash the values of one column, giving the same hash to equal values whatever the chunk dtype
+def column_hashes(values, second=False):
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        # Números como float para que 1 y 1.0 coincidan entre bloques int y float; + 0.0 iguala -0.0 y 0.0
+        numbers = values.to_numpy(dtype=np.float64, na_value=np.nan) + 0.0
+        if second:
+            hashes = pd.util.hash_array(numbers.view(np.uint64) ^ SECOND_SALT)
+        else:
+            hashes = pd.util.hash_array(numbers)
+    else:
+        # Mismo hash para texto object, str o category; en category solo se hashean las categorías
+        hash_key = SECOND_HASH_KEY if second else "0123456789123456"
+        mixed = values.dtype == object and pd.api.types.infer_dtype(values, skipna=True) != "string"
+        keys = object_keys(values) if mixed else values
+        hashes = pd.util.hash_pandas_object(keys, index=False, hash_key=hash_key).to_numpy().copy()
+    # Un nulo vale lo mismo sea cual sea el tipo con el que se leyó la columna
+    hashes[values.isna().to_numpy()] = NULL_HASH
+    return hashes
+
+# Function to compute one 64-bit fingerprint per row, or two 64-bit halves (an (n, 2) array) for 128 bits
+def row_fingerprints(df, columns=None, bits=64):
+    if bits not in BITS:
+        raise ValueError(f"bits must be one of {BITS}")
+    columns = df.columns if columns is None else columns
+    first = np.zeros(len(df), dtype=np.uint64)
+    second = np.zeros(len(df), dtype=np.uint64)
+    for col in columns:
+        # Combinar columna a columna con aritmética módulo 2**64, sin tocar objetos de Python
+        first = first * np.uint64(1000003) + column_hashes(df[col])
+        if bits == 128:
+            second = (second ^ column_hashes(df[col], second=True)) * np.uint64(0x100000001B3)
+    return first if bits == 64 else np.column_stack([first, second])
+
+# Function to sort fingerprints, keeping equal ones in their original order
+def fingerprint_order(fingerprints):
+    if fingerprints.ndim == 1:
+        return np.argsort(fingerprints, kind='stable')
+    # Ordenar por la mitad alta y luego por la baja; lexsort es estable
+    return np.lexsort((fingerprints[:, 1], fingerprints[:, 0]))
+
+# Function to tell, for sorted fingerprints, which ones equal the previous one
+def same_as_previous(ordered):
+    if len(ordered) == 0:
+        return np.zeros(0, dtype=bool)
+    same = ordered[1:] == ordered[:-1]
+    same = same if ordered.ndim == 1 else same.all(axis=1)
+    return np.concatenate([[False], same])
+
+# Function to mark the repeated occurrences of each fingerprint, keeping the first (like duplicated(keep='first'))
+def duplicated_fingerprints(fingerprints):
+    order = fingerprint_order(fingerprints)
+    duplicated = np.zeros(len(fingerprints), dtype=bool)
+    duplicated[order[same_as_previous(fingerprints[order])]] = True
+    return duplicated
+
+# Function to mark duplicate rows, optionally comparing only some key columns
+def duplicated_rows(df, columns=None, bits=64):
+    fingerprints = row_fingerprints(df, columns, bits)
+    duplicated = duplicated_fingerprints(fingerprints)
+    if not duplicated.any():
+        return duplicated
+    # Las huellas solo proponen candidatos: las filas cuya huella se repite se comparan de verdad, así una
+    # colisión nunca borra una fila distinta
+    repeated = fingerprints[duplicated]
+    if fingerprints.ndim == 1:
+        candidates = np.flatnonzero(np.isin(fingerprints, repeated))
+    else:
+        candidates = np.flatnonzero(pd.MultiIndex.from_arrays(fingerprints.T).isin(
+            pd.MultiIndex.from_arrays(repeated.T)))
+    subset = df.iloc[candidates] if columns is None else df[list(columns)].iloc[candidates]
+    duplicated[candidates] = subset.duplicated().to_numpy()
+    return duplicated
+
+
+# Class storing a compact set of fingerprints as sorted arrays, in memory or memory-mapped from disk
+class FingerprintSet:
+    def __init__(self, bits=64, runs=None):
+        if bits not in BITS:
+            raise ValueError(f"bits must be one of {BITS}")
+        self.bits = bits
+        # Tramos ordenados y sin repetidos; se fusionan como en un LSM para que haya pocos
+        self.runs = []
+        self.keys = []  # Mitad alta contigua de cada tramo, para buscar con searchsorted sobre uint64
+        for run in runs or []:
+            self.append_run(run)
+
+    def append_run(self, run):
+        self.runs.append(run)
+        self.keys.append(run if run.ndim == 1 else np.ascontiguousarray(run[:, 0]))
+
+    def __len__(self):
+        return sum(len(run) for run in self.runs)
+
+    def contains(self, fingerprints):
+        found = np.zeros(len(fingerprints), dtype=bool)
+        wanted = fingerprints if fingerprints.ndim == 1 else fingerprints[:, 0]
+        for run, keys in zip(self.runs, self.keys):
+            if len(run) == 0:
+                continue
+            position = np.minimum(np.searchsorted(keys, wanted), len(run) - 1)
+            if run.ndim == 1:
+                found |= keys[position] == wanted
+                continue
+            # 128 bits: coincide la mitad alta y se comprueba la baja; si varias huellas comparten
+            # la mitad alta (muy raro) se miran las siguientes posiciones
+            pending = keys[position] == wanted
+            while pending.any():
+                hit = pending & (run[position, 1] == fingerprints[:, 1])
+                found |= hit
+                following = np.minimum(position + 1, len(run) - 1)
+                pending &= ~hit & (following > position) & (keys[following] == wanted)
+                position = following
+        return found
+
+    def add(self, fingerprints):
+        ordered = fingerprints[fingerprint_order(fingerprints)]
+        new = ordered[~same_as_previous(ordered)]
+        new = new[~self.contains(new)]
+        if len(new) == 0:
+            return self
+        self.append_run(new)
+        # Fusionar mientras el último tramo no sea mucho más pequeño que el anterior
+        while len(self.runs) > 1 and 2 * len(self.runs[-1]) >= len(self.runs[-2]):
+            last, previous = self.runs.pop(), self.runs.pop()
+            self.keys[-2:] = []
+            merged = np.concatenate([previous, last])
+            self.append_run(merged[fingerprint_order(merged)])
+        return self
+
+    def add_new(self, fingerprints):
+        # Filas nuevas: primera aparición dentro del lote y no vistas antes
+        keep = ~duplicated_fingerprints(fingerprints) & ~self.contains(fingerprints)
+        self.add(fingerprints[keep])
+        return keep
+
+    def copy(self):
+        return FingerprintSet(self.bits, self.runs)  # Los tramos no se modifican nunca: se pueden compartir
+
+    def save(self, path):
+        shape = (0,) if self.bits == 64 else (0, 2)
+        merged = np.concatenate(self.runs) if self.runs else np.empty(shape, dtype=np.uint64)
+        # Escribir a un fichero temporal y reemplazar: el fichero anterior puede estar mapeado en memoria
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as file:
+            np.save(file, merged[fingerprint_order(merged)])
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path, bits=64, mmap=True):
+        if not os.path.exists(path):
+            return cls(bits)
+        # Con mmap_mode las huellas se leen del disco a medida que se consultan
+        run = np.load(path, mmap_mode="r" if mmap else None)
+        if run.dtype != np.uint64 or run.ndim != (1 if bits == 64 else 2):
+            raise ValueError(f"'{path}' does not hold {bits}-bit fingerprints")
+        return cls(bits, [run])
+
+
+# Function to drop duplicate rows and rows already in a fingerprint set, adding the kept rows to the set
+def drop_seen_rows(df, seen, columns=None):
+    return df[seen.add_new(row_fingerprints(df, columns, seen.bits))]
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+
+# Una columna de texto pasa a 'category' si tiene pocos valores distintos: como mucho este ratio por fila y este
+# máximo. Con más, las categorías más los códigos pueden ocupar más que las cadenas en Arrow
+CATEGORY_RATIO = 0.05
+CATEGORY_LIMIT = 10_000
+
+
+# Function to measure the memory used by a DataFrame, including the Python objects it holds
+def memory_usage(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+# Function to downcast a numeric column to the smallest dtype that keeps every value
+def downcast_numeric(column):
+    if pd.api.types.is_bool_dtype(column) or len(column) == 0:
+        return column
+    if pd.api.types.is_integer_dtype(column):
+        # Solo enteros con signo: restar o comparar enteros sin signo puede desbordar
+        return pd.to_numeric(column, downcast='integer')
+    if pd.api.types.is_float_dtype(column) and column.dtype != np.float32:
+        values = column.to_numpy(dtype=np.float64)
+        small = values.astype(np.float32)
+        # float32 solo si todos los valores sobreviven a la ida y vuelta (los que no caben darían inf)
+        if np.array_equal(small.astype(np.float64), values, equal_nan=True):
+            return column.astype(np.float32)
+    return column
+
+# Function to store a text column as 'category' or as compact strings
+def compact_text(column, category_ratio=CATEGORY_RATIO):
+    if len(column) and column.nunique(dropna=True) <= min(category_ratio * len(column), CATEGORY_LIMIT):
+        return column.astype('category')
+    if column.dtype == object and column.dropna().map(type).eq(str).all():
+        # Cadenas en un buffer de Arrow en lugar de un objeto de Python por valor (donde pandas lo soporta)
+        return column.astype('str')
+    return column
+
+# Function to shrink the dtypes of a freshly loaded DataFrame and report the memory saved
+def optimize_dtypes(df, category_ratio=CATEGORY_RATIO):
+    before = memory_usage(df)
+    columns = {}
+    for col in df.columns:
+        column = df[col]
+        if pd.api.types.is_numeric_dtype(column):
+            new = downcast_numeric(column)
+        elif pd.api.types.is_object_dtype(column) or pd.api.types.is_string_dtype(column):
+            new = compact_text(column, category_ratio)
+        else:
+            continue
+        if new.dtype != column.dtype:
+            columns[col] = new
+    changes = {col: (str(df[col].dtype), str(new.dtype)) for col, new in columns.items()}
+    if columns:
+        df = df.assign(**columns)
+    return df, {"before": before, "after": memory_usage(df), "changes": changes}
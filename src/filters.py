@@ -0,0 +1,300 @@
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .cache import chain_key
+    from .sorting import sort_order
+except ImportError:  # Ejecutado como script desde src/ (streamlit run src/app.py)
+    from cache import chain_key
+    from sorting import sort_order
+
+
+OPS = ("==", "!=", ">", ">=", "<", "<=", "contains")
+TEXT_OPS = ("==", "!=", "contains")
+# Nombres de las condiciones en la acción "Filter Rows" de la app
+OP_LABELS = {"Equal to": "==", "Greater than": ">", "Less than": "<", "Contains": "contains"}
+NGRAM = 3
+NGRAM_MIN_UNIQUES = 1000  # Con menos valores distintos basta con recorrerlos todos
+NGRAM_MAX_UNIQUES = 500_000  # Con más, construir el índice de trigramas cuesta más de lo que ahorra
+GATHER_LIMIT = 1000  # Hasta este número de valores se juntan sus listas de filas; con más, una máscara vectorizada
+
+TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<name>`[^`]+`)
+      | (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+      | (?P<number>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?(?![\w.]))
+      | (?P<op>==|!=|>=|<=|>|<|=|\(|\))
+      | (?P<word>[^\s()=!<>`"']+)
+    )""", re.VERBOSE)
+
+
+# Function to split a filter expression into tokens
+def tokenize(text):
+    tokens, position = [], 0
+    text = text.strip()
+    while position < len(text):
+        match = TOKEN.match(text, position)
+        if match is None:
+            raise ValueError(f"Cannot read the filter expression at '{text[position:]}'")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "name":
+            value = value[1:-1]
+        elif kind == "string":
+            value = re.sub(r"\\(.)", r"\1", value[1:-1])
+        elif kind == "word" and value.lower() in ("and", "or", "not", "contains"):
+            kind, value = "keyword", value.lower()
+        elif kind == "op" and value == "=":
+            value = "=="
+        tokens.append((kind, value))
+        position = match.end()
+    return tokens
+
+# Function to parse an expression such as: price > 10 and (city contains "mad" or `zip code` == 28001)
+@lru_cache(maxsize=256)
+def parse_expression(text):
+    tokens = tokenize(text)
+    if not tokens:
+        raise ValueError("The filter expression is empty")
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else (None, None)
+
+    def take():
+        nonlocal position
+        token = peek()
+        position += 1
+        return token
+
+    def parse_or():
+        node = parse_and()
+        while peek() == ("keyword", "or"):
+            take()
+            node = ("or", node, parse_and())
+        return node
+
+    def parse_and():
+        node = parse_not()
+        while peek() == ("keyword", "and"):
+            take()
+            node = ("and", node, parse_not())
+        return node
+
+    def parse_not():
+        if peek() == ("keyword", "not"):
+            take()
+            return ("not", parse_not())
+        if peek() == ("op", "("):
+            take()
+            node = parse_or()
+            if take() != ("op", ")"):
+                raise ValueError("Missing ')' in the filter expression")
+            return node
+        kind, column = take()
+        if kind not in ("name", "word"):
+            raise ValueError(f"Expected a column name, found '{column}'")
+        kind, op = take()
+        if op not in OPS:
+            raise ValueError(f"Expected a comparison after '{column}', found '{op}'")
+        kind, value = take()
+        if kind not in ("string", "number", "word", "name"):
+            raise ValueError(f"Expected a value after '{column} {op}'")
+        return ("cond", column, op, value)
+
+    node = parse_or()
+    if position != len(tokens):
+        raise ValueError(f"Unexpected '{tokens[position][1]}' in the filter expression")
+    return node
+
+# Function to list the columns an expression reads
+def expression_columns(node):
+    if node[0] == "cond":
+        return {node[1]}
+    return set().union(*(expression_columns(child) for child in node[1:]))
+
+# Function to build the expression tree of the single-condition "Filter Rows" action
+def condition(column, op, value):
+    return ("cond", column, OP_LABELS.get(op, op), value)
+
+
+# Function to check a condition against the type of its column and give the value the right type
+def typed_value(column, name, op, value):
+    if op not in OPS:
+        raise ValueError(f"Unknown filter operator '{op}'. Expected one of {OPS}")
+    if is_numeric(column):
+        if op == "contains":
+            raise ValueError(f"Column '{name}' is numeric: use ==, !=, >, >=, < or <=")
+        try:
+            return float(value)
+        except ValueError:
+            raise ValueError(f"Column '{name}' is numeric. Please enter a number.")
+    if op not in TEXT_OPS:
+        raise ValueError(f"Column '{name}' is text: use ==, != or contains")
+    return str(value)
+
+# Function to tell whether a column is filtered as numbers (booleans too, as 0 and 1)
+def is_numeric(column):
+    return pd.api.types.is_numeric_dtype(column)
+
+# Function to compute the mask of one condition with a single vectorized pass over the column
+def condition_mask(df, name, op, value):
+    if name not in df.columns:
+        raise ValueError(f"Unknown column '{name}' in the filter")
+    column = df[name]
+    value = typed_value(column, name, op, value)
+    if not is_numeric(column):
+        column = column.astype(str)
+        if op == "contains":
+            return column.str.contains(value, case=False, na=False).to_numpy(dtype=bool)
+    result = {"==": column == value, "!=": column != value, ">": column > value,
+              ">=": column >= value, "<": column < value, "<=": column <= value}[op]
+    # Un nulo no es igual a nada y es distinto de todo (como NaN en pandas, también en columnas con pd.NA)
+    return result.to_numpy(dtype=bool, na_value=op == "!=")
+
+
+# Class indexing a numeric column as a sorted array, for range and equality conditions in O(log n + k)
+class NumericIndex:
+    def __init__(self, column):
+        values = column.to_numpy(dtype=np.float64, na_value=np.nan)
+        valid = np.flatnonzero(~np.isnan(values))
+        self.order = valid[np.argsort(values[valid], kind="stable")]
+        self.sorted = values[self.order]
+        self.size = len(values)
+
+    def positions(self, op, value):
+        left = np.searchsorted(self.sorted, value, side="left")
+        right = np.searchsorted(self.sorted, value, side="right")
+        if op == "!=":
+            # Como en pandas, un nulo es distinto de cualquier valor
+            equal = np.zeros(self.size, dtype=bool)
+            equal[self.order[left:right]] = True
+            return np.flatnonzero(~equal)
+        start, stop = {"==": (left, right), ">": (right, None), ">=": (left, None),
+                       "<": (0, left), "<=": (0, right)}[op]
+        return np.sort(self.order[start:stop])
+
+    def __sizeof__(self):
+        return self.order.nbytes + self.sorted.nbytes
+
+
+# Class indexing a text column by dictionary encoding, with a trigram index over its distinct values
+class TextIndex:
+    def __init__(self, column):
+        # Mismo texto que compara la máscara (astype(str)), convertido una sola vez por columna
+        self.codes, uniques = pd.factorize(column.astype(str))
+        self.uniques = pd.Series(uniques, dtype=object)
+        self.lookup = pd.Index(uniques)
+        # Filas de cada valor: posiciones ordenadas por código, y dónde empieza cada código
+        self.order = np.argsort(self.codes, kind="stable")
+        counts = np.bincount(self.codes[self.codes >= 0], minlength=len(uniques))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]) + np.count_nonzero(self.codes < 0)
+        self.grams = None
+
+    def rows(self, ids):
+        if len(ids) <= GATHER_LIMIT:
+            # Pocos valores: juntar sus listas de filas sin mirar el resto de la columna
+            parts = [self.order[self.offsets[i]:self.offsets[i + 1]] for i in ids]
+            return np.sort(np.concatenate(parts)) if parts else np.zeros(0, dtype=np.intp)
+        matched = np.zeros(len(self.uniques) + 1, dtype=bool)
+        matched[ids] = True
+        return np.flatnonzero(matched[self.codes])  # El código -1 (nulo) cae en la última posición, siempre False
+
+    def candidates(self, pattern):
+        # Valores que pueden contener el patrón: los que tienen todos sus trigramas (en minúsculas)
+        literal = re.escape(pattern) == pattern and pattern.isascii()
+        if not literal or len(pattern) < NGRAM or not NGRAM_MIN_UNIQUES <= len(self.uniques) <= NGRAM_MAX_UNIQUES:
+            return np.arange(len(self.uniques))
+        if self.grams is None:
+            self.grams = self.build_grams()
+        folded = pattern.casefold()
+        postings = sorted((self.grams.get(folded[i:i + NGRAM], np.zeros(0, dtype=np.intp))
+                           for i in range(len(folded) - NGRAM + 1)), key=len)
+        ids = postings[0]
+        for posting in postings[1:]:
+            ids = np.intersect1d(ids, posting, assume_unique=True)
+        return ids
+
+    def build_grams(self):
+        grams = {}
+        for i, value in enumerate(self.uniques):
+            folded = value.casefold()
+            for gram in {folded[j:j + NGRAM] for j in range(len(folded) - NGRAM + 1)}:
+                grams.setdefault(gram, []).append(i)
+        return {gram: np.array(ids, dtype=np.intp) for gram, ids in grams.items()}
+
+    def positions(self, op, value):
+        if op == "contains":
+            ids = self.candidates(value)
+            # Comprobar solo los valores distintos candidatos, con la misma búsqueda que la máscara
+            found = self.uniques.iloc[ids].str.contains(value, case=False, na=False).to_numpy(dtype=bool)
+            return self.rows(ids[found])
+        code = self.lookup.get_indexer([value])[0]
+        equal = self.rows([code] if code >= 0 else [])
+        if op == "==":
+            return equal
+        keep = np.ones(len(self.codes), dtype=bool)
+        keep[equal] = False
+        return np.flatnonzero(keep)
+
+    def __sizeof__(self):
+        size = self.codes.nbytes + self.order.nbytes + self.offsets.nbytes + int(self.uniques.memory_usage(deep=True))
+        if self.grams is not None:
+            size += sum(ids.nbytes for ids in self.grams.values())
+        return size
+
+
+# Class handing out the index of each column and the sort orders (permutations) of some data, built the first
+# time a filter or a sort needs them and kept in the cache
+class FrameIndex:
+    def __init__(self, df, cache=None, key=None):
+        self.df = df
+        self.cache = cache
+        self.key = key
+        self.built = {}
+
+    def column(self, name):
+        if name not in self.df.columns:
+            raise ValueError(f"Unknown column '{name}' in the filter")
+        build = lambda: (NumericIndex if is_numeric(self.df[name]) else TextIndex)(self.df[name])
+        if self.cache is None or self.key is None:
+            if name not in self.built:
+                self.built[name] = build()
+            return self.built[name]
+        return self.cache.get_or_compute(chain_key(self.key, "filter_index", name), build)
+
+    def order(self, by, ascending=True, limit=None):
+        return sort_order(self.df, by, ascending, limit, self.cache, self.key)
+
+
+# Function to evaluate an expression tree as a boolean mask (one vectorized pass per condition)
+def evaluate_mask(node, df):
+    if node[0] == "cond":
+        return condition_mask(df, *node[1:])
+    if node[0] == "not":
+        return ~evaluate_mask(node[1], df)
+    left, right = evaluate_mask(node[1], df), evaluate_mask(node[2], df)
+    return left & right if node[0] == "and" else left | right
+
+# Function to evaluate an expression tree with column indexes, as sorted row positions
+def evaluate_positions(node, df, index):
+    if node[0] == "cond":
+        _, name, op, value = node
+        return index.column(name).positions(op, typed_value(df[name], name, op, value))
+    if node[0] == "not":
+        return np.setdiff1d(np.arange(len(df)), evaluate_positions(node[1], df, index), assume_unique=True)
+    left, right = evaluate_positions(node[1], df, index), evaluate_positions(node[2], df, index)
+    if node[0] == "and":
+        return np.intersect1d(left, right, assume_unique=True)
+    return np.union1d(left, right)
+
+# Function to keep the rows matching an expression (text or tree), using indexes when given
+def filter_rows(df, expression, index=None):
+    node = parse_expression(expression) if isinstance(expression, str) else expression
+    if index is None:
+        return df[evaluate_mask(node, df)]
+    # Con índices solo se tocan las filas que cumplen el filtro, y el resultado se toma sin copiar el resto
+    return df.iloc[evaluate_positions(node, df, index)]
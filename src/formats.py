@@ -0,0 +1,176 @@
+import os
+import tempfile
+from io import BytesIO
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+
+FORMATS = ("csv", "parquet", "feather")
+EXTENSIONS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".feather": "feather",
+    ".arrow": "feather",
+    ".ipc": "feather",
+}
+MIME_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "feather": "application/vnd.apache.arrow.file",
+}
+FILE_EXTENSIONS = {"csv": "csv", "parquet": "parquet", "feather": "feather"}
+FILTER_OPS = ("==", "!=", ">", ">=", "<", "<=")
+CSV_COMPRESSIONS = (None, "gzip", "zstd")  # Compresión del fichero CSV entero; Parquet y Feather comprimen por dentro
+COMPRESSED_EXTENSIONS = {"gzip": "gz", "zstd": "zst"}
+COMPRESSED_MIME_TYPES = {"gzip": "application/gzip", "zstd": "application/zstd"}
+EXPORT_CHUNK_ROWS = 100_000
+SPOOL_BYTES = 32 * 1024 * 1024  # Hasta este tamaño la exportación se queda en memoria; a partir de ahí, en disco
+
+
+# Function to detect the format of a file from its name
+def detect_format(name):
+    extension = os.path.splitext(name)[1].lower()
+    if extension not in EXTENSIONS:
+        raise ValueError(f"Unsupported file type '{extension}'. Expected one of {sorted(EXTENSIONS)}")
+    return EXTENSIONS[extension]
+
+# Function to read the column names and types without decoding any data
+def read_schema(data, fmt):
+    if fmt == "parquet":
+        schema = pq.read_schema(pa.BufferReader(data))
+    elif fmt == "feather":
+        schema = pa.ipc.open_file(pa.BufferReader(data)).schema
+    else:
+        return pd.read_csv(BytesIO(data), nrows=100).dtypes.to_dict()
+    return {field.name: field.type for field in schema}
+
+# Function to build an Arrow filter expression from (column, op, value) conditions joined with AND
+def filter_expression(filters):
+    expression = None
+    for column, op, value in filters:
+        if op not in FILTER_OPS:
+            raise ValueError(f"Unknown filter operator '{op}'. Expected one of {FILTER_OPS}")
+        field = pc.field(column)
+        condition = {
+            "==": field == value, "!=": field != value,
+            ">": field > value, ">=": field >= value,
+            "<": field < value, "<=": field <= value,
+        }[op]
+        expression = condition if expression is None else expression & condition
+    return expression
+
+# Function to read a CSV, Parquet or Arrow IPC (Feather) file decoding only the needed columns and rows
+def read_table(data, fmt, columns=None, filters=None):
+    filters = list(filters or [])
+    # Las columnas usadas por el filtro se leen aunque no se hayan pedido, y se quitan al final
+    needed = None if columns is None else list(dict.fromkeys(list(columns) + [col for col, _, _ in filters]))
+
+    if fmt == "parquet":
+        # pyarrow usa las estadísticas min/max de cada row group para saltarse los que no cumplen el filtro
+        table = pq.read_table(pa.BufferReader(data), columns=needed,
+                              filters=filter_expression(filters) if filters else None)
+    elif fmt == "feather":
+        options = None
+        if needed is not None:
+            # Las columnas no pedidas no se leen ni se descomprimen
+            names = pa.ipc.open_file(pa.BufferReader(data)).schema.names
+            options = pa.ipc.IpcReadOptions(included_fields=[names.index(col) for col in needed])
+        table = pa.ipc.open_file(pa.BufferReader(data), options=options).read_all()
+        if filters:
+            table = table.filter(filter_expression(filters))
+    else:
+        df = pd.read_csv(BytesIO(data), usecols=needed)
+        for column, op, value in filters:
+            df = df[{"==": df[column] == value, "!=": df[column] != value,
+                     ">": df[column] > value, ">=": df[column] >= value,
+                     "<": df[column] < value, "<=": df[column] <= value}[op]]
+        return df[list(columns)].reset_index(drop=True) if columns is not None else df.reset_index(drop=True)
+
+    df = table.to_pandas()
+    return df[list(columns)] if columns is not None else df
+
+# Function to write a DataFrame as CSV, compressed Parquet or Arrow IPC (Feather)
+def write_table(df, fmt, compression=None):
+    buffer = BytesIO()
+    if fmt == "parquet":
+        df.to_parquet(buffer, index=False, compression=compression or "zstd")
+    elif fmt == "feather":
+        # Feather v2 (Arrow IPC): se puede abrir con pyarrow.memory_map; compression="uncompressed" para lectura sin copia
+        feather.write_feather(df.reset_index(drop=True), buffer, compression=compression or "lz4")
+    else:
+        df.to_csv(buffer, index=False)
+    return buffer.getvalue()
+
+
+# Class wrapping a file so that closing the Arrow stream written into it leaves the file open
+class KeepOpen:
+    def __init__(self, file):
+        self.file = file
+        self.closed = False
+
+    def write(self, data):
+        return self.file.write(data)
+
+    def flush(self):
+        self.file.flush()
+
+    def tell(self):
+        return self.file.tell()
+
+    def writable(self):
+        return True
+
+    def close(self):
+        self.closed = True
+
+
+# Function to write a DataFrame into a binary file chunk by chunk, so only one chunk is ever encoded in memory
+def write_chunks(df, fmt, file, compression=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    if fmt == "csv" and compression not in CSV_COMPRESSIONS:
+        raise ValueError(f"Unknown compression '{compression}'. Expected one of {CSV_COMPRESSIONS}")
+    sink = pa.PythonFile(KeepOpen(file), mode="w")
+    chunks = (df.iloc[start:start + chunk_rows] for start in range(0, len(df), chunk_rows))
+    if fmt == "csv":
+        stream = pa.CompressedOutputStream(sink, compression) if compression else sink
+        # La cabecera sale aunque no haya filas; cada bloque se formatea igual que con un solo to_csv
+        stream.write(df.iloc[:0].to_csv(index=False).encode())
+        for chunk in chunks:
+            stream.write(chunk.to_csv(index=False, header=False).encode())
+        stream.close()
+        return
+    # Esquema de todo el DataFrame: un bloque con una columna vacía no puede cambiar el tipo de los siguientes
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(sink, schema, compression=compression or "zstd")
+    else:
+        options = pa.ipc.IpcWriteOptions(compression=None if compression == "uncompressed" else compression or "lz4")
+        writer = pa.ipc.new_file(sink, schema, options=options)
+    with writer:
+        for chunk in chunks:
+            # Cada bloque es un row group (Parquet) o un record batch (Feather)
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+# Function to export a DataFrame into a spooled temporary file: in memory while small, on disk once it grows
+def export_table(df, fmt, compression=None, chunk_rows=EXPORT_CHUNK_ROWS, spool_bytes=SPOOL_BYTES):
+    file = tempfile.SpooledTemporaryFile(max_size=spool_bytes)
+    write_chunks(df, fmt, file, compression, chunk_rows)
+    file.seek(0)
+    return file
+
+# Function to name an exported file, adding the extension of the compression for CSV
+def export_name(stem, fmt, compression=None):
+    name = f"{stem}.{FILE_EXTENSIONS[fmt]}"
+    if fmt == "csv" and compression:
+        name += f".{COMPRESSED_EXTENSIONS[compression]}"
+    return name
+
+# Function to get the MIME type of an exported file
+def export_mime_type(fmt, compression=None):
+    if fmt == "csv" and compression:
+        return COMPRESSED_MIME_TYPES[compression]
+    return MIME_TYPES[fmt]
@@ -0,0 +1,119 @@
+import copy
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .cache import chain_key
+except ImportError:  # Ejecutado como script desde src/ (streamlit run src/app.py)
+    from cache import chain_key
+
+
+AGG_FUNCS = ("mean", "sum", "count", "max", "min", "std", "var")
+
+
+# Function to get the numeric values of a column as a numpy array (NaN for nulls), keeping integer types exact
+def measure_values(column):
+    if column.dtype.kind in "iuf" and isinstance(column.dtype, np.dtype):
+        return column.to_numpy()
+    return column.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+# Class holding, for every group of a set of keys, the partial aggregates of the measure columns
+# (count, sum, sum of squares, min and max): every function of AGG_FUNCS comes out of them without reading the rows
+class GroupPartials:
+    def __init__(self, df, keys, columns=()):
+        grouped = df.groupby(list(keys), observed=True, sort=True)
+        # Una sola pasada por las claves: el grupo de cada fila (-1 si alguna clave es nula, como dropna=True)
+        ids = grouped.ngroup().fillna(-1).to_numpy(dtype=np.intp)
+        self.keys = list(keys)
+        self.index = grouped.size().index
+        # Filas ordenadas por grupo y dónde empieza cada grupo, para reducir cada columna con reduceat
+        self.order = np.argsort(ids, kind="stable")
+        counts = np.bincount(ids[ids >= 0], minlength=len(self.index))
+        self.starts = np.concatenate([[0], np.cumsum(counts)[:-1]]) + np.count_nonzero(ids < 0)
+        self.stats = {}
+        self.add(df, columns)
+
+    def add(self, df, columns):
+        for col in columns:
+            if col not in self.stats:
+                self.stats[col] = self.column_partials(df[col])
+        return self
+
+    def extended(self, df, columns):
+        # Copia con más columnas de medida: la entrada de la caché no se modifica mientras otra sesión la lee
+        partials = copy.copy(self)
+        partials.stats = dict(self.stats)
+        return partials.add(df, columns)
+
+    def column_partials(self, column):
+        values = measure_values(column)[self.order]
+        if not len(self.index):
+            empty = np.zeros(0, dtype=values.dtype)
+            return {"count": np.zeros(0, dtype=np.int64), "sum": empty, "sumsq": empty.astype(np.float64),
+                    "center": 0.0, "min": empty, "max": empty}
+        valid = ~np.isnan(values) if values.dtype.kind == "f" else np.ones(len(values), dtype=bool)
+        filled = np.where(valid, values, 0)
+        # Cuadrados alrededor de la media de la columna, para que la varianza no pierda precisión con valores grandes
+        center = float(filled.sum() / max(valid.sum(), 1))
+        squares = np.where(valid, (values - center) ** 2, 0.0)
+        return {
+            "count": np.add.reduceat(valid.astype(np.int64), self.starts),
+            "sum": np.add.reduceat(filled, self.starts),
+            "sumsq": np.add.reduceat(squares, self.starts),
+            "center": center,
+            # fmin/fmax ignoran los NaN: un grupo sin valores queda NaN, como en pandas
+            "min": np.fmin.reduceat(values, self.starts) if values.dtype.kind == "f" else np.minimum.reduceat(values, self.starts),
+            "max": np.fmax.reduceat(values, self.starts) if values.dtype.kind == "f" else np.maximum.reduceat(values, self.starts),
+        }
+
+    def aggregate(self, column, func):
+        if func not in AGG_FUNCS:
+            raise ValueError(f"Unknown aggregation '{func}'. Expected one of {AGG_FUNCS}")
+        stats = self.stats[column]
+        count = stats["count"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if func == "mean":
+                values = np.where(count > 0, stats["sum"] / count, np.nan)
+            elif func in ("std", "var"):
+                # Suma de cuadrados de las desviaciones a la media del grupo, desde las sumas centradas
+                shifted = stats["sum"] - count * stats["center"]
+                squares = np.maximum(stats["sumsq"] - shifted ** 2 / count, 0)
+                values = np.where(count > 1, squares / (count - 1), np.nan)
+                values = np.sqrt(values) if func == "std" else values
+            else:
+                values = stats[func]
+        return pd.Series(values, index=self.index, name=column)
+
+    def __sizeof__(self):
+        size = self.order.nbytes + self.starts.nbytes + int(self.index.memory_usage(deep=True))
+        return size + sum(array.nbytes for stats in self.stats.values() for array in stats.values()
+                          if isinstance(array, np.ndarray))
+
+
+# Function to get the partial aggregates of some keys and measures, reusing the cached ones
+def group_partials(df, keys, columns, cache=None, key=None):
+    if cache is None or key is None:
+        return GroupPartials(df, keys, columns)
+    cache_key = chain_key(key, "group", tuple(keys))
+    partials = cache.get(cache_key)
+    if partials is None:
+        partials = GroupPartials(df, keys, columns)
+    elif all(col in partials.stats for col in columns):
+        return partials
+    else:
+        # Una columna de medida nueva: solo se lee esa columna, los grupos y su orden ya están calculados
+        partials = partials.extended(df, columns)
+    return cache.put(cache_key, partials)
+
+# Function to group by one or more keys and compute several (column, function) aggregations in one grouped pass
+def group_aggregate(df, keys, aggregations, cache=None, key=None):
+    keys = list(keys)
+    if not keys:
+        raise ValueError("Select at least one column to group by")
+    columns = list(dict.fromkeys(column for column, _ in aggregations))
+    partials = group_partials(df, keys, columns, cache, key)
+    result = pd.DataFrame({f"{column}_{func}": partials.aggregate(column, func) for column, func in aggregations},
+                          index=partials.index)
+    return result.reset_index()
@@ -0,0 +1,234 @@
+import cProfile
+import io
+import os
+import pstats
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+
+import pandas as pd
+
+
+PROFILE_LINES = 40  # Funciones y líneas que se muestran de una captura
+TRACE_FRAMES = 10
+COLUMNS = ("name", "kind", "wall_seconds", "cpu_seconds", "peak_mb", "rows_in", "rows_out", "columns_in",
+           "columns_out", "cache_hits", "cache_misses")
+
+
+# tracemalloc y cProfile son de todo el proceso: las sesiones del servidor los comparten
+TRACE_LOCK = threading.Lock()
+PROFILE_LOCK = threading.Lock()  # Solo una captura con cProfile a la vez
+tracing = {"users": 0, "started": False}  # Cuántos recorders y capturas usan tracemalloc, y si lo activamos aquí
+
+
+# Function to measure the memory tracemalloc has seen so far: (current, peak) bytes, or None when it is not tracing
+def traced_memory():
+    return tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else None
+
+# Function to start tracing memory for one more user; tracemalloc starts with the first one
+def start_tracing(frames=1):
+    with TRACE_LOCK:
+        if tracing["users"] == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            tracing["started"] = True
+        tracing["users"] += 1
+
+# Function to stop tracing memory for one user; tracemalloc stops when the last one is done (if it was started here)
+def stop_tracing():
+    with TRACE_LOCK:
+        tracing["users"] -= 1
+        if tracing["users"] == 0 and tracing["started"]:
+            tracemalloc.stop()
+            tracing["started"] = False
+
+
+# Class recording spans for one run of the app: the wall and CPU time, peak memory, rows and columns in and out and
+# cache hits of each section and plan step. Sections follow one another, so section() closes the previous one and
+# the script does not need to be indented inside a with block. The memory peaks are only exact while a single
+# session traces memory, since tracemalloc counts the allocations of every thread
+class Recorder:
+    def __init__(self, name="rerun", cache=None, trace_memory=False):
+        self.cache = cache
+        self.trace_id = uuid.uuid4().hex
+        self.spans = []
+        self.stack = []
+        # tracemalloc hace más lento todo el código Python: solo se activa cuando se pide
+        self.started_tracing = trace_memory
+        if self.started_tracing:
+            start_tracing()
+        self.open(name, "run")
+
+    def cache_counts(self):
+        if self.cache is None:
+            return None
+        stats = self.cache.stats()
+        return stats["hits"], stats["misses"]
+
+    def open(self, name, kind, **attributes):
+        memory = traced_memory()
+        if memory is not None:
+            # El pico del padre hasta aquí se guarda antes de reiniciar el contador para el hijo
+            if self.stack:
+                self.stack[-1]["_peak"] = max(self.stack[-1]["_peak"], memory[1])
+            tracemalloc.reset_peak()
+            memory = traced_memory()
+        span = {
+            "name": name, "kind": kind, "span_id": uuid.uuid4().hex[:16],
+            "parent_id": self.stack[-1]["span_id"] if self.stack else None,
+            "start_ns": time.time_ns(), "_wall": time.perf_counter(), "_cpu": time.thread_time(),
+            "_base": memory[0] if memory else None, "_peak": memory[1] if memory else 0,
+            "_cache": self.cache_counts(), **attributes,
+        }
+        self.stack.append(span)
+        return span
+
+    def close(self, **attributes):
+        span = self.stack.pop()
+        span.update(attributes)
+        span["end_ns"] = time.time_ns()
+        span["wall_seconds"] = time.perf_counter() - span.pop("_wall")
+        span["cpu_seconds"] = time.thread_time() - span.pop("_cpu")
+        memory, base, peak = traced_memory(), span.pop("_base"), span.pop("_peak")
+        if memory is not None and base is not None:
+            peak = max(peak, memory[1])
+            span["peak_mb"] = max(peak - base, 0) / 1024 / 1024
+            if self.stack:
+                self.stack[-1]["_peak"] = max(self.stack[-1]["_peak"], peak)
+        counts, before = self.cache_counts(), span.pop("_cache")
+        if counts is not None and before is not None:
+            span["cache_hits"], span["cache_misses"] = counts[0] - before[0], counts[1] - before[1]
+        self.spans.append(span)
+        return span
+
+    def section(self, name, df=None, **attributes):
+        # Cierra la sección abierta (si la hay) y abre la siguiente; df son los datos que la sección lee
+        if len(self.stack) > 1:
+            self.close()
+        if df is not None:
+            attributes.update(rows_in=len(df), columns_in=df.shape[1])
+        return self.open(name, "section", **attributes)
+
+    def annotate(self, **attributes):
+        # Añade datos a la sección abierta, p. ej. las filas y columnas que ha visto
+        self.stack[-1].update(attributes)
+
+    def add_steps(self, timings):
+        # Los pasos del plan se miden dentro de execute (a veces en otro hilo): se añaden como hijos de la sección
+        parent = self.stack[-1]["span_id"]
+        for timing in timings:
+            start = int(timing.get("started", time.time()) * 1e9)
+            # Un paso de salida tarda casi todo en dibujarse: se suma al cálculo
+            seconds = timing["seconds"] + (timing.get("render_seconds") or 0)
+            cpu = timing.get("cpu_seconds")
+            cpu = None if cpu is None else cpu + (timing.get("render_cpu_seconds") or 0)
+            self.spans.append({
+                "name": timing["step"], "kind": "step", "span_id": uuid.uuid4().hex[:16], "parent_id": parent,
+                "start_ns": start, "end_ns": start + int(seconds * 1e9), "wall_seconds": seconds,
+                "cpu_seconds": cpu, "peak_mb": timing.get("peak_mb"),
+                "rows_in": timing["rows_in"], "rows_out": timing["rows_out"], "columns_in": timing.get("columns_in"),
+                "columns_out": timing["columns"], "cache_hits": int(bool(timing.get("cached"))),
+                "cache_misses": int(not timing.get("cached")),
+            })
+
+    def finish(self):
+        while self.stack:
+            self.close()
+        if self.started_tracing:
+            stop_tracing()
+            self.started_tracing = False
+        return self
+
+    def table(self):
+        # Una fila por span, cada uno debajo de su padre; la sangría del nombre indica de quién cuelga
+        children = {}
+        for span in sorted(self.spans, key=lambda s: s["start_ns"]):
+            children.setdefault(span["parent_id"], []).append(span)
+        rows = []
+
+        def visit(parent, depth):
+            for span in children.get(parent, []):
+                rows.append({**{col: span.get(col) for col in COLUMNS}, "name": "  " * depth + span["name"]})
+                visit(span["span_id"], depth + 1)
+
+        visit(None, 0)
+        return pd.DataFrame(rows, columns=list(COLUMNS))
+
+    def to_json(self):
+        return {"trace_id": self.trace_id,
+                "spans": [{key: value for key, value in span.items() if not key.startswith("_")}
+                          for span in sorted(self.spans, key=lambda s: s["start_ns"])]}
+
+    def to_otel(self, service="cleanly"):
+        # Mismo formato que el exportador OTLP/JSON de OpenTelemetry (resourceSpans > scopeSpans > spans)
+        spans = []
+        for span in sorted(self.spans, key=lambda s: s["start_ns"]):
+            attributes = [otel_attribute(f"cleanly.{key}", value) for key, value in span.items()
+                          if key not in ("name", "span_id", "parent_id", "start_ns", "end_ns") and value is not None
+                          and not key.startswith("_")]
+            spans.append({
+                "traceId": self.trace_id, "spanId": span["span_id"], "parentSpanId": span["parent_id"] or "",
+                "name": span["name"], "kind": 1, "startTimeUnixNano": str(span["start_ns"]),
+                "endTimeUnixNano": str(span["end_ns"]), "attributes": attributes,
+            })
+        return {"resourceSpans": [{
+            "resource": {"attributes": [otel_attribute("service.name", service)]},
+            "scopeSpans": [{"scope": {"name": "cleanly.instrumentation"}, "spans": spans}],
+        }]}
+
+
+# Function to write one attribute as OpenTelemetry's JSON encoding expects it
+def otel_attribute(key, value):
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+# Class capturing a cProfile profile and the tracemalloc allocations of one run, to attach to a bug report. Only one
+# capture runs at a time in the process: while another is running, active is False and stop() returns None
+class Capture:
+    def __init__(self):
+        self.active = PROFILE_LOCK.acquire(blocking=False)
+        if not self.active:
+            return
+        self.profiler = cProfile.Profile()
+        start_tracing(TRACE_FRAMES)
+        self.profiler.enable()
+
+    def stop(self):
+        if not self.active:
+            return None
+        self.active = False
+        try:
+            return self.collect()
+        finally:
+            stop_tracing()
+            PROFILE_LOCK.release()
+
+    def collect(self):
+        # cProfile solo ve el hilo que lo activó: los pasos que corren en segundo plano salen en la tabla de tiempos
+        self.profiler.disable()
+        text = io.StringIO()
+        pstats.Stats(self.profiler, stream=text).sort_stats("cumulative").print_stats(PROFILE_LINES)
+        # El .prof binario se abre con snakeviz, pstats o cualquier visor de cProfile
+        handle, path = tempfile.mkstemp(suffix=".prof")
+        os.close(handle)
+        try:
+            self.profiler.dump_stats(path)
+            with open(path, "rb") as file:
+                profile_bytes = file.read()
+        finally:
+            os.remove(path)
+        # Sin las reservas del propio perfilador
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, cProfile.__file__), tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__)])
+        allocations = "\n".join(str(stat) for stat in snapshot.statistics("lineno")[:PROFILE_LINES])
+        return {"profile_text": text.getvalue(), "profile_bytes": profile_bytes, "allocations_text": allocations}
@@ -0,0 +1,173 @@
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+DEFAULT_WORKERS = int(os.environ.get("CLEANLY_JOB_WORKERS", "2"))
+
+
+# Exception raised inside a job when it has been cancelled
+class JobCancelled(Exception):
+    pass
+
+
+# Class describing one background job: its state, progress and result
+class Job:
+    def __init__(self, job_id, manager, owner, key, fn, args, kwargs):
+        self.id = job_id
+        self.manager = manager
+        self.owner = owner
+        self.key = key
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.state = "queued"
+        self.progress = 0.0
+        self.message = "Waiting for a free worker"
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.ended = None
+        self.cancel_requested = threading.Event()
+        self.finished = threading.Event()
+        self.superseded = False  # Cancelado porque el usuario cambió de plan, no porque lo pidiera
+
+    @property
+    def done(self):
+        return self.finished.is_set()
+
+    def check(self):
+        # La cancelación es cooperativa: el trabajo la comprueba entre pasos
+        if self.cancel_requested.is_set():
+            raise JobCancelled()
+
+    def report(self, progress, message=None):
+        self.check()
+        self.progress = min(max(progress, 0.0), 1.0)
+        if message is not None:
+            self.message = message
+
+    def cancel(self):
+        self.manager.cancel(self)
+
+    def wait(self, timeout=None):
+        return self.finished.wait(timeout)
+
+    def __repr__(self):
+        return f"Job({self.id}, {self.owner!r}, {self.state!r}, {self.progress:.0%})"
+
+
+# Class running jobs on a pool of worker threads, taking turns between owners so no user can starve the rest
+class JobManager:
+    def __init__(self, workers=DEFAULT_WORKERS, keep=32):
+        self.condition = threading.Condition()
+        self.queues = OrderedDict()  # owner -> cola de trabajos; el orden es el turno de cada owner
+        self.jobs = OrderedDict()  # key -> último trabajo con esa clave
+        self.keep = keep
+        self.ids = itertools.count(1)
+        self.threads = [threading.Thread(target=self.work, name=f"cleanly-job-{i}", daemon=True)
+                        for i in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, owner, key, fn, *args, **kwargs):
+        with self.condition:
+            job = self.jobs.get(key)
+            if job is not None and not job.superseded:
+                # Un rerun con los mismos parámetros se vuelve a enganchar al trabajo existente
+                return job
+            job = Job(next(self.ids), self, owner, key, fn, args, kwargs)
+            self.jobs[key] = job
+            self.queues.setdefault(owner, deque()).append(job)
+            self.trim()
+            self.condition.notify()
+            return job
+
+    def get(self, key):
+        with self.condition:
+            job = self.jobs.get(key)
+            # Un trabajo sustituido por otro plan no cuenta: si el usuario vuelve a este plan, se lanza de nuevo
+            return None if job is not None and job.superseded else job
+
+    def forget(self, key):
+        with self.condition:
+            job = self.jobs.get(key)
+            if job is not None and job.done:
+                del self.jobs[key]
+
+    def cancel(self, job):
+        with self.condition:
+            job.cancel_requested.set()
+            if job.state == "queued":
+                # Aún no ha empezado: se saca de la cola y se da por cancelado
+                queue = self.queues.get(job.owner)
+                if queue is not None and job in queue:
+                    queue.remove(job)
+                    if not queue:
+                        del self.queues[job.owner]
+                self.finish(job, "cancelled")
+
+    def cancel_others(self, owner, key):
+        # Los trabajos de un usuario que ya no corresponden a su plan actual no merecen un worker
+        for job in self.active(owner):
+            if job.key != key:
+                job.superseded = True
+                self.cancel(job)
+
+    def active(self, owner=None):
+        with self.condition:
+            return [job for job in self.jobs.values()
+                    if not job.done and (owner is None or job.owner == owner)]
+
+    def next_job(self):
+        # Turno rotatorio: el primer owner con trabajos pendientes pasa al final de la cola
+        while self.queues:
+            owner, queue = self.queues.popitem(last=False)
+            job = queue.popleft()
+            if queue:
+                self.queues[owner] = queue
+            return job
+        return None
+
+    def work(self):
+        while True:
+            with self.condition:
+                job = self.next_job()
+                while job is None:
+                    self.condition.wait()
+                    job = self.next_job()
+                job.state = "running"
+                job.started = time.time()
+                job.message = "Running"
+            try:
+                job.check()
+                result = job.fn(job, *job.args, **job.kwargs)
+            except JobCancelled:
+                self.finish(job, "cancelled")
+            except Exception as e:
+                job.error = e
+                self.finish(job, "failed")
+            else:
+                job.result = result
+                job.progress = 1.0
+                self.finish(job, "done")
+
+    def finish(self, job, state):
+        with self.condition:
+            job.state = state
+            job.ended = time.time()
+            job.message = {"done": "Finished", "failed": f"Failed: {job.error}", "cancelled": "Cancelled"}[state]
+            # Soltar los argumentos: pueden ser DataFrames grandes
+            job.args, job.kwargs = (), {}
+            job.finished.set()
+            if job.superseded and self.jobs.get(job.key) is job:
+                del self.jobs[job.key]  # Solo la cancelación que pide el usuario se queda para "Run again"
+
+    def trim(self):
+        # Olvidar los trabajos terminados más antiguos por encima de `keep`
+        finished = [key for key, job in self.jobs.items() if job.done]
+        for key in finished[:max(0, len(self.jobs) - self.keep)]:
+            del self.jobs[key]
@@ -1,26 +1,91 @@
 import pandas as pd
 import numpy as np
 
+try:
+    from .sketches import approximate_median_mad, approximate_quartiles, sketch_columns
+except ImportError:  # Ejecutado como script desde src/ (streamlit run src/app.py)
+    from sketches import approximate_median_mad, approximate_quartiles, sketch_columns
 
-# Function to clean data
-def clean_data(df):
-    df = df.copy()  # Crear una copia explícita para evitar warnings
-    df = df.drop_duplicates()
-    for col in df.select_dtypes(include=np.number).columns:
-        df[col] = df[col].fillna(df[col].mean())
-    for col in df.select_dtypes(include='object').columns:
-        df[col] = df[col].fillna(df[col].mode()[0])
+
+# Tipos de texto para select_dtypes: pandas 3 guarda el texto como 'str' y avisa si solo se pide 'object'
+TEXT_DTYPES = ['object', 'str'] if int(pd.__version__.split('.')[0]) >= 3 else ['object']
+
+
+# Function to find the numeric and text columns that contain nulls
+def columns_with_nulls(df):
+    # Un único recorrido para saber qué columnas tienen nulos; las demás no necesitan estadísticas
+    null_counts = df.isna().sum()
+    numeric_cols = df.select_dtypes(include=np.number).columns
+    object_cols = df.select_dtypes(include=TEXT_DTYPES + ['category']).columns
+    return (numeric_cols[null_counts[numeric_cols].to_numpy() > 0],
+            object_cols[null_counts[object_cols].to_numpy() > 0])
+
+# Function to compute the fill values used by clean_data
+def fill_values(df):
+    numeric_cols, object_cols = columns_with_nulls(df)
+    values = {}
+    if len(numeric_cols) > 0:
+        # Medias de todo el bloque numérico en una sola pasada vectorizada
+        values.update(df[numeric_cols].mean().to_dict())
+    if len(object_cols) > 0:
+        values.update(column_modes(df[object_cols]))
+    return values
+
+# Function to compute the mode of several columns with one batched value count
+def column_modes(df):
+    codes, uniques, offsets = [], [], [0]
+    for col in df.columns:
+        col_codes, col_uniques = pd.factorize(df[col], use_na_sentinel=True)
+        valid = col_codes[col_codes >= 0]
+        codes.append(valid + offsets[-1])
+        uniques.append(col_uniques)
+        offsets.append(offsets[-1] + len(col_uniques))
+
+    # Un solo bincount para todas las columnas, cada una en su propio rango de códigos
+    counts = np.bincount(np.concatenate(codes), minlength=offsets[-1]) if offsets[-1] else np.array([], dtype=np.intp)
+
+    modes = {}
+    for i, col in enumerate(df.columns):
+        col_counts = counts[offsets[i]:offsets[i + 1]]
+        if len(col_counts) == 0:
+            continue  # Columna sin valores: no hay moda con la que rellenar
+        modes[col] = first_mode(uniques[i][col_counts == col_counts.max()])
+    return modes
+
+# Function to pick the value Series.mode()[0] would return among tied candidates
+def first_mode(tied):
+    # En caso de empate, mode() ordena los valores y devuelve el menor
+    return pd.Series(tied).mode().iloc[0] if len(tied) > 1 else tied[0]
+
+# Function to clean data, optionally comparing only some key columns or reusing a precomputed duplicate mask
+def clean_data(df, values=None, subset=None, duplicated=None):
+    if duplicated is not None:
+        df = df[~duplicated]
+    else:
+        df = df.drop_duplicates(subset=subset)  # drop_duplicates ya devuelve un DataFrame nuevo
+    if values is None:
+        values = fill_values(df)
+    if values:
+        # Rellenar todas las columnas en una sola operación
+        df = df.fillna(value=values)
     return df
 
 # Function to remove outliers using Z-score
-def remove_outliers(df, z_thresh=3):
-    df = df.copy()
+def remove_outliers(df, z_thresh=3, median=None, mad=None, approximate=False, error=0.01):
     numeric_cols = df.select_dtypes(include=np.number).columns
     
-    # Usar mediana y MAD (Median Absolute Deviation) en lugar de media y std
-    # MAD es más robusto a outliers extremos
-    median = df[numeric_cols].median()
-    mad = np.median(np.abs(df[numeric_cols] - median), axis=0)
+    if (median is None or mad is None) and approximate:
+        # Sketch de cuantiles: una pasada O(n) con memoria acotada en lugar de ordenaciones exactas
+        median, mad = approximate_median_mad(sketch_columns(df, error), df[numeric_cols].isna().sum())
+    if median is None or mad is None:
+        # Usar mediana y MAD (Median Absolute Deviation) en lugar de media y std
+        # MAD es más robusto a outliers extremos
+        median = df[numeric_cols].median()
+        mad = np.median(np.abs(df[numeric_cols] - median), axis=0)
+    else:
+        # Estadísticas precalculadas (p. ej. en una pasada previa sobre un CSV por bloques)
+        median = median[numeric_cols]
+        mad = mad[numeric_cols].to_numpy()
     
     # Evitar división por cero
     mad = np.where(mad == 0, 1e-8, mad)
@@ -28,16 +93,21 @@ def remove_outliers(df, z_thresh=3):
     # Calcular z-scores modificados (basados en MAD)
     z_scores = 0.6745 * np.abs(df[numeric_cols] - median) / mad
     
-    # Filtrar filas
+    # Filtrar filas (la indexación booleana ya devuelve un DataFrame nuevo)
     df = df[~(z_scores > z_thresh).any(axis=1)]
     return df
 
 # Function to remove outliers using IQR
-def remove_outliers_iqr(df):
-    df = df.copy()  # Crear una copia explícita para evitar warnings
+def remove_outliers_iqr(df, q1=None, q3=None, approximate=False, error=0.01):
     numeric_cols = df.select_dtypes(include=np.number).columns
-    Q1 = df[numeric_cols].quantile(0.25)
-    Q3 = df[numeric_cols].quantile(0.75)
+    if (q1 is None or q3 is None) and approximate:
+        q1, q3 = approximate_quartiles(sketch_columns(df, error))
+    if q1 is None or q3 is None:
+        Q1 = df[numeric_cols].quantile(0.25)
+        Q3 = df[numeric_cols].quantile(0.75)
+    else:
+        Q1 = q1[numeric_cols]
+        Q3 = q3[numeric_cols]
     IQR = Q3 - Q1
     df = df[~((df[numeric_cols] < (Q1 - 1.5 * IQR)) | (df[numeric_cols] > (Q3 + 1.5 * IQR))).any(axis=1)]
-    return df
\ No newline at end of file
+    return df
@@ -0,0 +1,177 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+try:
+    from .limpiar import column_modes, columns_with_nulls
+except ImportError:  # Ejecutado como script desde src/ (streamlit run src/app.py)
+    from limpiar import column_modes, columns_with_nulls
+
+
+BACKENDS = ("thread", "process")
+
+
+# Function to get the default number of workers
+def default_workers():
+    return os.cpu_count() or 1
+
+# Function to split range(n) into at most `parts` contiguous, non-empty slices
+def partitions(n, parts):
+    bounds = np.linspace(0, n, min(parts, n) + 1).astype(int) if n else [0]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+# Class to share a numeric block with the workers: a plain array for threads, shared memory for processes
+class SharedBlock:
+    def __init__(self, df, columns, backend):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}'. Expected one of {BACKENDS}")
+        # Una fila por columna (cada columna contigua en memoria), siempre en float64
+        shape = (len(columns), len(df))
+        self.shm = None
+        if backend == "process" and shape[0] * shape[1] > 0:
+            self.shm = shared_memory.SharedMemory(create=True, size=shape[0] * shape[1] * 8)
+            self.array = np.ndarray(shape, dtype=np.float64, buffer=self.shm.buf)
+            self.ref = (self.shm.name, shape)
+        else:
+            self.array = np.empty(shape, dtype=np.float64)
+            self.ref = self.array
+        for i, col in enumerate(columns):
+            self.array[i] = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    def close(self):
+        if self.shm is not None:
+            del self.array
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Function to get the array behind a block reference inside a worker
+def attach(ref):
+    if isinstance(ref, np.ndarray):
+        return None, ref
+    name, shape = ref
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+
+# Function to get the dtype pandas (nanops) sums a column in: its own for floats (float32 stays float32), else float64
+def sum_dtype(dtype):
+    return dtype if isinstance(dtype, np.dtype) and dtype.kind == "f" else np.dtype(np.float64)
+
+# Function to compute per-column statistics for the columns [start, stop) of a block
+def column_stats(ref, start, stop, stat, dtypes=None):
+    shm, block = attach(ref)
+    try:
+        results = []
+        for i, values in enumerate(block[start:stop]):
+            mask = np.isnan(values)
+            valid = values[~mask]
+            # Mismas operaciones que pandas (nanops) para obtener resultados idénticos al camino serie
+            if stat == "mean":
+                # El bloque es float64, pero la suma se hace en el tipo de la columna, como DataFrame.mean()
+                dtype = dtypes[i] if dtypes is not None else np.dtype(np.float64)
+                total = np.where(mask, 0, values).astype(dtype, copy=False).sum(dtype=dtype)
+                results.append(total / dtype.type(len(valid)) if len(valid) else dtype.type(np.nan))
+            elif stat == "median_mad":
+                median = np.median(valid) if len(valid) else np.nan
+                mad = np.median(np.abs(values - median)) if len(values) else np.nan
+                results.append((median, mad))
+            else:
+                results.append((np.quantile(valid, 0.25), np.quantile(valid, 0.75)) if len(valid) else (np.nan, np.nan))
+        return results
+    finally:
+        if shm is not None:
+            del block
+            shm.close()
+
+# Function to compute the outlier mask for the rows [start, stop) of a block
+def row_mask(ref, start, stop, method, first, second, z_thresh=3):
+    shm, block = attach(ref)
+    try:
+        values = block[:, start:stop]
+        with np.errstate(invalid='ignore'):
+            if method == "zscore":
+                # first = mediana, second = MAD (ya sin ceros)
+                flagged = 0.6745 * np.abs(values - first[:, None]) / second[:, None] > z_thresh
+            else:
+                # first = Q1, second = Q3
+                iqr = second - first
+                flagged = (values < (first - 1.5 * iqr)[:, None]) | (values > (second + 1.5 * iqr)[:, None])
+        return flagged.any(axis=0)
+    finally:
+        if shm is not None:
+            del values, block
+            shm.close()
+
+
+# Function to create the executor for a backend
+def make_executor(workers, backend):
+    if backend == "process":
+        return ProcessPoolExecutor(max_workers=workers)
+    return ThreadPoolExecutor(max_workers=workers)
+
+# Function to run column_stats over column partitions and concatenate results in column order
+def map_columns(executor, block, workers, stat, dtypes=None):
+    futures = [executor.submit(column_stats, block.ref, start, stop, stat,
+                               dtypes[start:stop] if dtypes is not None else None)
+               for start, stop in partitions(block.array.shape[0], workers)]
+    return [result for future in futures for result in future.result()]
+
+# Function to run row_mask over row partitions and concatenate the masks in row order
+def map_rows(executor, block, workers, method, first, second, z_thresh=3):
+    futures = [executor.submit(row_mask, block.ref, start, stop, method, first, second, z_thresh)
+               for start, stop in partitions(block.array.shape[1], workers)]
+    masks = [future.result() for future in futures]
+    return np.concatenate(masks) if masks else np.zeros(0, dtype=bool)
+
+
+# Function to clean data using a pool of workers for the fill statistics
+def clean_data_parallel(df, workers=None, backend="thread"):
+    workers = workers or default_workers()
+    df = df.drop_duplicates()
+    numeric_cols, object_cols = columns_with_nulls(df)
+
+    values = {}
+    with make_executor(workers, backend) as executor, SharedBlock(df, numeric_cols, backend) as block:
+        dtypes = [sum_dtype(df[col].dtype) for col in numeric_cols]
+        values.update(zip(numeric_cols, map_columns(executor, block, workers, "mean", dtypes)))
+    # Las columnas de texto son objetos de Python: no se pueden compartir sin serializarlas, así que van en hilos
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(column_modes, df[object_cols[start:stop]])
+                   for start, stop in partitions(len(object_cols), workers)]
+        for future in futures:
+            values.update(future.result())
+    return df.fillna(value=values) if values else df
+
+# Function to remove outliers using Z-score with a pool of workers
+def remove_outliers_parallel(df, z_thresh=3, workers=None, backend="thread"):
+    workers = workers or default_workers()
+    numeric_cols = df.select_dtypes(include=np.number).columns
+    with make_executor(workers, backend) as executor, SharedBlock(df, numeric_cols, backend) as block:
+        stats = map_columns(executor, block, workers, "median_mad")
+        median = np.array([median for median, _ in stats], dtype=np.float64)
+        mad = np.array([mad for _, mad in stats], dtype=np.float64)
+        # Evitar división por cero
+        mad = np.where(mad == 0, 1e-8, mad)
+        mask = map_rows(executor, block, workers, "zscore", median, mad, z_thresh)
+    return df[~mask]
+
+# Function to remove outliers using IQR with a pool of workers
+def remove_outliers_iqr_parallel(df, workers=None, backend="thread"):
+    workers = workers or default_workers()
+    numeric_cols = df.select_dtypes(include=np.number).columns
+    with make_executor(workers, backend) as executor, SharedBlock(df, numeric_cols, backend) as block:
+        stats = map_columns(executor, block, workers, "quartiles")
+        q1 = np.array([q1 for q1, _ in stats], dtype=np.float64)
+        q3 = np.array([q3 for _, q3 in stats], dtype=np.float64)
+        mask = map_rows(executor, block, workers, "iqr", q1, q3)
+    return df[~mask]
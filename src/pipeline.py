@@ -0,0 +1,191 @@
+import argparse
+import fnmatch
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+try:
+    from .dtypes import optimize_dtypes
+    from .formats import CSV_COMPRESSIONS, EXTENSIONS, FORMATS, detect_format, export_name, read_table, write_chunks
+    from .parallel import BACKENDS, default_workers
+    from .plan import (clean_step, delete_step, encode_step, execute, expression_filter_step, filter_step, iqr_step,
+                       normalize_step, optimize, rename_step, sort_step, zscore_step)
+    from .transformers import FittedPipeline
+except ImportError:  # Ejecutado como script desde src/ (python src/pipeline.py)
+    from dtypes import optimize_dtypes
+    from formats import CSV_COMPRESSIONS, EXTENSIONS, FORMATS, detect_format, export_name, read_table, write_chunks
+    from parallel import BACKENDS, default_workers
+    from plan import (clean_step, delete_step, encode_step, execute, expression_filter_step, filter_step, iqr_step,
+                      normalize_step, optimize, rename_step, sort_step, zscore_step)
+    from transformers import FittedPipeline
+
+
+# Function to build a filter step from a spec: one condition (column, op, value) or a whole expression
+def spec_filter_step(column=None, op=None, value=None, expression=None):
+    if expression is not None:
+        return expression_filter_step(expression)
+    return filter_step(column, op, value)
+
+
+# Pasos que se pueden pedir en una especificación y la función que construye cada uno
+BUILDERS = {
+    "clean": clean_step,
+    "zscore": zscore_step,
+    "iqr": iqr_step,
+    "normalize": normalize_step,
+    "encode": encode_step,
+    "delete": delete_step,
+    "rename": rename_step,
+    "filter": spec_filter_step,
+    "sort": sort_step,
+}
+
+
+# Function to read a pipeline spec from a JSON file
+def load_spec(path):
+    with open(path) as file:
+        return json.load(file)
+
+# Function to turn the steps of a spec into plan steps, e.g. ["clean", {"step": "zscore", "z_thresh": 2.5}]
+def build_steps(spec):
+    steps = []
+    for entry in spec.get("steps", []):
+        params = {"step": entry} if isinstance(entry, str) else dict(entry)
+        name = params.pop("step", None)
+        if name not in BUILDERS:
+            raise ValueError(f"Unknown step '{name}'. Expected one of {tuple(BUILDERS)}")
+        try:
+            steps.append(BUILDERS[name](**params))
+        except TypeError as e:
+            raise ValueError(f"Invalid parameters for step '{name}': {e}")
+    fmt = spec.get("format")
+    if fmt is not None and fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}'. Expected one of {FORMATS}")
+    if spec.get("compression") not in CSV_COMPRESSIONS:
+        raise ValueError(f"Unknown compression '{spec['compression']}'. Expected one of {CSV_COMPRESSIONS}")
+    return steps
+
+# Function to run the steps of a spec over a DataFrame, returning the result and the time of each step
+def run_pipeline(df, spec):
+    steps, _ = optimize(build_steps(spec), df.iloc[:0])
+    return execute(steps, df)
+
+
+# Function to read one file as the pipeline sees it
+def read_file(source, spec):
+    with open(source, "rb") as file:
+        df = read_table(file.read(), detect_format(source))
+    return optimize_dtypes(df)[0] if spec.get("optimize_memory") else df
+
+# Function to learn the statistics of a spec on one file, to apply them unchanged to later files
+def fit_pipeline(source, spec):
+    return FittedPipeline.from_steps(build_steps(spec)).fit(read_file(source, spec))
+
+
+# Function to clean one file with a spec (or with statistics fitted earlier) and write the result, returning its metrics
+def process_file(source, output_dir, spec, fitted=None):
+    metrics = {"file": str(source), "output": None, "status": "ok", "error": None,
+               "rows_in": None, "rows_out": None, "columns_in": None, "columns_out": None,
+               "read_seconds": None, "clean_seconds": None, "write_seconds": None, "steps": None}
+    try:
+        start = time.perf_counter()
+        fmt = detect_format(source)
+        df = read_file(source, spec)
+        metrics.update(rows_in=len(df), columns_in=df.shape[1], read_seconds=time.perf_counter() - start)
+
+        start = time.perf_counter()
+        if fitted is not None:
+            # Estadísticas aprendidas una vez: medias, modas, cuantiles, escalas y códigos iguales en todos los ficheros
+            df = fitted.transform(df)
+        else:
+            df, timings = run_pipeline(df, spec)
+            metrics["steps"] = [{"step": t["step"], "rows_out": t["rows_out"], "seconds": t["seconds"]} for t in timings]
+        metrics.update(rows_out=len(df), columns_out=df.shape[1], clean_seconds=time.perf_counter() - start)
+
+        start = time.perf_counter()
+        out_fmt = spec.get("format") or fmt
+        compression = spec.get("compression") if out_fmt == "csv" else None
+        name = export_name(os.path.splitext(os.path.basename(source))[0], out_fmt, compression)
+        destination = os.path.join(output_dir, name)
+        # Escribir por bloques a un fichero temporal y reemplazar: nunca queda un fichero a medio escribir
+        with open(f"{destination}.tmp", "wb") as file:
+            write_chunks(df, out_fmt, file, compression)
+        os.replace(f"{destination}.tmp", destination)
+        metrics.update(output=destination, write_seconds=time.perf_counter() - start)
+    except Exception as e:
+        # Un fichero que falla no detiene el lote: queda anotado en el resumen
+        metrics.update(status="failed", error=f"{type(e).__name__}: {e}")
+    return metrics
+
+# Function to list the files of a directory that the pipeline can read
+def find_files(source_dir, pattern="*"):
+    return sorted(os.path.join(source_dir, name) for name in os.listdir(source_dir)
+                  if os.path.splitext(name)[1].lower() in EXTENSIONS and fnmatch.fnmatch(name, pattern)
+                  and os.path.isfile(os.path.join(source_dir, name)))
+
+# Function to clean every file of a directory with a bounded pool of workers
+def process_directory(source_dir, output_dir, spec, workers=None, pattern="*", backend="process", fitted=None):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}'. Expected one of {BACKENDS}")
+    build_steps(spec)  # Una especificación inválida falla antes de leer ningún fichero
+    files = find_files(source_dir, pattern)
+    os.makedirs(output_dir, exist_ok=True)
+    workers = min(workers or default_workers(), max(len(files), 1))
+    # Procesos por defecto: pandas suelta el GIL solo en parte, y cada fichero es independiente
+    executor = ProcessPoolExecutor if backend == "process" else ThreadPoolExecutor
+    start = time.perf_counter()
+    with executor(max_workers=workers) as pool:
+        results = list(pool.map(process_file, files, [output_dir] * len(files), [spec] * len(files),
+                                [fitted] * len(files)))
+    return {
+        "spec": spec,
+        "workers": workers,
+        "backend": backend,
+        "fitted": fitted is not None,
+        "files": results,
+        "totals": {
+            "files": len(results),
+            "failed": sum(result["status"] == "failed" for result in results),
+            "rows_in": sum(result["rows_in"] or 0 for result in results),
+            "rows_out": sum(result["rows_out"] or 0 for result in results),
+            "seconds": time.perf_counter() - start,
+        },
+    }
+
+# Function to write the summary of a batch run as JSON
+def write_summary(summary, path):
+    with open(path, "w") as file:
+        json.dump(summary, file, indent=2, default=str)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Clean every file of a directory with a pipeline spec")
+    parser.add_argument("spec", help="JSON file with the steps, e.g. {\"steps\": [\"clean\", \"zscore\"]}")
+    parser.add_argument("source_dir")
+    parser.add_argument("output_dir")
+    parser.add_argument("--pattern", default="*", help="only process the files whose name matches this pattern")
+    parser.add_argument("--workers", type=int, default=None, help="files processed at the same time (default: CPU count)")
+    parser.add_argument("--backend", choices=BACKENDS, default="process")
+    parser.add_argument("--summary", help="where to write the JSON summary (default: <output_dir>/summary.json)")
+    parser.add_argument("--fitted", help="statistics learned once and reused by every run (fitted on the first file "
+                                         "if the file does not exist yet)")
+    args = parser.parse_args()
+
+    spec = load_spec(args.spec)
+    fitted = None
+    if args.fitted and os.path.exists(args.fitted):
+        fitted = FittedPipeline.load(args.fitted)
+    elif args.fitted:
+        files = find_files(args.source_dir, args.pattern)
+        if not files:
+            sys.exit(f"No files to fit '{args.fitted}' on in {args.source_dir}")
+        fitted = fit_pipeline(files[0], spec)
+        fitted.save(args.fitted)
+    summary = process_directory(args.source_dir, args.output_dir, spec, args.workers, args.pattern, args.backend, fitted)
+    write_summary(summary, args.summary or os.path.join(args.output_dir, "summary.json"))
+    totals = summary["totals"]
+    print(f"Files: {totals['files']} ({totals['failed']} failed), rows read: {totals['rows_in']}, "
+          f"rows written: {totals['rows_out']}, {totals['seconds']:.1f} s")
+    sys.exit(1 if totals["failed"] else 0)
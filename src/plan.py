@@ -0,0 +1,411 @@
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .cache import chain_key
+    from .filters import FrameIndex, condition, evaluate_mask, expression_columns, filter_rows, parse_expression
+    from .limpiar import TEXT_DTYPES, clean_data, remove_outliers, remove_outliers_iqr
+    from .sorting import sort_spec
+    from .summaries import derive_summary, summary_key
+except ImportError:  # Ejecutado como script desde src/ (streamlit run src/app.py)
+    from cache import chain_key
+    from filters import FrameIndex, condition, evaluate_mask, expression_columns, filter_rows, parse_expression
+    from limpiar import TEXT_DTYPES, clean_data, remove_outliers, remove_outliers_iqr
+    from sorting import sort_spec
+    from summaries import derive_summary, summary_key
+
+
+# Pasos que reciben el DataFrame pero no lo modifican (estadísticas, gráficos, descarga)
+SINK = "sink"
+# Pasos cuyo resultado depende del orden de las filas (factorize numera por orden de aparición, etc.)
+ORDER_SENSITIVE = ("clean", SINK)
+
+
+# Class describing one step of the action plan
+class Step:
+    def __init__(self, kind, label, **params):
+        self.kind = kind
+        self.label = label
+        self.params = params
+
+    def replace(self, label=None, **params):
+        return Step(self.kind, label or self.label, **{**self.params, **params})
+
+    def __repr__(self):
+        return f"Step({self.kind!r}, {self.label!r}, {self.params!r})"
+
+
+# Functions to build the steps for each action
+def clean_step(keys=None):
+    if keys:
+        return Step("clean", f"Basic Data Cleaning (duplicates by {list(keys)})", keys=list(keys))
+    return Step("clean", "Basic Data Cleaning", keys=None)
+
+def zscore_step(z_thresh=3):
+    if z_thresh != 3:
+        return Step("zscore", f"Remove Outliers (Z-Score > {z_thresh})", z_thresh=z_thresh)
+    return Step("zscore", "Remove Outliers (Z-Score)")
+
+def iqr_step():
+    return Step("iqr", "Remove Outliers (IQR)")
+
+def normalize_step():
+    return Step("columnwise", "Normalize Data", ops=["normalize"])
+
+def encode_step():
+    return Step("columnwise", "Encode Categorical Columns", ops=["encode"])
+
+def delete_step(columns):
+    return Step("delete", f"Delete columns {list(columns)}", columns=list(columns))
+
+def rename_step(old, new):
+    return Step("rename", f"Rename '{old}' to '{new}'", old=old, new=new)
+
+def filter_step(column, op, value, keep_if_empty=False):
+    return Step("filter", f"Filter rows where '{column}' {op.lower()} '{value}'",
+                column=column, op=op, value=value, keep_if_empty=keep_if_empty)
+
+def expression_filter_step(expression, keep_if_empty=False):
+    parse_expression(expression)  # Una expresión mal escrita falla al construir el plan, no al ejecutarlo
+    return Step("filter", f"Filter rows where {expression}", expression=expression, keep_if_empty=keep_if_empty)
+
+def sort_step(column, ascending=True, limit=None):
+    by, orders = sort_spec(column, ascending)
+    keys = ", ".join(f"'{col}' ({'ascending' if asc else 'descending'})" for col, asc in zip(by, orders))
+    # Una sola columna se guarda como texto, igual que antes: las claves de la caché y los pipelines no cambian
+    by, orders = (by[0], orders[0]) if len(by) == 1 else (by, orders)
+    if limit is None:
+        return Step("sort", f"Sort by {keys}", by=by, ascending=orders)
+    # Top-N / bottom-N: solo las N primeras filas de ese orden, elegidas con una selección parcial
+    return Step("sort", f"Keep the first {limit} rows by {keys}", by=by, ascending=orders, limit=int(limit))
+
+def sink_step(action, **params):
+    return Step(SINK, action, action=action, **params)
+
+
+# Function to compute the mask of the "Filter Rows" action
+def filter_mask(df, column, op, value):
+    return pd.Series(evaluate_mask(condition(column, op, value), df), index=df.index)
+
+# Function to get the expression tree of a filter step
+def filter_expression(step):
+    if step.params.get("expression"):
+        return parse_expression(step.params["expression"])
+    return condition(step.params["column"], step.params["op"], step.params["value"])
+
+# Function to list the columns a filter step reads
+def filter_columns(step):
+    return expression_columns(filter_expression(step))
+
+# Function to list the columns a sort step orders by
+def sort_columns(step):
+    return sort_spec(step.params["by"], step.params["ascending"])[0]
+
+# Function to apply a chain of column-wise transforms, writing every changed column back at once
+def apply_column_ops(df, ops):
+    # Las columnas afectadas por cada operación se deciden sobre un prototipo vacío con los mismos tipos
+    prototype = df.iloc[:0]
+    values = {}
+    for op in ops:
+        if op == "normalize":
+            columns = prototype.select_dtypes(include=np.number).columns
+        else:
+            columns = prototype.select_dtypes(include=TEXT_DTYPES + ['category']).columns
+        for col in columns:
+            column = values.get(col, df[col])
+            if op == "normalize":
+                if pd.api.types.is_integer_dtype(column):
+                    column = column.astype(np.float64)  # Con enteros reducidos (int8, int16) la resta podría desbordar
+                values[col] = (column - column.min()) / (column.max() - column.min())
+            else:
+                values[col] = pd.Series(pd.factorize(column)[0], index=column.index)
+        prototype = prototype.assign(**{col: values[col].iloc[:0] for col in columns})
+    if not values:
+        return df
+    df = df.copy(deep=False)
+    for col, column in values.items():
+        df[col] = column
+    return df
+
+# Function to apply one step to a DataFrame, reusing the statistics of its profile and the column indexes when given
+def apply_step(df, step, profile=None, index=None):
+    params = step.params
+    if step.kind == "clean":
+        if params.get("keys"):
+            return clean_data(df, subset=params["keys"])
+        if profile is not None:
+            # El perfil ya tiene la máscara de duplicados: no hace falta volver a hashear las filas
+            return clean_data(df, values=profile.fill_values(), duplicated=profile.duplicated)
+        return clean_data(df)
+    if step.kind == "zscore":
+        return remove_outliers(df, z_thresh=params.get("z_thresh", 3))
+    if step.kind == "iqr":
+        if profile is not None:
+            return remove_outliers_iqr(df, q1=profile.q1, q3=profile.q3)
+        return remove_outliers_iqr(df)
+    if step.kind == "columnwise":
+        return apply_column_ops(df, params["ops"])
+    if step.kind == "delete":
+        return df.drop(columns=params["columns"])
+    if step.kind == "rename":
+        return df.rename(columns={params["old"]: params["new"]})
+    if step.kind == "filter":
+        # Con índices (sorted arrays, diccionarios, trigramas) solo se tocan las filas que cumplen el filtro
+        result = filter_rows(df, filter_expression(step), index)
+        # Como en la app, un filtro que no encuentra ninguna fila no se aplica
+        return df if params.get("keep_if_empty") and result.empty else result
+    if step.kind == "sort":
+        # Posiciones ordenadas (de la caché si ya se ordenó por lo mismo) y una sola copia reordenada
+        index = index if index is not None else FrameIndex(df)
+        return df.take(index.order(params["by"], params["ascending"], params.get("limit")))
+    return df
+
+# Function to get the columns and dtypes a step will see, without touching any rows
+def prototype_at(prototype, steps):
+    for step in steps:
+        # Solo estos pasos cambian columnas o tipos; los demás solo quitan o reordenan filas
+        if step.kind in ("columnwise", "delete", "rename"):
+            prototype = apply_step(prototype, step)
+    return prototype
+
+
+# Function to merge consecutive column-wise transforms into a single step
+def fuse_columnwise(steps, notes):
+    fused = []
+    for step in steps:
+        if step.kind == "columnwise" and fused and fused[-1].kind == "columnwise":
+            previous = fused.pop()
+            ops = previous.params["ops"] + step.params["ops"]
+            # Normalizar o codificar dos veces seguidas no cambia nada: basta con una
+            ops = [op for i, op in enumerate(ops) if i == 0 or op != ops[i - 1]]
+            notes.append(f"Fused '{previous.label}' and '{step.label}' into one column-wise pass")
+            step = previous.replace(label=f"{previous.label} + {step.label}", ops=ops)
+        fused.append(step)
+    return fused
+
+# Function to decide whether a delete or filter step can run before the previous step
+def can_move_before(step, previous, prototype):
+    if step.kind == "delete":
+        columns = set(step.params["columns"])
+        if previous.kind in ("columnwise", "rename"):
+            return True
+        if previous.kind == "sort":
+            return not set(sort_columns(previous)) & columns
+        if previous.kind == "filter":
+            return not filter_columns(previous) & columns
+        if previous.kind in ("zscore", "iqr"):
+            # Los outliers solo miran columnas numéricas: borrar columnas de texto antes no cambia el resultado
+            numeric_cols = set(prototype.select_dtypes(include=np.number).columns)
+            return not columns & numeric_cols
+        return False
+    # Un filtro de filas conmuta con la ordenación y con el renombrado, pero no con un top-N (cambiaría qué filas entran)
+    if previous.kind == "sort" and previous.params.get("limit") is not None:
+        return False
+    if step.params.get("expression") and previous.kind == "rename":
+        # Una expresión no se reescribe: solo pasa delante si no usa la columna renombrada
+        return not filter_columns(step) & {previous.params["old"], previous.params["new"]}
+    return previous.kind in ("sort", "rename")
+
+# Function to rewrite a step so it can run before a rename
+def before_rename(step, rename):
+    old, new = rename.params["old"], rename.params["new"]
+    if step.kind == "delete":
+        columns = [old if col == new else col for col in step.params["columns"]]
+        return step.replace(label=delete_step(columns).label, columns=columns)
+    if step.params.get("expression"):
+        return step  # can_move_before ya comprobó que la expresión no usa la columna renombrada
+    if step.params["column"] == new:
+        label = filter_step(old, step.params["op"], step.params["value"]).label
+        return step.replace(label=label, column=old)
+    return step
+
+# Function to move deletes and filters as early as the results allow
+def push_down(steps, prototype, kind, notes):
+    steps = list(steps)
+    for i in range(len(steps)):
+        if steps[i].kind != kind:
+            continue
+        j = i
+        while j > 0 and can_move_before(steps[j], steps[j - 1], prototype_at(prototype, steps[:j - 1])):
+            step, previous = steps[j], steps[j - 1]
+            if previous.kind == "rename":
+                step = before_rename(step, previous)
+            steps[j - 1], steps[j] = step, previous
+            notes.append(f"Moved '{step.label}' before '{previous.label}'")
+            j -= 1
+    # Un renombrado de una columna ya borrada no hace nada
+    deleted = set()
+    kept = []
+    for step in steps:
+        if step.kind == "delete":
+            deleted.update(step.params["columns"])
+        if step.kind == "rename" and step.params["old"] in deleted:
+            notes.append(f"Dropped '{step.label}' (the column is deleted earlier)")
+            continue
+        kept.append(step)
+    return kept
+
+# Function to drop sorts whose order nothing uses
+def drop_dead_sorts(steps, notes, ordered_output=True):
+    kept = []
+    for i, step in enumerate(steps):
+        # Un top-N quita filas: nunca sobra
+        if step.kind == "sort" and step.params.get("limit") is None:
+            dead = not ordered_output
+            for later in steps[i + 1:]:
+                if later.kind == "sort" and sort_columns(later) == sort_columns(step):
+                    dead = True  # Una ordenación posterior por las mismas columnas la sustituye
+                    break
+                if (later.kind in ORDER_SENSITIVE
+                        or (later.kind == "sort" and later.params.get("limit") is not None)  # Los empates eligen por orden
+                        or (later.kind == "rename" and later.params["old"] in sort_columns(step))
+                        or (later.kind == "columnwise" and "encode" in later.params["ops"])):
+                    dead = False
+                    break
+            if dead:
+                notes.append(f"Dropped '{step.label}' (its order is never used)")
+                continue
+        kept.append(step)
+    return kept
+
+# Function to optimize a plan before running it
+def optimize(steps, prototype, ordered_output=True):
+    notes = []
+    steps = fuse_columnwise(steps, notes)
+    steps = push_down(steps, prototype, "delete", notes)
+    steps = push_down(steps, prototype, "filter", notes)
+    steps = drop_dead_sorts(steps, notes, ordered_output)
+    steps = fuse_columnwise(steps, notes)
+    return steps, notes
+
+
+# Function to take out a final sort that only output steps see: the preview pages through its positions and the
+# export reorders the rows when the file is written, so no sorted copy of the data is built on each run
+def defer_final_sort(steps, notes):
+    data = [i for i, step in enumerate(steps) if step.kind != SINK]
+    if not data or steps[data[-1]].kind != "sort" or steps[data[-1]].params.get("limit") is not None:
+        return steps, None
+    i = data[-1]
+    final = steps[i]
+    notes.append(f"Deferred '{final.label}' to the preview and the export")
+    # Los pasos de salida posteriores reciben la ordenación: la descarga la aplica, el resto no depende del orden
+    return steps[:i] + [step.replace(order=final) for step in steps[i + 1:]], final
+
+
+# Function to describe a step by its kind and parameters, ignoring UI objects such as containers
+def signature(step):
+    simple = (str, int, float, bool, list, tuple, type(None))
+    return step.kind, sorted((name, value) for name, value in step.params.items() if isinstance(value, simple))
+
+# Function to run the whole plan once, calling on_step(step, before, after) after each step
+def execute(steps, df, on_step=None, cache=None, key=None, profile=None):
+    timings = []
+    source = df
+    for step in steps:
+        started, start, cpu_start = time.time(), time.perf_counter(), time.thread_time()
+        # Con tracemalloc activo (modo de captura o traza de memoria) se mide también el pico de cada paso
+        memory_start = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        if memory_start is not None:
+            tracemalloc.reset_peak()
+        cached = False
+        # El perfil describe el DataFrame de entrada: solo sirve mientras ningún paso lo haya cambiado
+        step_profile = profile if df is source else None
+        if step.kind != SINK and cache is not None and key is not None:
+            # Cada resultado intermedio se guarda con la clave de su entrada más los parámetros del paso,
+            # así que al cambiar un paso solo se recalculan los siguientes
+            # Los índices de filtrado y los órdenes cuelgan de la clave de la entrada: otro filtro u otra ordenación
+            # sobre los mismos datos los reutiliza
+            index = FrameIndex(df, cache, key) if step.kind in ("filter", "sort") else None
+            input_key, key = key, chain_key(key, signature(step))
+            result = cache.get(key)
+            cached = result is not None
+            if not cached:
+                result = cache.put(key, apply_step(df, step, step_profile, index))
+            # Si la entrada tiene resumen (histogramas y cuentas), el de la salida se actualiza con las filas que cambian
+            if summary_key(input_key) in cache and summary_key(key) not in cache:
+                summary = cache.get(summary_key(input_key))
+                if summary is not None:
+                    cache.put(summary_key(key), derive_summary(summary, step, df, result))
+        else:
+            result = apply_step(df, step, step_profile)
+        timings.append({
+            "step": step.label,
+            "started": started,
+            "rows_in": len(df),
+            "rows_out": len(result),
+            "columns_in": df.shape[1],
+            "columns": result.shape[1],
+            "seconds": time.perf_counter() - start,
+            "cpu_seconds": time.thread_time() - cpu_start,
+            "peak_mb": (max(tracemalloc.get_traced_memory()[1] - memory_start, 0) / 1024 / 1024
+                        if memory_start is not None and tracemalloc.is_tracing() else None),
+            "cached": cached,
+        })
+        if on_step is not None:
+            # Lo que tarda dibujar el paso (gráficos, tablas) se apunta aparte del cálculo
+            start, cpu_start = time.perf_counter(), time.thread_time()
+            on_step(step, df, result)
+            timings[-1].update(render_seconds=time.perf_counter() - start,
+                               render_cpu_seconds=time.thread_time() - cpu_start)
+        df = result
+    return df, timings
+
+# Function to get the cache key of the input of each step, chained as execute does
+def step_keys(steps, key):
+    keys = []
+    for step in steps:
+        keys.append(key)
+        if step.kind != SINK:
+            key = chain_key(key, signature(step))
+    return keys
+
+# Function to get the cache key of the result of the whole plan
+def output_key(steps, key):
+    for step in steps:
+        if step.kind != SINK:
+            key = chain_key(key, signature(step))
+    return key
+
+# Function to tell whether every intermediate result of the plan is already in the cache
+def is_cached(steps, cache, key):
+    return all(chain_key(input_key, signature(step)) in cache
+               for step, input_key in zip(steps, step_keys(steps, key)) if step.kind != SINK)
+
+# Function to run a plan inside a background job, reporting progress and checking for cancellation after each step
+def execute_job(job, steps, df, cache, key, profile=None, prepare=None):
+    done = 0
+
+    def on_step(step, before, after):
+        nonlocal done
+        # prepare(step, before) precalcula lo que los pasos de salida necesitarán al dibujarse (p. ej. correlaciones)
+        if prepare is not None:
+            prepare(step, before)
+        done += 1
+        job.report(done / len(steps), f"Finished '{step.label}' ({done}/{len(steps)})")
+
+    # El hilo del trabajo guarda en la caché en nombre de la sesión que lo pidió
+    if cache is not None:
+        cache.session(job.owner)
+    job.report(0.0, f"Running '{steps[0].label}'" if steps else "Running")
+    # Los resultados quedan en la caché, donde el script los recoge; el trabajo solo devuelve los tiempos
+    return execute(steps, df, on_step=on_step, cache=cache, key=key, profile=profile)[1]
+
+
+# Function to describe the optimized plan and the rewrites applied to it
+def explain(steps, notes, timings=None):
+    lines = []
+    for i, step in enumerate(steps):
+        line = f"{i + 1}. {step.label}"
+        if timings is not None:
+            t = timings[i]
+            line += f" — {t['rows_in']:,} → {t['rows_out']:,} rows, {t['columns']} columns, {t['seconds'] * 1000:.1f} ms"
+            if t.get("cached"):
+                line += " (cached)"
+        lines.append(line)
+    if notes:
+        lines.append("")
+        lines.extend(f"- {note}" for note in notes)
+    return "\n".join(lines)
@@ -0,0 +1,72 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .cache import chain_key
+    from .sorting import sort_order, sort_spec
+except ImportError:  # Ejecutado como script desde src/ (streamlit run src/app.py)
+    from cache import chain_key
+    from sorting import sort_order, sort_spec
+
+
+PAGE_SIZES = (25, 50, 100, 500)
+
+
+# Function to mark the rows where any column contains the search text (numbers must match exactly)
+def search_mask(df, query):
+    mask = np.zeros(len(df), dtype=bool)
+    if not query:
+        return ~mask
+    try:
+        number = float(query)
+    except ValueError:
+        number = None
+    for col in df.columns:
+        column = df[col]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            # Buscar solo entre las categorías y llevar el resultado a las filas con los códigos
+            matches = column.cat.categories.astype(str).str.contains(query, case=False, regex=False)
+            codes = column.cat.codes.to_numpy()
+            mask |= (codes >= 0) & np.asarray(matches)[codes]
+        elif pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column):
+            if number is not None:
+                mask |= (column == number).to_numpy(dtype=bool, na_value=False)
+        else:
+            found = column.astype(str).str.contains(query, case=False, regex=False, na=False).to_numpy(dtype=bool)
+            mask |= found & column.notna().to_numpy()  # Un nulo no es el texto "None" ni "nan"
+    return mask
+
+# Function to get the positions of the rows in the order the preview shows them, with nulls last
+def row_order(df, sort_column=None, ascending=True, cache=None, key=None):
+    if sort_column is None:
+        return np.arange(len(df))
+    # La misma permutación que usa la acción "Sort Data" sobre estos datos (y la caché la comparte)
+    return sort_order(df, sort_column, ascending, cache=cache, key=key)
+
+# Function to get the positions of the rows that match a search, in display order; base_order is a (columns,
+# orders) sort shown when no preview column is chosen, e.g. a final "Sort Data" step that was not materialized
+def visible_positions(df, sort_column=None, ascending=True, query="", cache=None, key=None, base_order=None):
+    def compute():
+        if sort_column is None and base_order is not None:
+            order = sort_order(df, *base_order, cache=cache, key=key)
+        else:
+            order = row_order(df, sort_column, ascending, cache, key)
+        return order[search_mask(df, query)[order]] if query else order
+
+    if cache is None or key is None:
+        return compute()
+    # Ordenar y buscar una vez por combinación; pasar de página solo corta el array de posiciones
+    base = None if base_order is None else tuple(map(tuple, sort_spec(*base_order)))
+    return cache.get_or_compute(chain_key(key, "preview", sort_column, ascending, query, base), compute)
+
+# Function to count the pages needed to show n rows
+def page_count(n, page_size):
+    return max(1, math.ceil(n / page_size))
+
+# Function to cut one page of rows out of the visible positions
+def page_window(df, positions, page, page_size):
+    page = min(max(page, 1), page_count(len(positions), page_size))
+    start = (page - 1) * page_size
+    return df.iloc[positions[start:start + page_size]]
@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+
+try:
+    from .cache import estimate_size
+    from .dedup import duplicated_rows
+    from .limpiar import TEXT_DTYPES, first_mode
+except ImportError:  # Ejecutado como script desde src/ (streamlit run src/app.py)
+    from cache import estimate_size
+    from dedup import duplicated_rows
+    from limpiar import TEXT_DTYPES, first_mode
+
+
+# Function to interpolate quantiles of every row of a sorted block like numpy's 'linear' method
+def sorted_quantile(block, counts, q):
+    if block.shape[1] == 0:
+        return np.full(block.shape[0], np.nan)
+    position = q * (counts - 1)
+    previous = np.floor(position).astype(np.intp)
+    following = np.minimum(previous + 1, counts - 1)
+    gamma = position - previous
+    rows = np.arange(block.shape[0])
+    a = block[rows, np.maximum(previous, 0)]
+    b = block[rows, np.maximum(following, 0)]
+    # Misma interpolación que numpy (_lerp) para obtener resultados idénticos a Series.quantile
+    diff = b - a
+    result = np.where(gamma >= 0.5, b - diff * (1 - gamma), a + diff * gamma)
+    return np.where(counts > 0, result, np.nan)
+
+
+# Class holding the profile of a DataFrame, computed once and read by the overview and the actions
+class DataProfile:
+    def __init__(self, df):
+        self.rows, self.n_columns = df.shape
+        self.columns = df.columns
+        self.dtypes = df.dtypes
+        self.head = df.head(3)
+        self.duplicated = duplicated_rows(df)  # Huella de 64 bits por fila, calculada columna a columna
+
+        self.numeric_columns = df.select_dtypes(include=np.number).columns
+        self.text_columns = df.columns.difference(self.numeric_columns, sort=False)
+        # Las mismas columnas de texto que rellena clean_data
+        self.fill_columns = df.select_dtypes(include=TEXT_DTYPES + ['category']).columns
+        null_counts = {}
+        cardinality = {}
+        self.modes = {}
+
+        # Columnas numéricas: un bloque float64 (una fila por columna) ordenado una sola vez
+        block = np.empty((len(self.numeric_columns), self.rows), dtype=np.float64)
+        for i, col in enumerate(self.numeric_columns):
+            block[i] = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        missing = np.isnan(block)
+        counts = self.rows - missing.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # Sumas en el orden original, como nanops, para que la media coincida con DataFrame.mean()
+            total = np.where(missing, 0, block).sum(axis=1)
+            mean = np.where(counts > 0, total / counts, np.nan)
+            squares = np.where(missing, 0, block - mean[:, None]) ** 2
+            std = np.where(counts > 1, np.sqrt(squares.sum(axis=1) / (counts - 1)), np.nan)
+        del squares
+        block.sort(axis=1)  # Los NaN quedan al final de cada fila
+
+        index = self.numeric_columns
+        self.count = pd.Series(counts, index=index)
+        self.mean = pd.Series(mean, index=index)
+        self.std = pd.Series(std, index=index)
+        self.minimum = pd.Series(sorted_quantile(block, counts, 0.0), index=index)
+        self.q1 = pd.Series(sorted_quantile(block, counts, 0.25), index=index)
+        self.median = pd.Series(sorted_quantile(block, counts, 0.5), index=index)
+        self.q3 = pd.Series(sorted_quantile(block, counts, 0.75), index=index)
+        self.maximum = pd.Series(sorted_quantile(block, counts, 1.0), index=index)
+
+        iqr = self.q3.to_numpy() - self.q1.to_numpy()
+        lower = (self.q1.to_numpy() - 1.5 * iqr)[:, None]
+        upper = (self.q3.to_numpy() + 1.5 * iqr)[:, None]
+        self.outlier_counts = pd.Series(((block < lower) | (block > upper)).sum(axis=1), index=index)
+
+        # Valores distintos: posiciones donde cambia el valor dentro de la parte válida de cada fila
+        if self.rows > 1:
+            changes = (np.diff(block, axis=1) != 0) & (np.arange(self.rows - 1) < (counts - 1)[:, None])
+            distinct = changes.sum(axis=1) + (counts > 0)
+        else:
+            distinct = counts.copy()
+        null_counts.update(zip(index, self.rows - counts))
+        cardinality.update(zip(index, distinct))
+        del block
+
+        # Columnas de texto (y demás no numéricas): una factorización por columna da nulos, cardinalidad y moda
+        for col in self.text_columns:
+            codes, uniques = pd.factorize(df[col], use_na_sentinel=True)
+            valid = codes[codes >= 0]
+            null_counts[col] = len(codes) - len(valid)
+            cardinality[col] = len(uniques)
+            if len(valid):
+                value_counts = np.bincount(valid, minlength=len(uniques))
+                self.modes[col] = first_mode(uniques[value_counts == value_counts.max()])
+
+        self.null_counts = pd.Series(null_counts, dtype=np.int64).reindex(df.columns)
+        # Las medias del bloque son float64; en columnas de otro tipo (float32 tras optimize_dtypes) clean_data
+        # rellena con la media en el tipo de la columna, así que se calcula igual que DataFrame.mean()
+        self.fill_means = {col: df[col].mean() for col in self.numeric_columns
+                           if self.null_counts[col] > 0 and df[col].dtype != np.float64}
+        self.cardinality = pd.Series(cardinality, dtype=np.int64).reindex(df.columns)
+
+    def __sizeof__(self):
+        # Para el presupuesto de la caché: sys.getsizeof cuenta los arrays y tablas que guarda, no solo el objeto
+        return object.__sizeof__(self) + estimate_size(vars(self))
+
+    @property
+    def duplicate_count(self):
+        return int(self.duplicated.sum())
+
+    @property
+    def missing_count(self):
+        return int(self.null_counts.sum())
+
+    def dtypes_table(self):
+        return pd.DataFrame({
+            'Column': self.columns,
+            'Data Type': self.dtypes.astype(str).to_numpy(),
+            'First 3 Values': [str(self.head[col].tolist()) if self.rows else "N/A" for col in self.columns],
+        })
+
+    def outlier_table(self):
+        percentage = self.outlier_counts / self.rows * 100 if self.rows else self.outlier_counts * 0.0
+        return pd.DataFrame({
+            "Column": self.numeric_columns,
+            "Outliers Count": self.outlier_counts.to_numpy(),
+            "Percentage": [f"{value:.2f}%" for value in percentage],
+        })
+
+    def describe(self):
+        # Mismo formato que DataFrame.describe() para las columnas numéricas
+        return pd.DataFrame({
+            "count": self.count.astype(np.float64), "mean": self.mean, "std": self.std,
+            "min": self.minimum, "25%": self.q1, "50%": self.median, "75%": self.q3, "max": self.maximum,
+        }).T
+
+    def fill_values(self):
+        # Los valores de relleno de clean_data solo coinciden si no hay duplicados que quitar antes
+        if self.duplicate_count:
+            return None
+        values = {col: self.fill_means.get(col, self.mean[col]) for col in self.numeric_columns
+                  if self.null_counts[col] > 0}
+        values.update({col: self.modes[col] for col in self.fill_columns
+                       if self.null_counts[col] > 0 and col in self.modes})
+        return values
@@ -0,0 +1,273 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+
+HEATMAP_ROWS = 200  # Filas del heatmap de nulos: cada una resume un bloque de filas del dataset
+SCATTER_POINTS = 5000  # Por encima de este número de puntos se agregan (hexbin) o se muestrean
+SCATTER_METHODS = ("auto", "points", "hexbin", "sample")
+
+
+# Function to import matplotlib and seaborn the first time a chart is drawn: they are most of the start-up time,
+# and a page that shows no chart never loads them
+@lru_cache(maxsize=None)
+def plotting():
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    sns.set_theme(style="whitegrid")
+    return plt, sns
+
+# Function to split range(n) into at most `bins` contiguous blocks of almost equal size
+def row_blocks(n, bins):
+    return np.unique(np.linspace(0, n, min(bins, n) + 1).astype(int))
+
+# Function to compute the fraction of nulls of every column in each block of rows
+def null_fraction_grid(df, bins=HEATMAP_ROWS):
+    bounds = row_blocks(len(df), bins)
+    sizes = np.diff(bounds)
+    grid = np.empty((len(sizes), df.shape[1]), dtype=np.float64)
+    for j, col in enumerate(df.columns):
+        # Suma acumulada de nulos: el total de cada bloque sale de dos lecturas, sin materializar df.isnull()
+        cumulative = np.concatenate([[0], np.cumsum(df[col].isna().to_numpy())])
+        grid[:, j] = (cumulative[bounds[1:]] - cumulative[bounds[:-1]]) / sizes
+    index = [f"{start:,}–{stop - 1:,}" for start, stop in zip(bounds[:-1], bounds[1:])]
+    return pd.DataFrame(grid, index=index, columns=df.columns)
+
+# Function to pick a sample that keeps points from every occupied region of the plane
+def stratified_sample(x, y, size, bins=50, seed=0):
+    if len(x) <= size:
+        return np.arange(len(x))
+    # Estratos: celdas de una rejilla bins x bins sobre el rango de los datos
+    cx = np.clip(((x - x.min()) / (np.ptp(x) or 1) * bins).astype(int), 0, bins - 1)
+    cy = np.clip(((y - y.min()) / (np.ptp(y) or 1) * bins).astype(int), 0, bins - 1)
+    cells = cx * bins + cy
+    # Máximo de puntos por celda que cabe en el tamaño pedido (búsqueda binaria);
+    # las celdas poco pobladas se quedan con todos los suyos
+    counts = np.bincount(cells, minlength=bins * bins)
+    occupied = counts[counts > 0]
+    low, high = 1, int(occupied.max())
+    while low < high:
+        middle = (low + high + 1) // 2
+        if np.minimum(occupied, middle).sum() <= size:
+            low = middle
+        else:
+            high = middle - 1
+    # Muestreo de Bernoulli por celda: O(n) y sin ordenar los puntos
+    probability = np.minimum(1.0, low / np.maximum(counts, 1))
+    return np.flatnonzero(np.random.default_rng(seed).random(len(x)) < probability[cells])
+
+# Function to draw a histogram and its KDE from a column summary, whose size does not depend on the row count
+def draw_histogram(ax, summary, col, color="blue"):
+    edges, counts = summary.histogram(col)
+    ax.bar(edges[:-1], counts, width=np.diff(edges), align="edge", color=color, alpha=0.5, edgecolor="white")
+    grid, density = summary.kde(col)
+    if len(grid):
+        # Densidad en la escala de las barras, como hace histplot(kde=True)
+        ax.plot(grid, density * counts.sum() * np.diff(edges).mean(), color=color)
+    ax.set_xlabel(col)
+    ax.set_ylabel("Count")
+    return ax
+
+# Function to draw a scatter plot whose cost does not grow with the number of rows drawn
+def draw_scatter(ax, df, x_col, y_col, method="auto", max_points=SCATTER_POINTS, color="blue"):
+    if method not in SCATTER_METHODS:
+        raise ValueError(f"Unknown method '{method}'. Expected one of {SCATTER_METHODS}")
+    # Columna a columna: x e y pueden ser la misma columna
+    x = df[x_col].to_numpy(dtype=np.float64, na_value=np.nan)
+    y = df[y_col].to_numpy(dtype=np.float64, na_value=np.nan)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[valid], y[valid]
+    total = len(x)
+    if method == "auto":
+        method = "points" if total <= max_points else "hexbin"
+
+    if method == "hexbin" and total:
+        # Densidad: un solo PolyCollection en lugar de un marcador por fila
+        collection = ax.hexbin(x, y, gridsize=60, bins="log", mincnt=1, cmap="viridis")
+        ax.figure.colorbar(collection, ax=ax, label="Rows (log scale)")
+        description = f"Density of {total:,} points"
+    else:
+        if method == "sample":
+            index = stratified_sample(x, y, max_points)
+            x, y = x[index], y[index]
+            description = f"Stratified sample of {len(index):,} of {total:,} points"
+        else:
+            description = f"{total:,} points"
+        plotting()[1].scatterplot(x=x, y=y, ax=ax, color=color, alpha=0.7)
+    ax.set_xlabel(x_col)
+    ax.set_ylabel(y_col)
+    return description
+
+
+# Function to build the bar chart of the column data types shown in the overview
+def dtype_chart(dtype_counts):
+    plt, sns = plotting()
+    # Crear figura con mejor resolución y tamaño
+    fig, ax = plt.subplots(figsize=(10, 5), dpi=100)
+
+    # Crear gráfico de barras con estilo mejorado
+    bars = sns.barplot(
+        x='Data Type', 
+        y='Count', 
+        data=dtype_counts, 
+        palette='viridis',
+        ax=ax,
+        edgecolor='black',
+        linewidth=1.5,
+        alpha=0.85
+    )
+
+    # Añadir etiquetas con el conteo en cada barra
+    for i, p in enumerate(bars.patches):
+        count = int(p.get_height())
+        percentage = 100 * count / sum(dtype_counts['Count'])
+        ax.annotate(
+            f'{count}\n({percentage:.1f}%)',
+            (p.get_x() + p.get_width() / 2., p.get_height()),
+            ha='center',
+            va='bottom',
+            fontsize=11,
+            fontweight='bold',
+            color='black'
+        )
+
+    # Personalizar ejes y título
+    ax.set_title('Distribution of Column Data Types', fontsize=16, fontweight='bold', pad=20)
+    ax.set_xlabel('Data Type', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Number of Columns', fontsize=12, fontweight='bold')
+
+    # Mejorar la rejilla
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
+    ax.set_axisbelow(True)
+
+    # Ajustar bordes
+    for spine in ax.spines.values():
+        spine.set_linewidth(1.5)
+
+    # Añadir contexto
+    if len(dtype_counts) > 1:
+        main_type = dtype_counts.iloc[0]['Data Type']
+        plt.figtext(0.5, 0.01, 
+                    f'This dataset primarily contains {main_type} columns ({dtype_counts.iloc[0]["Count"]} columns)', 
+                    ha='center', fontsize=10, fontstyle='italic')
+
+    # Ajuste de diseño
+    plt.tight_layout()
+    return fig
+
+# Function to build the heatmap of the fraction of missing values per block of rows shown in the overview
+def missing_values_chart(null_grid, missing_count, missing_percent, shape):
+    plt, sns = plotting()
+    # Ajustar tamaño según el número de filas y columnas
+    rows, cols = shape
+    figsize = (min(14, max(10, cols * 0.5)), min(10, max(6, rows * 0.02)))
+
+    # Crear figura
+    fig, ax = plt.subplots(figsize=figsize, dpi=100)
+
+    # Crear heatmap con estilo mejorado
+    sns.heatmap(
+        null_grid, 
+        cbar=True,
+        cmap="YlGnBu",  # Cambio de paleta de colores
+        ax=ax,
+        vmin=0,
+        vmax=1,
+        yticklabels=False,  # Ocultar etiquetas de filas para datasets grandes
+        cbar_kws={'label': 'Fraction of Missing Values', 'shrink': 0.8}
+    )
+
+    # Personalizar ejes y título
+    ax.set_title('Heatmap of Missing Values', fontsize=16, fontweight='bold', pad=20)
+    ax.set_xlabel('Columns', fontsize=12, fontweight='bold')
+    ax.set_ylabel(f'Rows (in {len(null_grid)} blocks)', fontsize=12, fontweight='bold')
+
+    # Rotar etiquetas del eje X para mejor legibilidad
+    plt.xticks(rotation=45, ha='right', fontsize=10)
+
+    # Bordes y estructura
+    for spine in ax.spines.values():
+        spine.set_linewidth(1.5)
+        spine.set_color('gray')
+
+    # Añadir información sobre valores nulos
+    if missing_count > 0:
+        plt.figtext(
+            0.5, 0.01, 
+            f'Dataset contains {missing_count:,} missing values ({missing_percent:.2f}% of total)', 
+            ha='center', 
+            fontsize=10, 
+            fontstyle='italic',
+            bbox={'facecolor': 'lightgray', 'alpha': 0.5, 'pad': 5, 'boxstyle': 'round,pad=0.5'}
+        )
+    else:
+        plt.figtext(
+            0.5, 0.01, 
+            'No missing values found in the dataset', 
+            ha='center', 
+            fontsize=10, 
+            fontstyle='italic',
+            color='green',
+            bbox={'facecolor': 'lightgreen', 'alpha': 0.5, 'pad': 5, 'boxstyle': 'round,pad=0.5'}
+        )
+
+    # Ajuste de diseño
+    plt.tight_layout(rect=[0, 0.03, 1, 0.97])  # Dejar espacio para el texto inferior
+    return fig
+
+# Function to build the bar chart of the columns with the most potential outliers shown in the overview
+def outlier_chart(plot_data):
+    plt, sns = plotting()
+    # Crear figura con tamaño adecuado y mejor resolución
+    fig, ax = plt.subplots(figsize=(12, 6), dpi=100)
+
+    # Crear gráfico de barras con estilo mejorado
+    bars = sns.barplot(
+        x='Column', 
+        y='Outliers Count', 
+        data=plot_data, 
+        palette='viridis',  # Paleta de colores más atractiva
+        ax=ax,
+        edgecolor='black',  # Borde negro para mejor definición
+        linewidth=1.5,      # Ancho del borde
+        alpha=0.8           # Transparencia para efecto visual
+    )
+
+    # Añadir etiquetas con el número de outliers y porcentaje
+    for i, p in enumerate(bars.patches):
+        percentage = plot_data.iloc[i]['Percentage']
+        count = int(p.get_height())
+        ax.annotate(
+            f'{count}\n({percentage})',
+            (p.get_x() + p.get_width() / 2., p.get_height()),
+            ha='center',
+            va='bottom',
+            fontsize=11,
+            fontweight='bold',
+            color='black'
+        )
+
+    # Personalizar ejes y título
+    ax.set_title('Top 5 Columns with Most Potential Outliers', fontsize=16, fontweight='bold', pad=20)
+    ax.set_xlabel('Column Name', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Number of Outliers', fontsize=12, fontweight='bold')
+
+    # Mejorar etiquetas del eje X
+    plt.xticks(rotation=45, ha='right', fontsize=10, fontweight='semibold')
+
+    # Personalizar rejilla y fondo
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
+    ax.set_axisbelow(True)  # Poner la rejilla detrás de las barras
+
+    # Bordes y acabado
+    for spine in ax.spines.values():
+        spine.set_linewidth(1.5)
+
+    # Añadir un título descriptivo
+    plt.figtext(0.5, 0.01, 'Columns that may require outlier treatment', 
+                ha='center', fontsize=10, fontstyle='italic')
+
+    # Ajuste de diseño
+    plt.tight_layout()
+    return fig
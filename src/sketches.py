@@ -0,0 +1,114 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+
+# Class implementing a KLL quantile sketch: mergeable, O(n) to build and with bounded memory
+class QuantileSketch:
+    def __init__(self, error=0.01, seed=0):
+        if not 0 < error < 1:
+            raise ValueError("error must be between 0 and 1")
+        self.error = error
+        # Con k elementos en el nivel superior el error de rango queda por debajo de 2.5 / k en la práctica
+        self.k = max(8, math.ceil(2.5 / error))
+        self.levels = [np.empty(0, dtype=np.float64)]
+        self.n = 0
+        self.rng = np.random.default_rng(seed)
+
+    def capacity(self, level):
+        # Los niveles bajos guardan menos elementos (factor 2/3), como en KLL
+        depth = len(self.levels) - 1 - level
+        return max(8, int(self.k * (2 / 3) ** depth))
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        # Ingerir por trozos de tamaño fijo: nunca se ordenan más de 64K elementos a la vez
+        step = max(4 * self.k, 1 << 16)
+        for start in range(0, len(values), step):
+            self.levels[0] = np.concatenate([self.levels[0], values[start:start + step]])
+            self.n += len(values[start:start + step])
+            self.compress()
+        return self
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self.compress()
+        return self
+
+    def compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self.capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype=np.float64))
+                items = np.sort(items)
+                # Compactar: se promociona uno de cada dos elementos con un desplazamiento aleatorio
+                keep = len(items) % 2
+                offset = int(self.rng.integers(2))
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], items[keep + offset::2]])
+                self.levels[level] = items[:keep]
+            level += 1
+
+    def weighted_items(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level_items), 2 ** level, dtype=np.float64)
+                                  for level, level_items in enumerate(self.levels)])
+        return items, weights
+
+    def quantile(self, q):
+        return weighted_quantile(*self.weighted_items(), q)
+
+    def median_absolute_deviation(self, median):
+        # |x - mediana| conserva los pesos, así que la MAD sale del mismo sketch sin otra pasada
+        items, weights = self.weighted_items()
+        return weighted_quantile(np.abs(items - median), weights, 0.5)
+
+    def __len__(self):
+        return sum(len(items) for items in self.levels)
+
+
+# Function to compute a quantile from weighted items
+def weighted_quantile(items, weights, q):
+    if len(items) == 0:
+        return np.nan
+    order = np.argsort(items, kind='stable')
+    cumulative = np.cumsum(weights[order])
+    index = np.searchsorted(cumulative, q * cumulative[-1], side='left')
+    return items[order][min(index, len(items) - 1)]
+
+
+# Function to build one sketch per numeric column
+def sketch_columns(df, error=0.01):
+    numeric_cols = df.select_dtypes(include=np.number).columns
+    return {col: QuantileSketch(error).update(df[col].to_numpy(dtype=np.float64)) for col in numeric_cols}
+
+# Function to merge per-chunk or per-partition sketches column by column
+def merge_sketches(left, right):
+    for col, sketch in right.items():
+        if col in left:
+            left[col].merge(sketch)
+        else:
+            left[col] = sketch
+    return left
+
+# Function to get approximate median and MAD per column from the sketches
+def approximate_median_mad(sketches, nulls=None):
+    median = pd.Series({col: sketch.quantile(0.5) for col, sketch in sketches.items()}, dtype=np.float64)
+    # Como np.median en la versión exacta, una columna con nulos tiene MAD NaN
+    mad = pd.Series({col: np.nan if nulls is not None and nulls[col] > 0 else
+                     sketch.median_absolute_deviation(median[col]) for col, sketch in sketches.items()},
+                    dtype=np.float64)
+    return median, mad
+
+# Function to get approximate first and third quartiles per column from the sketches
+def approximate_quartiles(sketches):
+    q1 = pd.Series({col: sketch.quantile(0.25) for col, sketch in sketches.items()}, dtype=np.float64)
+    q3 = pd.Series({col: sketch.quantile(0.75) for col, sketch in sketches.items()}, dtype=np.float64)
+    return q1, q3
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+try:
+    from .cache import chain_key
+except ImportError:  # Ejecutado como script desde src/ (streamlit run src/app.py)
+    from cache import chain_key
+
+
+# Function to turn a column into numbers that numpy orders like sort_values(ascending, na_position="last")
+def sort_key(column, ascending=True):
+    dtype = column.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind in "iub":
+        values = column.to_numpy().astype(np.int64)
+        return values if ascending else ~values  # ~x = -x - 1: invierte el orden sin desbordar
+    if isinstance(dtype, np.dtype) and dtype.kind == "f":
+        values = column.to_numpy(dtype=np.float64)
+        return values if ascending else -values  # Los NaN quedan al final en los dos sentidos
+    # Texto, categorías y tipos con pd.NA: códigos en el orden de los valores, con los nulos detrás de todos
+    codes, uniques = pd.factorize(column, sort=True, use_na_sentinel=True)
+    if not ascending:
+        codes = np.where(codes >= 0, len(uniques) - 1 - codes, codes)
+    return np.where(codes >= 0, codes, len(uniques))
+
+# Function to normalize a sort to a list of columns and a list with the order of each one
+def sort_spec(by, ascending=True):
+    by = [by] if isinstance(by, str) else list(by)
+    ascending = [bool(ascending)] * len(by) if isinstance(ascending, (bool, np.bool_)) else [bool(a) for a in ascending]
+    if not by:
+        raise ValueError("Choose at least one column to sort by")
+    if len(ascending) != len(by):
+        raise ValueError(f"Give one sort order per sort column ({len(by)} columns, {len(ascending)} orders)")
+    return by, ascending
+
+# Function to get the keys of a sort by one or more columns, each with its own order
+def sort_keys(df, by, ascending=True):
+    by, ascending = sort_spec(by, ascending)
+    missing = [col for col in by if col not in df.columns]
+    if missing:
+        raise ValueError(f"Unknown columns to sort by: {missing}")
+    return [sort_key(df[col], asc) for col, asc in zip(by, ascending)]
+
+# Function to order some rows by their keys (the first key decides first); np.lexsort is stable
+def order_rows(keys, rows=None):
+    keys = keys if rows is None else [key[rows] for key in keys]
+    order = np.lexsort(keys[::-1]) if len(keys) > 1 else np.argsort(keys[0], kind="stable")
+    return order if rows is None else rows[order]
+
+# Function to get the positions of the rows in sorted order, like sort_values(kind="stable", na_position="last")
+def sort_positions(df, by, ascending=True, limit=None):
+    keys = sort_keys(df, by, ascending)
+    if limit is None or limit >= len(df):
+        return order_rows(keys)
+    if limit <= 0:
+        return np.zeros(0, dtype=np.intp)
+    # Top-N: selección parcial O(n) del valor que ocupa el puesto N en la primera clave, y solo las filas que
+    # empatan o quedan por delante se ordenan del todo (los empates deciden con las demás claves y la posición)
+    first = keys[0]
+    threshold = np.partition(first, limit - 1)[limit - 1]
+    if isinstance(threshold, float) and np.isnan(threshold):
+        return order_rows(keys)[:limit]  # Faltan valores: los nulos también entran
+    rows = np.flatnonzero(first <= threshold)
+    return order_rows(keys, rows)[:limit]
+
+# Function to get the cache key of a sort order of some data
+def order_key(key, by, ascending=True, limit=None):
+    by, ascending = sort_spec(by, ascending)
+    return chain_key(key, "sort_order", tuple(by), tuple(ascending), limit)
+
+# Function to get the sorted positions of some data, from the cache when the data has a key
+def sort_order(df, by, ascending=True, limit=None, cache=None, key=None):
+    if cache is None or key is None:
+        return sort_positions(df, by, ascending, limit)
+    # Con el orden completo ya guardado, las N primeras filas son un corte de él
+    full = cache.get(order_key(key, by, ascending))
+    if full is not None:
+        return full if limit is None else full[:max(limit, 0)]
+    return cache.get_or_compute(order_key(key, by, ascending, limit), lambda: sort_positions(df, by, ascending, limit))
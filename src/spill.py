@@ -0,0 +1,139 @@
+import atexit
+import json
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+
+DEFAULT_SPILL_MB = int(os.environ.get("CLEANLY_SPILL_MB", "4096"))
+INDEX_COLUMN = "__index__"
+METADATA_KEY = b"cleanly"
+
+
+# Function to tell whether a column is backed by a plain numpy array that Arrow can hold without copying
+def plain_numeric(column):
+    return isinstance(column.dtype, np.dtype) and column.dtype.kind in "iufb"
+
+# Function to convert a column to Arrow; numpy numbers are kept as they are (NaN stays NaN, not null), so they
+# come back from the memory map as numpy views of the file
+def to_arrow(column):
+    if plain_numeric(column):
+        return pa.array(column.to_numpy())
+    return pa.Array.from_pandas(column)
+
+# Function to tell whether a frame can be spilled: text column names (Arrow needs them) without repeats
+def can_spill(df):
+    return (isinstance(df, pd.DataFrame) and all(isinstance(col, str) for col in df.columns)
+            and df.columns.is_unique and INDEX_COLUMN not in df.columns
+            and (isinstance(df.index, pd.RangeIndex) or plain_numeric(df.index.to_series())))
+
+# Function to write a frame as an uncompressed Arrow IPC file, with what to_pandas needs to rebuild it exactly
+def write_frame(df, path):
+    arrays = {col: to_arrow(df[col]) for col in df.columns}
+    meta = {"dtypes": {col: str(df[col].dtype) for col in df.columns}, "index_name": df.index.name}
+    if isinstance(df.index, pd.RangeIndex):
+        meta["range"] = [df.index.start, df.index.stop, df.index.step]
+    else:
+        arrays[INDEX_COLUMN] = pa.array(df.index.to_numpy())
+    table = pa.table(arrays).replace_schema_metadata({METADATA_KEY: json.dumps(meta)})
+    with pa.OSFile(path, "wb") as file:
+        with pa.ipc.new_file(file, table.schema) as writer:
+            writer.write_table(table)
+    return os.path.getsize(path)
+
+# Function to read a frame back through a memory map: numeric columns are read-only views of the file, so the
+# operating system pages them in when they are used and can drop them again under memory pressure
+def read_frame(path):
+    table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    meta = json.loads(table.schema.metadata[METADATA_KEY])
+    df = table.to_pandas(split_blocks=True)
+    if INDEX_COLUMN in df.columns:
+        df = df.set_index(INDEX_COLUMN)
+    else:
+        df.index = pd.RangeIndex(*meta["range"])
+    df.index.name = meta["index_name"]
+    # Tipos que Arrow no distingue al volver (Int64 con nulos, boolean...): se restauran, solo esas columnas se copian
+    changed = {col: dtype for col, dtype in meta["dtypes"].items()
+               if str(df[col].dtype) != dtype and dtype != "category"}
+    return df.astype(changed) if changed else df
+
+
+# Class keeping spilled frames as files in a scratch directory, dropping the oldest once it exceeds its disk budget
+class SpillStore:
+    def __init__(self, directory=None, budget_mb=DEFAULT_SPILL_MB):
+        self.owned = directory is None
+        self.directory = directory or tempfile.mkdtemp(prefix="cleanly-spill-")
+        os.makedirs(self.directory, exist_ok=True)
+        self.budget = int(budget_mb * 1024 * 1024)
+        self.files = {}  # key -> (ruta, bytes en disco), en orden de escritura
+        self.used = 0
+        self.lock = threading.Lock()
+        if self.owned:
+            atexit.register(self.close)
+
+    def write(self, key, df):
+        # Devuelve False si el frame no se puede volcar o no cabe en el presupuesto de disco
+        if not can_spill(df):
+            return False
+        path = os.path.join(self.directory, f"{uuid.uuid4().hex}.arrow")
+        try:
+            size = write_frame(df, path)
+        except (pa.ArrowException, OSError, TypeError, ValueError):
+            if os.path.exists(path):
+                os.remove(path)
+            return False
+        with self.lock:
+            self.remove_locked(key)
+            if size > self.budget:
+                os.remove(path)
+                return False
+            self.files[key] = (path, size)
+            self.used += size
+            while self.used > self.budget:
+                self.remove_locked(next(iter(self.files)))
+        return True
+
+    def read(self, key):
+        with self.lock:
+            entry = self.files.get(key)
+        if entry is None:
+            return None
+        try:
+            return read_frame(entry[0])
+        except (FileNotFoundError, pa.ArrowException):
+            return None  # Borrado entre la consulta y la lectura
+
+    def remove(self, key):
+        with self.lock:
+            self.remove_locked(key)
+
+    def remove_locked(self, key):
+        entry = self.files.pop(key, None)
+        if entry is not None:
+            self.used -= entry[1]
+            # En Linux un fichero borrado sigue legible mientras algún frame lo tenga mapeado
+            try:
+                os.remove(entry[0])
+            except FileNotFoundError:
+                pass
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.files
+
+    def keys(self):
+        with self.lock:
+            return list(self.files)
+
+    def close(self):
+        with self.lock:
+            self.files.clear()
+            self.used = 0
+        if self.owned:
+            shutil.rmtree(self.directory, ignore_errors=True)
@@ -0,0 +1,257 @@
+import argparse
+import math
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .dedup import FingerprintSet, drop_seen_rows, row_fingerprints
+    from .limpiar import TEXT_DTYPES, clean_data, first_mode, remove_outliers, remove_outliers_iqr
+    from .sketches import approximate_median_mad, approximate_quartiles, merge_sketches, sketch_columns
+except ImportError:  # Ejecutado como script desde src/ (streamlit run src/app.py)
+    from dedup import FingerprintSet, drop_seen_rows, row_fingerprints
+    from limpiar import TEXT_DTYPES, clean_data, first_mode, remove_outliers, remove_outliers_iqr
+    from sketches import approximate_median_mad, approximate_quartiles, merge_sketches, sketch_columns
+
+
+STEPS = ("clean", "zscore", "iqr")
+# Valores distintos por columna hasta los que los pasos de outliers cuentan valores exactos (~16 bytes cada uno);
+# por encima, la columna pasa a usar solo su sketch KLL y la memoria deja de crecer con el fichero
+EXACT_LIMIT = 100_000
+
+
+# Function to merge two value-count Series (exact and mergeable across chunks)
+def merge_counts(left, right):
+    if left is None:
+        return right
+    return pd.concat([left, right]).groupby(level=0, sort=False).sum()
+
+# Function to compute a quantile from sorted values and counts, like np.quantile(method='linear')
+def quantile_from_counts(counts, q):
+    counts = counts.sort_index()
+    values = counts.index.to_numpy(dtype=np.float64)
+    cumulative = np.cumsum(counts.to_numpy())
+    n = cumulative[-1]
+    position = q * (n - 1)
+    previous = math.floor(position)
+    gamma = position - previous
+    a = values[np.searchsorted(cumulative, previous, side='right')]
+    b = values[np.searchsorted(cumulative, min(previous + 1, n - 1), side='right')]
+    # Misma interpolación que numpy (_lerp) para obtener resultados idénticos
+    diff = b - a
+    return b - diff * (1 - gamma) if gamma >= 0.5 else a + diff * gamma
+
+# Function to compute a median from value counts, like np.median
+def median_from_counts(counts):
+    counts = counts.sort_index()
+    values = counts.index.to_numpy(dtype=np.float64)
+    cumulative = np.cumsum(counts.to_numpy())
+    n = cumulative[-1]
+    a = values[np.searchsorted(cumulative, (n - 1) // 2, side='right')]
+    b = values[np.searchsorted(cumulative, n // 2, side='right')]
+    return (a + b) / 2
+
+# Function to compute the MAD around a median from value counts
+def mad_from_counts(counts, median):
+    deviations = pd.Series(counts.to_numpy(), index=np.abs(counts.index.to_numpy(dtype=np.float64) - median))
+    return median_from_counts(deviations.groupby(level=0).sum())
+
+
+# Class to accumulate, chunk by chunk, the statistics one cleaning step needs
+# For the outlier steps, approximate=None (the default) counts values exactly while a column has at most
+# exact_limit distinct values and then uses a KLL sketch for it; True always uses sketches and False always counts
+# exactly (memory grows with the number of distinct values)
+class StepStatistics:
+    def __init__(self, step, approximate=None, error=0.01, exact_limit=EXACT_LIMIT):
+        if step not in STEPS:
+            raise ValueError(f"Unknown step '{step}'. Expected one of {STEPS}")
+        self.step = step
+        self.nulls = None
+        self.sums = None
+        self.counts = {}
+        self.approximate = approximate if step != "clean" else False
+        self.error = error
+        self.exact_limit = exact_limit
+        self.sketches = {}
+        self.overflowed = set()  # Columnas con demasiados valores distintos para contarlos
+
+    def update(self, chunk):
+        numeric_cols = chunk.select_dtypes(include=np.number).columns
+        nulls = chunk.isna().sum()
+        self.nulls = nulls if self.nulls is None else self.nulls.add(nulls, fill_value=0)
+
+        if self.step == "clean":
+            # Medias exactas a partir de sumas y conteos; modas a partir de conteos de valores
+            sums = chunk[numeric_cols].sum()
+            self.sums = sums if self.sums is None else self.sums.add(sums, fill_value=0)
+            columns = chunk.select_dtypes(include=TEXT_DTYPES).columns
+        else:
+            if self.approximate is not False:
+                # El sketch se construye siempre en modo automático: no se puede rehacer con los bloques ya leídos
+                merge_sketches(self.sketches, sketch_columns(chunk[numeric_cols], self.error))
+            if self.approximate:
+                return
+            columns = [col for col in numeric_cols if col not in self.overflowed]
+        for col in columns:
+            self.counts[col] = merge_counts(self.counts.get(col), chunk[col].value_counts())
+            if self.approximate is None and self.step != "clean" and len(self.counts[col]) > self.exact_limit:
+                del self.counts[col]
+                self.overflowed.add(col)
+
+    def finish(self, rows, schema):
+        # Devuelve los argumentos con los que aplicar el paso de limpieza a cada bloque
+        if self.step == "clean":
+            values = {}
+            for col in self.sums.index:
+                non_null = rows - self.nulls[col]
+                if schema.get(col) != "text" and self.nulls[col] > 0 and non_null > 0:
+                    values[col] = self.sums[col] / non_null
+            for col, counts in self.counts.items():
+                if self.nulls[col] > 0 and len(counts) > 0:
+                    values[col] = first_mode(counts.index[counts.to_numpy() == counts.max()])
+            return {"values": values}
+
+        # Columnas con sketch (todas con approximate=True; las que pasaron de exact_limit en modo automático)
+        sketches = {col: sketch for col, sketch in self.sketches.items()
+                    if schema.get(col) != "text" and (self.approximate or col in self.overflowed)}
+        if self.step == "zscore":
+            median, mad = approximate_median_mad(sketches, self.nulls)
+            exact = self.exact_statistics(schema)
+            return {"median": pd.concat([exact["median"], median]), "mad": pd.concat([exact["mad"], mad])}
+        q1, q3 = approximate_quartiles(sketches)
+        exact = self.exact_statistics(schema)
+        return {"q1": pd.concat([exact["q1"], q1]), "q3": pd.concat([exact["q3"], q3])}
+
+    def exact_statistics(self, schema):
+        columns = [col for col in self.counts if schema.get(col) != "text"]
+        empty = {col: len(self.counts[col]) == 0 for col in columns}
+        if self.step == "zscore":
+            median = pd.Series({col: np.nan if empty[col] else median_from_counts(self.counts[col])
+                                for col in columns}, dtype=np.float64)
+            # Como np.median, una columna con nulos tiene MAD NaN y nunca marca outliers
+            mad = pd.Series({col: np.nan if self.nulls[col] > 0 else mad_from_counts(self.counts[col], median[col])
+                             for col in columns}, dtype=np.float64)
+            return {"median": median, "mad": mad}
+        q1 = pd.Series({col: np.nan if empty[col] else quantile_from_counts(self.counts[col], 0.25)
+                        for col in columns}, dtype=np.float64)
+        q3 = pd.Series({col: np.nan if empty[col] else quantile_from_counts(self.counts[col], 0.75)
+                        for col in columns}, dtype=np.float64)
+        return {"q1": q1, "q3": q3}
+
+
+# Function to apply already-fitted steps to one chunk
+def apply_steps(chunk, steps, fitted, seen, z_thresh=3, key_columns=None):
+    for i, (step, kwargs) in enumerate(zip(steps, fitted)):
+        if step == "clean":
+            # Los duplicados se buscan contra las huellas de todos los bloques anteriores (cross-chunk drop_duplicates)
+            keep = seen[i].add_new(row_fingerprints(chunk, key_columns, seen[i].bits))
+            chunk = clean_data(chunk, duplicated=~keep, **kwargs)
+        elif step == "zscore":
+            chunk = remove_outliers(chunk, z_thresh=z_thresh, **kwargs)
+        else:
+            chunk = remove_outliers_iqr(chunk, **kwargs)
+    return chunk
+
+
+# Function to check the column types of one chunk against the schema seen so far
+def update_schema(schema, chunk):
+    for col in chunk.columns:
+        if chunk[col].isna().all():
+            continue  # Un bloque vacío no dice nada del tipo real de la columna
+        kind = "numeric" if pd.api.types.is_numeric_dtype(chunk[col]) else "text"
+        if pd.api.types.is_float_dtype(chunk[col]):
+            kind = "float"
+        previous = schema.get(col)
+        if previous is None or previous == kind or {previous, kind} == {"numeric", "float"}:
+            schema[col] = "float" if "float" in (previous, kind) else kind
+        else:
+            raise ValueError(f"Column '{col}' mixes numeric and text values across chunks. "
+                             f"Pass dtype={{'{col}': str}} to read it as text.")
+
+# Function to give a chunk the same column types as the whole file
+def conform_chunk(chunk, schema):
+    # Una columna de texto vacía en este bloque se lee como float; devolverla a texto
+    text_cols = [col for col, kind in schema.items() if kind == "text" and pd.api.types.is_numeric_dtype(chunk[col])]
+    return chunk.astype({col: object for col in text_cols}) if text_cols else chunk
+
+
+# Function to clean a CSV larger than memory, chunk by chunk, writing straight to the output file
+def clean_csv_in_chunks(source, destination, steps=("clean",), chunksize=100_000, z_thresh=3, dtype=None,
+                        approximate=None, error=0.01, key_columns=None, bits=64, seen_path=None,
+                        exact_limit=EXACT_LIMIT):
+    steps = list(steps)
+    for step in steps:
+        if step not in STEPS:
+            raise ValueError(f"Unknown step '{step}'. Expected one of {STEPS}")
+    # Huellas de ejecuciones anteriores (subidas previas del mismo feed): esas filas también son duplicados
+    previous = FingerprintSet.load(seen_path, bits) if seen_path else FingerprintSet(bits)
+
+    # Una pasada por paso: las estadísticas de cada paso se calculan sobre la salida de los anteriores
+    schema, fitted, rows_in = {}, [], 0
+    for i, step in enumerate(steps):
+        stats, rows, seen = StepStatistics(step, approximate, error, exact_limit), 0, [previous.copy() for _ in steps]
+        for chunk in pd.read_csv(source, chunksize=chunksize, dtype=dtype):
+            if i == 0:
+                update_schema(schema, chunk)
+                rows_in += len(chunk)
+            chunk = apply_steps(conform_chunk(chunk, schema), steps[:i], fitted, seen, z_thresh, key_columns)
+            if step == "clean":
+                chunk = drop_seen_rows(chunk, seen[i], key_columns)
+            stats.update(chunk)
+            rows += len(chunk)
+        fitted.append(stats.finish(rows, schema))
+
+    # Pasada final: aplicar todos los pasos y escribir cada bloque directamente al fichero de salida
+    float_cols = [col for col, kind in schema.items() if kind == "float"]
+    seen, rows_out, header = [previous.copy() for _ in steps], 0, True
+    for chunk in pd.read_csv(source, chunksize=chunksize, dtype=dtype):
+        if not steps:
+            update_schema(schema, chunk)
+            rows_in += len(chunk)
+        chunk = apply_steps(conform_chunk(chunk, schema), steps, fitted, seen, z_thresh, key_columns)
+        # Mismos tipos que tendría la columna leyendo el fichero entero de una vez
+        chunk = chunk.astype({col: np.float64 for col in float_cols if col in chunk.columns})
+        chunk.to_csv(destination, mode='w' if header else 'a', header=header, index=False)
+        header = False
+        rows_out += len(chunk)
+
+    if header:
+        # Fichero sin filas: escribir al menos la cabecera
+        pd.read_csv(source, nrows=0, dtype=dtype).to_csv(destination, index=False)
+
+    if seen_path and "clean" in steps:
+        # Guardar las huellas de las filas que ha dejado pasar el primer paso de limpieza
+        seen[steps.index("clean")].save(seen_path)
+
+    return {"rows_in": rows_in, "rows_out": rows_out, "passes": len(steps) + 1}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Clean a large CSV file in chunks")
+    parser.add_argument("source")
+    parser.add_argument("destination")
+    parser.add_argument("--steps", nargs="+", choices=STEPS, default=["clean"])
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    parser.add_argument("--z-thresh", type=float, default=3)
+    # Memoria de los pasos de outliers: por defecto, conteos exactos hasta --exact-limit valores distintos por
+    # columna y después un sketch de tamaño fijo, así que no crece con el fichero
+    precision = parser.add_mutually_exclusive_group()
+    precision.add_argument("--approximate", action="store_const", const=True, dest="approximate",
+                           help="use quantile sketches for every column in the outlier steps (fixed memory, "
+                                "approximate thresholds)")
+    precision.add_argument("--exact", action="store_const", const=False, dest="approximate",
+                           help="count every distinct value in the outlier steps (exact thresholds, memory grows "
+                                "with the number of distinct values)")
+    parser.add_argument("--exact-limit", type=int, default=EXACT_LIMIT,
+                        help="by default, distinct values per column counted exactly before switching that "
+                             "column to a sketch (about 16 bytes each)")
+    parser.add_argument("--error", type=float, default=0.01, help="rank error bound of the quantile sketches")
+    parser.add_argument("--keys", nargs="+", help="columns that identify a duplicate row (default: all columns)")
+    parser.add_argument("--bits", type=int, choices=(64, 128), default=64, help="size of the row fingerprints")
+    parser.add_argument("--seen-file", help="fingerprint file shared by successive runs; rows already in it are dropped")
+    args = parser.parse_args()
+
+    summary = clean_csv_in_chunks(args.source, args.destination, args.steps, args.chunksize, args.z_thresh,
+                                  approximate=args.approximate, error=args.error, key_columns=args.keys,
+                                  bits=args.bits, seen_path=args.seen_file, exact_limit=args.exact_limit)
+    print(f"Rows read: {summary['rows_in']}, rows written: {summary['rows_out']} ({summary['passes']} passes)")
@@ -0,0 +1,206 @@
+import copy
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .cache import chain_key, estimate_size
+except ImportError:  # Ejecutado como script desde src/ (streamlit run src/app.py)
+    from cache import chain_key, estimate_size
+
+
+HISTOGRAM_BINS = 20  # Barras que se dibujan, como sns.histplot(bins=20)
+FINE_BINS = 400  # Cubetas guardadas: la KDE y las barras salen de ellas, y siguen valiendo tras filtrar filas
+REBIN_SPAN = FINE_BINS // 2  # Si los datos ocupan menos cubetas que estas (p. ej. tras quitar un extremo), se rehacen
+KDE_POINTS = 200
+FEW_VALUES = 20  # Columnas numéricas con tan pocos valores distintos se dibujan también como barras
+VALUE_COUNT_LIMIT = 10_000  # Con más valores distintos solo se guardan los más frecuentes
+ROW_FILTERS = ("filter", "zscore", "iqr")
+
+
+# Function to count the values of a column, most frequent first, nulls excluded
+def count_values(column):
+    codes, uniques = pd.factorize(column, use_na_sentinel=True)
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    order = np.argsort(-counts, kind="stable")  # Empates en orden de aparición
+    return pd.Series(counts[order], index=pd.Index(uniques, name=column.name).take(order), name="count")
+
+# Function to add (sign=1) or remove (sign=-1) some value counts from others, keeping the most frequent first
+def merge_value_counts(counts, other, sign=1):
+    merged = counts.add(sign * other, fill_value=0).astype(np.int64)
+    merged = merged[merged > 0]
+    return merged.iloc[np.argsort(-merged.to_numpy(), kind="stable")]
+
+
+# Class holding compact summaries of every column (fixed-bin histograms and value counts), built in one pass when
+# the data loads and then updated from the rows each step removes or fills, instead of from all the rows again
+class FrameSummary:
+    def __init__(self, df):
+        self.rows = len(df)
+        self.histograms = {}  # Columna numérica -> (mínimo, máximo, cuentas de FINE_BINS cubetas fijas)
+        self.counts = {}  # Columna -> cuentas de valores, o None si una columna numérica tiene demasiados valores
+        self.complete = {}  # False si solo se guardaron los VALUE_COUNT_LIMIT valores más frecuentes
+        self.distinct = {}
+        self.nulls = {}
+        self.numeric_columns = list(df.select_dtypes(include=np.number).columns)
+        for col in df.columns:
+            self.build_column(df, col)
+
+    def __sizeof__(self):
+        # Para el presupuesto de la caché: sys.getsizeof cuenta los arrays y tablas que guarda, no solo el objeto
+        return object.__sizeof__(self) + estimate_size(vars(self))
+
+    @property
+    def columns(self):
+        return list(self.nulls)
+
+    def build_column(self, df, col):
+        column = df[col]
+        self.nulls[col] = int(column.isna().sum())
+        if col in self.numeric_columns:
+            self.build_histogram(col, column)
+            # Más cubetas ocupadas que FEW_VALUES implica más valores distintos: no hace falta contarlos
+            if np.count_nonzero(self.histograms[col][2]) > FEW_VALUES:
+                self.counts[col], self.complete[col], self.distinct[col] = None, False, None
+                return
+        counts = count_values(column)
+        self.distinct[col] = len(counts)
+        if col in self.numeric_columns and len(counts) > FEW_VALUES:
+            counts = None
+        self.complete[col] = counts is not None and len(counts) <= VALUE_COUNT_LIMIT
+        self.counts[col] = counts.iloc[:VALUE_COUNT_LIMIT] if counts is not None else None
+
+    def build_histogram(self, col, column):
+        values = column.to_numpy(dtype=np.float64, na_value=np.nan)
+        values = values[np.isfinite(values)]
+        low, high = (float(values.min()), float(values.max())) if len(values) else (0.0, 0.0)
+        if low == high:
+            low, high = low - 0.5, high + 0.5  # Como np.histogram con un solo valor
+        self.histograms[col] = (low, high, np.histogram(values, FINE_BINS, (low, high))[0])
+
+    def occupied_span(self, col):
+        occupied = np.flatnonzero(self.histograms[col][2])
+        return occupied[-1] + 1 - occupied[0] if len(occupied) else 0
+
+    def copy(self):
+        result = copy.copy(self)
+        for name in ("histograms", "counts", "complete", "distinct", "nulls"):
+            setattr(result, name, dict(getattr(self, name)))
+        result.numeric_columns = list(self.numeric_columns)
+        return result
+
+    def histogram(self, col, bins=HISTOGRAM_BINS):
+        # Barras sobre el rango que ocupan ahora los datos (tras un filtro, solo una parte de las cubetas fijas)
+        low, high, fine = self.histograms[col]
+        edges = np.linspace(low, high, FINE_BINS + 1)
+        occupied = np.flatnonzero(fine)
+        if not len(occupied):
+            return edges[[0, -1]], np.zeros(1, dtype=np.int64)
+        first, last = occupied[0], occupied[-1] + 1
+        groups = np.unique(np.linspace(first, last, min(bins, last - first) + 1).round().astype(int))
+        return edges[groups], np.add.reduceat(fine, groups[:-1])
+
+    def kde(self, col, points=KDE_POINTS):
+        # KDE gaussiana sobre los centros de las cubetas pesados por sus cuentas: O(cubetas x puntos), no O(filas)
+        low, high, fine = self.histograms[col]
+        edges = np.linspace(low, high, FINE_BINS + 1)
+        centers = (edges[:-1] + edges[1:]) / 2
+        total = fine.sum()
+        if total < 2:
+            return np.zeros(0), np.zeros(0)
+        mean = np.average(centers, weights=fine)
+        std = np.sqrt(np.average((centers - mean) ** 2, weights=fine))
+        bandwidth = max(std * total ** (-1 / 5), edges[1] - edges[0])  # Regla de Scott, como gaussian_kde
+        occupied = np.flatnonzero(fine)
+        grid = np.linspace(edges[occupied[0]], edges[occupied[-1] + 1], points)
+        weights = fine[occupied] / total
+        distances = (grid[:, None] - centers[occupied][None, :]) / bandwidth
+        density = (np.exp(-0.5 * distances ** 2) @ weights) / (bandwidth * np.sqrt(2 * np.pi))
+        return grid, density
+
+    def value_counts(self, col):
+        return self.counts.get(col)
+
+    def without(self, columns):
+        result = self.copy()
+        for col in columns:
+            for name in ("histograms", "counts", "complete", "distinct", "nulls"):
+                getattr(result, name).pop(col, None)
+        result.numeric_columns = [col for col in self.numeric_columns if col not in columns]
+        return result
+
+    def renamed(self, old, new):
+        result = self.copy()
+        for name in ("histograms", "counts", "complete", "distinct", "nulls"):
+            # Mismo orden de columnas que el DataFrame renombrado
+            setattr(result, name, {new if col == old else col: value for col, value in getattr(self, name).items()})
+        if result.counts.get(new) is not None:
+            result.counts[new] = result.counts[new].rename_axis(new)
+        result.numeric_columns = [new if col == old else col for col in self.numeric_columns]
+        return result
+
+    def changed(self, col, column, sign):
+        # Sumar (sign=1) o restar (sign=-1) unas filas de una columna; False si hay que reconstruirla
+        self.nulls[col] += sign * int(column.isna().sum())
+        if col in self.histograms:
+            low, high, fine = self.histograms[col]
+            values = column.to_numpy(dtype=np.float64, na_value=np.nan)
+            values = values[np.isfinite(values)]
+            if len(values) and (values.min() < low or values.max() > high):
+                return False  # Un valor fuera de las cubetas fijas
+            self.histograms[col] = (low, high, fine + sign * np.histogram(values, FINE_BINS, (low, high))[0])
+        if self.counts[col] is None:
+            return True  # Columna numérica con muchos valores: no se cuentan
+        if not self.complete[col]:
+            return False  # Con las cuentas truncadas, un valor fuera de la lista podría pasar a ser de los frecuentes
+        self.counts[col] = merge_value_counts(self.counts[col], count_values(column), sign)
+        self.distinct[col] = len(self.counts[col])
+        if col in self.numeric_columns and self.distinct[col] > FEW_VALUES:
+            self.counts[col] = self.distinct[col] = None
+        return True
+
+    def updated(self, before, after, kept, filled=False):
+        # Resumen de `after` a partir de las filas que el paso quitó (before[~kept]) y, si rellenó nulos, de los
+        # valores que ocupan su lugar: el resto de filas no se lee
+        result = self.copy()
+        result.rows = len(after)
+        removed = before[~kept]
+        for col in after.columns:
+            exact = result.changed(col, removed[col], -1) if len(removed) else True
+            if exact and filled and result.nulls[col]:
+                values = after[col][before[col].isna().to_numpy()[kept]]
+                result.nulls[col] -= len(values)
+                exact = result.changed(col, values, 1)
+            if not exact:
+                result.build_column(after, col)
+            elif col in result.histograms and 0 < result.occupied_span(col) < REBIN_SPAN:
+                # Las cubetas fijas cubren sobre todo el rango que ya no existe: las barras perderían resolución
+                result.build_histogram(col, after[col])
+        return result
+
+
+# Function to derive the summary of a step's output from the summary of its input, reading as few rows as possible
+def derive_summary(summary, step, before, after):
+    if step.kind == "sort" and step.params.get("limit") is None:
+        return summary  # Mismos valores en otro orden
+    if step.kind == "delete":
+        return summary.without(step.params["columns"])
+    if step.kind == "rename":
+        return summary.renamed(step.params["old"], step.params["new"])
+    if step.kind in ROW_FILTERS + ("clean",) and before.index.is_unique and list(before.columns) == list(after.columns):
+        # Estos pasos solo quitan filas (y la limpieza rellena nulos), conservando el orden y las etiquetas
+        kept = before.index.isin(after.index)
+        if len(before) - len(after) <= len(after):
+            return summary.updated(before, after, kept, filled=step.kind == "clean")
+    # Normalizar y codificar reescriben los valores: se resume el resultado de nuevo
+    return FrameSummary(after)
+
+# Function to get the cache key of the summary of some data
+def summary_key(key):
+    return chain_key(key, "summary")
+
+# Function to get the summary of some data, from the cache when the input has a key
+def frame_summary(df, cache=None, key=None):
+    if cache is None or key is None:
+        return FrameSummary(df)
+    return cache.get_or_compute(summary_key(key), lambda: FrameSummary(df))
@@ -0,0 +1,233 @@
+import gzip
+import json
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .limpiar import TEXT_DTYPES, fill_values
+    from .plan import SINK, Step, apply_step
+except ImportError:  # Ejecutado como script desde src/ (streamlit run src/app.py)
+    from limpiar import TEXT_DTYPES, fill_values
+    from plan import SINK, Step, apply_step
+
+
+# Function to turn numpy scalars into plain Python values that JSON can store
+def plain(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+# Function to pick the numeric columns a transformer learned that are present in a new batch
+def fitted_columns(stats, df):
+    return [col for col in stats.index if col in df.columns]
+
+
+# Class to fill missing values with the means and modes learned on the first batch, and drop duplicates
+class Cleaner:
+    kind = "clean"
+
+    def __init__(self, keys=None, values=None):
+        self.keys = list(keys) if keys else None
+        self.values = values
+
+    def fit(self, df):
+        # Como clean_data: las medias y modas se calculan después de quitar los duplicados
+        self.values = {col: plain(value) for col, value in fill_values(df.drop_duplicates(subset=self.keys)).items()}
+        return self
+
+    def transform(self, df):
+        df = df.drop_duplicates(subset=self.keys)
+        values = {col: value for col, value in self.values.items() if col in df.columns}
+        return df.fillna(value=values) if values else df
+
+    def state(self):
+        return {"keys": self.keys, "values": self.values}
+
+
+# Class to remove the rows whose MAD-based z-score, with the median and MAD learned once, is above a threshold
+class ZScoreFilter:
+    kind = "zscore"
+
+    def __init__(self, z_thresh=3, median=None, mad=None):
+        self.z_thresh = z_thresh
+        self.median = None if median is None else pd.Series(median, dtype=np.float64)
+        self.mad = None if mad is None else pd.Series(mad, dtype=np.float64)
+
+    def fit(self, df):
+        # Las mismas estadísticas que remove_outliers
+        numeric_cols = df.select_dtypes(include=np.number).columns
+        self.median = df[numeric_cols].median()
+        self.mad = pd.Series(np.median(np.abs(df[numeric_cols] - self.median), axis=0), index=numeric_cols)
+        return self
+
+    def transform(self, df):
+        columns = fitted_columns(self.median, df)
+        mad = np.where(self.mad[columns] == 0, 1e-8, self.mad[columns])
+        z_scores = 0.6745 * np.abs(df[columns] - self.median[columns]) / mad
+        return df[~(z_scores > self.z_thresh).any(axis=1)]
+
+    def state(self):
+        return {"z_thresh": self.z_thresh, "median": self.median.to_dict(), "mad": self.mad.to_dict()}
+
+
+# Class to remove the rows outside the IQR fences learned once
+class IQRFilter:
+    kind = "iqr"
+
+    def __init__(self, q1=None, q3=None):
+        self.q1 = None if q1 is None else pd.Series(q1, dtype=np.float64)
+        self.q3 = None if q3 is None else pd.Series(q3, dtype=np.float64)
+
+    def fit(self, df):
+        numeric_cols = df.select_dtypes(include=np.number).columns
+        self.q1 = df[numeric_cols].quantile(0.25)
+        self.q3 = df[numeric_cols].quantile(0.75)
+        return self
+
+    def transform(self, df):
+        columns = fitted_columns(self.q1, df)
+        q1, q3 = self.q1[columns], self.q3[columns]
+        iqr = q3 - q1
+        return df[~((df[columns] < (q1 - 1.5 * iqr)) | (df[columns] > (q3 + 1.5 * iqr))).any(axis=1)]
+
+    def state(self):
+        return {"q1": self.q1.to_dict(), "q3": self.q3.to_dict()}
+
+
+# Class to scale numeric columns to [0, 1] with the minimum and maximum learned once
+class MinMaxScaler:
+    kind = "normalize"
+
+    def __init__(self, minimum=None, maximum=None):
+        self.minimum = None if minimum is None else pd.Series(minimum, dtype=np.float64)
+        self.maximum = None if maximum is None else pd.Series(maximum, dtype=np.float64)
+
+    def fit(self, df):
+        numeric_cols = df.select_dtypes(include=np.number).columns
+        self.minimum = df[numeric_cols].min().astype(np.float64)
+        self.maximum = df[numeric_cols].max().astype(np.float64)
+        return self
+
+    def transform(self, df):
+        columns = fitted_columns(self.minimum, df)
+        if not columns:
+            return df
+        # Un único bloque float64 para todas las columnas: una resta y una división vectorizadas
+        values = df[columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        minimum, maximum = self.minimum[columns].to_numpy(), self.maximum[columns].to_numpy()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scaled = (values - minimum) / (maximum - minimum)
+        df = df.copy(deep=False)
+        df[columns] = pd.DataFrame(scaled, index=df.index, columns=columns)
+        return df
+
+    def state(self):
+        return {"minimum": self.minimum.to_dict(), "maximum": self.maximum.to_dict()}
+
+
+# Class to encode text columns with integer codes learned once, so every batch gets the same codes
+class CategoryEncoder:
+    kind = "encode"
+
+    def __init__(self, categories=None):
+        self.categories = categories
+
+    def fit(self, df):
+        # Mismos códigos que pd.factorize sobre el primer lote: orden de aparición
+        text_cols = df.select_dtypes(include=TEXT_DTYPES + ['category']).columns
+        self.categories = {col: [plain(value) for value in pd.factorize(df[col])[1]] for col in text_cols}
+        return self
+
+    def transform(self, df):
+        columns = [col for col in self.categories if col in df.columns]
+        if not columns:
+            return df
+        df = df.copy(deep=False)
+        for col in columns:
+            # Búsqueda en un índice hash; los valores nuevos y los nulos reciben -1, como el centinela de factorize
+            df[col] = pd.Index(self.categories[col]).get_indexer(df[col])
+        return df
+
+    def state(self):
+        return {"categories": self.categories}
+
+
+# Class to run a plan step that learns nothing (delete, rename, filter, sort) as part of a fitted pipeline
+class StepTransformer:
+    kind = "step"
+
+    def __init__(self, step_kind, label, params):
+        self.step = Step(step_kind, label, **params)
+
+    def fit(self, df):
+        return self
+
+    def transform(self, df):
+        return apply_step(df, self.step)
+
+    def state(self):
+        return {"step_kind": self.step.kind, "label": self.step.label, "params": self.step.params}
+
+
+TRANSFORMERS = {cls.kind: cls for cls in (Cleaner, ZScoreFilter, IQRFilter, MinMaxScaler, CategoryEncoder, StepTransformer)}
+
+
+# Class to learn the statistics of a chain of steps on one batch and apply them unchanged to later batches
+class FittedPipeline:
+    def __init__(self, transformers):
+        self.transformers = list(transformers)
+
+    @classmethod
+    def from_steps(cls, steps):
+        transformers = []
+        for step in steps:
+            if step.kind == "clean":
+                transformers.append(Cleaner(step.params.get("keys")))
+            elif step.kind == "zscore":
+                transformers.append(ZScoreFilter(step.params.get("z_thresh", 3)))
+            elif step.kind == "iqr":
+                transformers.append(IQRFilter())
+            elif step.kind == "columnwise":
+                transformers.extend(MinMaxScaler() if op == "normalize" else CategoryEncoder() for op in step.params["ops"])
+            elif step.kind != SINK:
+                transformers.append(StepTransformer(step.kind, step.label, step.params))
+        return cls(transformers)
+
+    def fit_transform(self, df):
+        # Cada paso aprende sobre la salida de los anteriores, igual que al ejecutar el plan
+        for transformer in self.transformers:
+            df = transformer.fit(df).transform(df)
+        return df
+
+    def fit(self, df):
+        self.fit_transform(df)
+        return self
+
+    def transform(self, df):
+        for transformer in self.transformers:
+            df = transformer.transform(df)
+        return df
+
+    def to_dict(self):
+        return {"transformers": [{"kind": transformer.kind, **transformer.state()} for transformer in self.transformers]}
+
+    @classmethod
+    def from_dict(cls, data):
+        transformers = []
+        for state in data["transformers"]:
+            state = dict(state)
+            transformers.append(TRANSFORMERS[state.pop("kind")](**state))
+        return cls(transformers)
+
+    def save(self, path):
+        # JSON comprimido con gzip si el nombre termina en .gz: solo estadísticas, nunca filas
+        opener = gzip.open if str(path).endswith(".gz") else open
+        with opener(path, "wt") as file:
+            json.dump(self.to_dict(), file)
+
+    @classmethod
+    def load(cls, path):
+        opener = gzip.open if str(path).endswith(".gz") else open
+        with opener(path, "rt") as file:
+            return cls.from_dict(json.load(file))
@@ -0,0 +1,41 @@
+import json
+import sys
+import os
+
+# Añadir la carpeta src y la de benchmarks al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmarks')))
+from bench_suite import BASELINE, MIN_MB, MIN_SECONDS, find_regressions
+
+def results(**cases):
+    return {"results": {name: {"seconds": seconds, "peak_mb": peak_mb} for name, (seconds, peak_mb) in cases.items()}}
+
+def test_find_regressions_flags_cases_above_the_tolerance():
+    baseline = results(slower=(1.0, 100.0), larger=(1.0, 100.0), within=(1.0, 100.0), faster=(1.0, 100.0))
+    current = results(slower=(1.3, 100.0), larger=(1.0, 130.0), within=(1.2, 120.0), faster=(0.5, 50.0))
+    regressions = find_regressions(current, baseline)
+    assert [(r["case"], r["metric"]) for r in regressions] == [("slower", "seconds"), ("larger", "peak_mb")]
+    assert regressions[0]["baseline"] == 1.0 and regressions[0]["current"] == 1.3
+    assert abs(regressions[0]["ratio"] - 1.3) < 1e-9
+
+    # Con una tolerancia mayor, los mismos tiempos ya no son regresiones
+    assert find_regressions(current, baseline, time_tolerance=0.5, memory_tolerance=0.5) == []
+
+def test_find_regressions_ignores_noise_and_new_cases():
+    # Triplicar un tiempo o una memoria muy pequeños queda por debajo del ruido del reloj y del allocator
+    baseline = results(tiny=(MIN_SECONDS / 4, MIN_MB / 4))
+    current = results(tiny=(MIN_SECONDS * 3 / 4, MIN_MB * 3 / 4), new=(10.0, 1000.0))
+    assert find_regressions(current, baseline) == []
+
+    # Partiendo de cero, el cociente es infinito
+    regressions = find_regressions(results(case=(1.0, 0.0)), results(case=(0.0, 0.0)))
+    assert regressions == [{"case": "case", "metric": "seconds", "baseline": 0.0, "current": 1.0,
+                            "ratio": float("inf")}]
+
+def test_committed_baseline_compares_against_itself():
+    with open(BASELINE) as file:
+        baseline = json.load(file)
+    assert baseline["results"] and {"environment", "dataset"} <= baseline.keys()
+    for name, result in baseline["results"].items():
+        assert "@" in name and result["seconds"] >= 0 and result["peak_mb"] >= 0
+    assert find_regressions(baseline, baseline) == []
@@ -0,0 +1,63 @@
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Añadir la carpeta src al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.cache import StepCache, chain_key, content_hash, estimate_size
+from src.plan import clean_step, execute, sort_step
+from src.profiling import DataProfile
+from src.summaries import FrameSummary
+
+def test_content_hash_and_chain_key():
+    assert content_hash(b"a,b\n1,2\n") == content_hash(b"a,b\n1,2\n")
+    assert content_hash(b"a,b\n1,2\n") != content_hash(b"a,b\n1,3\n")
+    assert chain_key("upload", ("sort", "A")) != chain_key("upload", ("sort", "B"))
+
+def test_step_cache_lru_eviction():
+    cache = StepCache(budget_mb=1)
+    frame = pd.DataFrame({"A": np.zeros(50_000)})  # ~0.4 MB
+    cache.put("first", frame)
+    cache.put("second", frame)
+    cache.get("first")  # "first" pasa a ser la más reciente
+    cache.put("third", frame)
+
+    # Se expulsa la entrada usada hace más tiempo
+    assert "first" in cache and "third" in cache
+    assert "second" not in cache
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["used_mb"] <= 1
+
+def test_step_cache_counts_hits_and_misses():
+    cache = StepCache()
+    calls = []
+    compute = lambda: calls.append(1) or 42
+    assert cache.get_or_compute("key", compute) == 42
+    assert cache.get_or_compute("key", compute) == 42
+
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+def test_execute_reuses_cached_prefix():
+    cache = StepCache()
+    df = pd.DataFrame({"A": [3.0, 1.0, np.nan, 1.0], "B": ["x", None, "y", None]})
+    execute([clean_step(), sort_step("A")], df, cache=cache, key="upload")
+    result, timings = execute([clean_step(), sort_step("A", False)], df, cache=cache, key="upload")
+
+    # Al cambiar solo la ordenación, la limpieza sale de la caché
+    assert [t["cached"] for t in timings] == [True, False]
+    assert result["A"].tolist() == sorted(result["A"].tolist(), reverse=True)
+
+def test_estimate_size():
+    rng = np.random.default_rng(0)
+    text = rng.choice(["alpha", "beta", "gamma"], 100_000)
+    df = pd.DataFrame({"A": rng.normal(size=100_000), "S": text, "O": pd.Series(text, dtype=object)})
+    # Texto str: el buffer de Arrow, sin contar también cada cadena; objetos: una muestra de sus tamaños
+    actual = df.memory_usage(deep=True)
+    assert estimate_size(df[["A", "S"]]) == actual[["Index", "A", "S"]].sum()
+    assert abs(estimate_size(df[["O"]]) - actual[["Index", "O"]].sum()) < 0.01 * actual["O"]
+
+    # Perfiles y resúmenes cuentan los arrays que guardan (la máscara de duplicados, las cubetas...)
+    assert estimate_size(DataProfile(df)) >= len(df)
+    assert estimate_size(FrameSummary(df)) > 400 * 8
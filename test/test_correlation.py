@@ -0,0 +1,57 @@
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Añadir la carpeta src al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.cache import StepCache
+from src.correlation import correlation_from_chunks, correlation_matrix, mean_strength, top_pairs
+
+def make_frame(n=5000, nulls=True):
+    rng = np.random.default_rng(0)
+    base = rng.normal(size=n)
+    df = pd.DataFrame({
+        "A": base,
+        "B": -2 * base + rng.normal(scale=0.5, size=n),
+        "C": rng.normal(size=n),
+        "D": rng.integers(10**9, 10**9 + 100, n),  # Enteros grandes: se estandarizan antes de pasar a float32
+        "E": base ** 3 + rng.normal(scale=0.1, size=n),
+        "K": np.ones(n),  # Constante: sin correlación definida
+    })
+    if nulls:
+        df.loc[::7, "A"] = np.nan
+        df.loc[::11, "C"] = np.nan
+    return df
+
+def test_matches_pandas():
+    df = make_frame()
+    np.testing.assert_allclose(correlation_matrix(df), df.corr(), atol=1e-6)
+    clean = make_frame(nulls=False)
+    np.testing.assert_allclose(correlation_matrix(clean, method="spearman"), clean.corr(method="spearman"), atol=1e-6)
+
+def test_chunked_accumulation():
+    df = make_frame()
+    chunks = (df.iloc[start:start + 700] for start in range(0, len(df), 700))
+    np.testing.assert_allclose(correlation_from_chunks(chunks), df.corr(), atol=1e-6)
+
+def test_columns_added_and_dropped_incrementally():
+    df = make_frame()
+    cache = StepCache()
+    correlation_matrix(df, ["A", "B", "C"], cache=cache, key="k")
+    # Añadir columnas amplía las sumas guardadas; quitarlas recorta la matriz sin recalcular
+    result = correlation_matrix(df, ["E", "A", "D", "C"], cache=cache, key="k")
+    np.testing.assert_allclose(result, df[["E", "A", "D", "C"]].corr(), atol=1e-6)
+    assert list(result.columns) == ["E", "A", "D", "C"]
+    misses = cache.stats()["misses"]
+    np.testing.assert_allclose(correlation_matrix(df, ["B", "D"], cache=cache, key="k"), df[["B", "D"]].corr(), atol=1e-6)
+    assert cache.stats()["misses"] == misses
+
+def test_top_pairs():
+    corr = make_frame().corr()
+    pairs = top_pairs(corr, k=2)
+    assert [(a, b) for a, b, _ in pairs] == [("A", "B"), ("A", "E")]
+    assert pairs[0][2] == corr.loc["A", "B"]
+    assert len(top_pairs(corr, k=100)) == 10  # 5 columnas con valores: 10 pares; la constante no cuenta
+    values = corr.to_numpy()[np.triu_indices(len(corr), 1)]
+    assert mean_strength(corr) == np.nanmean(np.abs(values))
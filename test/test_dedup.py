@@ -0,0 +1,77 @@
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Añadir la carpeta src al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.dedup import FingerprintSet, duplicated_rows, row_fingerprints
+from src.streaming import clean_csv_in_chunks
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    n = 5000
+    df = pd.DataFrame({
+        'A': rng.integers(0, 5, n).astype(float),
+        'B': rng.choice([-0.0, 0.0, 1.5], n),
+        'C': rng.choice(['x', 'y', None], n),
+    })
+    df.loc[::17, 'A'] = np.nan
+    return df
+
+@pytest.mark.parametrize("bits", [64, 128])
+def test_duplicated_rows_matches_pandas(frame, bits):
+    np.testing.assert_array_equal(duplicated_rows(frame, bits=bits), frame.duplicated().to_numpy())
+    np.testing.assert_array_equal(duplicated_rows(frame, ['A', 'C'], bits=bits),
+                                  frame.duplicated(subset=['A', 'C']).to_numpy())
+
+def test_mixed_type_columns():
+    # hash_pandas_object convierte los objetos en texto: 1 y '1' no deben contar como la misma fila
+    df = pd.DataFrame({'A': pd.Series([1, '1', '1', 2], dtype=object), 'B': ['x', 'x', 'x', 'x']})
+    assert row_fingerprints(df)[0] != row_fingerprints(df)[1]
+    for bits in (64, 128):
+        np.testing.assert_array_equal(duplicated_rows(df, bits=bits), [False, False, True, False])
+    seen = FingerprintSet()
+    np.testing.assert_array_equal(seen.add_new(row_fingerprints(df)), [True, True, False, True])
+
+def test_collisions_are_checked_exactly(frame, monkeypatch):
+    # Aunque todas las huellas coincidan, solo se marcan las filas realmente repetidas
+    monkeypatch.setattr("src.dedup.row_fingerprints", lambda df, columns=None, bits=64: np.zeros(len(df), np.uint64))
+    np.testing.assert_array_equal(duplicated_rows(frame), frame.duplicated().to_numpy())
+
+def test_fingerprints_ignore_dtype(frame):
+    # Mismas huellas con enteros o floats, y con texto object, str o category
+    converted = frame.assign(A=frame['A'].fillna(-1).astype(int), C=frame['C'].astype('category'))
+    np.testing.assert_array_equal(row_fingerprints(converted), row_fingerprints(frame.assign(A=frame['A'].fillna(-1))))
+
+@pytest.mark.parametrize("bits", [64, 128])
+def test_fingerprint_set_across_chunks(tmp_path, frame, bits):
+    seen = FingerprintSet(bits)
+    keep = np.concatenate([seen.add_new(row_fingerprints(chunk, bits=bits))
+                           for chunk in (frame.iloc[start:start + 700] for start in range(0, len(frame), 700))])
+    np.testing.assert_array_equal(keep, ~frame.duplicated().to_numpy())
+    assert len(seen) == (~frame.duplicated()).sum()
+
+    path = tmp_path / "seen.npy"
+    seen.save(path)
+    loaded = FingerprintSet.load(path, bits)
+    assert len(loaded) == len(seen)
+    assert loaded.contains(row_fingerprints(frame, bits=bits)).all()
+
+def test_streaming_dedup_across_runs(tmp_path, frame):
+    seen_path = tmp_path / "feed.npy"
+    first, second = frame.iloc[:3000], frame.iloc[2000:]
+    first.to_csv(tmp_path / "first.csv", index=False)
+    second.to_csv(tmp_path / "second.csv", index=False)
+
+    clean_csv_in_chunks(tmp_path / "first.csv", tmp_path / "out1.csv", chunksize=700,
+                        key_columns=['A', 'B'], seen_path=seen_path)
+    clean_csv_in_chunks(tmp_path / "second.csv", tmp_path / "out2.csv", chunksize=700,
+                        key_columns=['A', 'B'], seen_path=seen_path)
+
+    # La segunda ejecución descarta las claves que ya salieron en la primera
+    assert len(pd.read_csv(tmp_path / "out1.csv")) == len(first.drop_duplicates(subset=['A', 'B']))
+    combined = pd.concat([pd.read_csv(tmp_path / "out1.csv"), pd.read_csv(tmp_path / "out2.csv")])
+    assert len(combined) == len(frame.drop_duplicates(subset=['A', 'B']))
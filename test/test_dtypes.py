@@ -0,0 +1,61 @@
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Añadir la carpeta src al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.dtypes import optimize_dtypes
+from src.limpiar import clean_data, remove_outliers, remove_outliers_iqr
+from src.plan import apply_step, encode_step, filter_step, normalize_step
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    n = 2000
+    df = pd.DataFrame({
+        'small': rng.integers(-100, 100, n),
+        'halves': rng.integers(0, 20, n) / 2,
+        'noise': rng.normal(size=n),
+        'city': rng.choice(['Madrid', 'Sevilla', 'Bilbao'], n),
+        'id': pd.Series([f"id{i}" for i in range(n)], dtype=object),
+    })
+    df.loc[::50, 'halves'] = np.nan
+    df.loc[::70, 'city'] = None
+    return df
+
+def test_optimize_dtypes(frame):
+    optimized, report = optimize_dtypes(frame)
+    assert optimized['small'].dtype == np.int8
+    assert optimized['halves'].dtype == np.float32
+    assert optimized['noise'].dtype == np.float64  # float32 perdería precisión
+    assert isinstance(optimized['city'].dtype, pd.CategoricalDtype)
+    assert report['after'] < report['before']
+    assert report['changes']['small'] == ('int64', 'int8')
+    # Los valores no cambian
+    pd.testing.assert_frame_equal(optimized, frame, check_dtype=False, check_categorical=False)
+
+def test_cleaning_on_optimized_types(frame):
+    optimized, _ = optimize_dtypes(frame)
+    pd.testing.assert_frame_equal(clean_data(optimized), clean_data(frame),
+                                  check_dtype=False, check_categorical=False)
+    pd.testing.assert_index_equal(remove_outliers(optimized).index, remove_outliers(frame).index)
+    pd.testing.assert_index_equal(remove_outliers_iqr(optimized).index, remove_outliers_iqr(frame).index)
+
+def test_steps_on_optimized_types(frame):
+    optimized, _ = optimize_dtypes(frame)
+    for step in [encode_step(), normalize_step(), filter_step('city', 'Equal to', 'Bilbao'),
+                 filter_step('small', 'Greater than', '50')]:
+        pd.testing.assert_frame_equal(apply_step(optimized, step), apply_step(frame, step),
+                                      check_dtype=False, check_categorical=False)
+
+def test_high_cardinality_text_stays_text():
+    # 800 valores distintos en 2000 filas: como categoría ocuparía más que las cadenas
+    rng = np.random.default_rng(1)
+    names = np.array([f"customer-{i:05d}" for i in range(800)])
+    frame = pd.DataFrame({'name': pd.Series(rng.choice(names, 2000), dtype=object)})
+    optimized, report = optimize_dtypes(frame)
+    assert not isinstance(optimized['name'].dtype, pd.CategoricalDtype)
+    assert report['after'] <= report['before']
+    pd.testing.assert_frame_equal(optimized, frame, check_dtype=False)
@@ -0,0 +1,78 @@
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Añadir la carpeta src al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.cache import StepCache
+from src.filters import FrameIndex, filter_rows, parse_expression
+from src.plan import execute, expression_filter_step, filter_mask, filter_step, optimize, rename_step, sort_step
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    n = 5000
+    words = np.array([f"{a}{b}-{i}" for i, (a, b) in enumerate(zip(rng.choice(list("abcxyz"), 2000),
+                                                                  rng.choice(["Mad", "rid", "Rome", "ome"], 2000)))])
+    df = pd.DataFrame({
+        "price": rng.normal(50, 20, n).round(1),
+        "qty": rng.integers(0, 10, n),
+        "city": rng.choice(["Madrid", "Rome", "Paris", None], n).astype(object),
+        "tag": rng.choice(words, n),
+        "zip code": rng.choice(["28001", "00100"], n),
+    }, index=rng.permutation(n))
+    df.loc[df.index[::13], "price"] = np.nan
+    df["kind"] = df["city"].astype("category")
+    return df
+
+@pytest.mark.parametrize("expression", [
+    'price > 50',
+    'price <= 40.5 or qty == 3',
+    'city contains "ma" and not qty >= 5',
+    'price != 50.3',
+    '(city == Rome or kind == Paris) and `zip code` = "28001"',
+    'tag contains "ome-1" or tag contains "rid"',
+    'kind contains "r" and price < 30',
+    'city == None',
+])
+def test_indexed_filter_matches_mask(frame, expression):
+    expected = filter_rows(frame, expression)
+    index = FrameIndex(frame)
+    pd.testing.assert_frame_equal(filter_rows(frame, expression, index), expected)
+    # El índice se reutiliza con otras condiciones sobre la misma columna
+    pd.testing.assert_frame_equal(filter_rows(frame, expression, index), expected)
+
+def test_single_condition_matches_pandas(frame):
+    mask = filter_mask(frame, "city", "Contains", "ri")
+    pd.testing.assert_series_equal(mask, frame["city"].astype(str).str.contains("ri", case=False, na=False),
+                                   check_names=False)
+    assert filter_mask(frame, "qty", "Greater than", "7").equals(frame["qty"] > 7.0)
+    # El paso del plan da las mismas filas, con o sin los índices de FrameIndex
+    result, _ = execute([filter_step("city", "Contains", "ri")], frame)
+    pd.testing.assert_frame_equal(result, frame[mask])
+
+def test_parse_errors():
+    for text in ["price >", "(price > 1", "price > 1 qty", "and price > 1", ""]:
+        with pytest.raises(ValueError):
+            parse_expression(text)
+    assert parse_expression('`zip code` = 28001 AND NOT city contains "x"') == \
+        ("and", ("cond", "zip code", "==", "28001"), ("not", ("cond", "city", "contains", "x")))
+
+def test_filter_indexes_are_cached(frame):
+    cache = StepCache()
+    first, _ = execute([expression_filter_step("price > 60")], frame, cache=cache, key="upload")
+    second, timings = execute([expression_filter_step("price > 70 or qty == 1")], frame, cache=cache, key="upload")
+    assert not timings[0]["cached"]
+    # Un índice por columna usada (price se reutiliza) más los dos resultados
+    assert cache.stats()["entries"] == 4
+    pd.testing.assert_frame_equal(second, filter_rows(frame, "price > 70 or qty == 1"))
+
+def test_expression_filter_moves_before_sort(frame):
+    steps = [rename_step("qty", "amount"), sort_step("price"), expression_filter_step("price > 60 and city == Rome")]
+    plan, notes = optimize(steps, frame.iloc[:0])
+    assert [step.kind for step in plan] == ["filter", "rename", "sort"]
+    blocked, _ = optimize([rename_step("qty", "amount"), expression_filter_step("amount > 3")], frame.iloc[:0])
+    assert [step.kind for step in blocked] == ["rename", "filter"]
+    pd.testing.assert_frame_equal(execute(plan, frame)[0].sort_index(), execute(steps, frame)[0].sort_index())
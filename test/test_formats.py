@@ -0,0 +1,63 @@
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Añadir la carpeta src al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pyarrow as pa
+from src.formats import detect_format, export_name, export_table, read_schema, read_table, write_table
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'A': np.arange(1000),
+        'B': rng.normal(size=1000),
+        'C': rng.choice(['x', 'y', 'z'], size=1000),
+    })
+
+def test_detect_format():
+    assert detect_format("data.CSV") == "csv"
+    assert detect_format("data.parquet") == "parquet"
+    assert detect_format("data.arrow") == "feather"
+    with pytest.raises(ValueError):
+        detect_format("data.xlsx")
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet", "feather"])
+def test_round_trip(frame, fmt):
+    data = write_table(frame, fmt)
+    assert list(read_schema(data, fmt)) == ['A', 'B', 'C']
+    result = read_table(data, fmt)
+    pd.testing.assert_frame_equal(result, frame, check_dtype=fmt != "csv")
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet", "feather"])
+def test_projection_and_filter(frame, fmt):
+    data = write_table(frame, fmt)
+    # La columna del filtro se lee para filtrar pero no se devuelve
+    result = read_table(data, fmt, columns=['B', 'C'], filters=[('A', '>=', 900), ('C', '==', 'x')])
+    expected = frame[(frame['A'] >= 900) & (frame['C'] == 'x')][['B', 'C']].reset_index(drop=True)
+    assert list(result.columns) == ['B', 'C']
+    pd.testing.assert_frame_equal(result, expected, check_dtype=fmt != "csv")
+
+def test_parquet_filter_across_row_groups(frame):
+    from io import BytesIO
+    buffer = BytesIO()
+    frame.to_parquet(buffer, index=False, row_group_size=100)
+    result = read_table(buffer.getvalue(), "parquet", filters=[('A', '<', 150)])
+    pd.testing.assert_frame_equal(result, frame[frame['A'] < 150])
+
+@pytest.mark.parametrize("fmt,compression", [("csv", None), ("csv", "gzip"), ("csv", "zstd"), ("parquet", None), ("feather", None)])
+def test_export_table_in_chunks(frame, fmt, compression):
+    frame.loc[::3, 'C'] = None
+    with export_table(frame, fmt, compression, chunk_rows=300, spool_bytes=1024) as file:
+        data = file.read()
+    if compression:
+        data = pa.CompressedInputStream(pa.BufferReader(data), compression).read()
+    if fmt == "csv":
+        # Mismo texto que un solo to_csv
+        assert data == frame.to_csv(index=False).encode()
+    else:
+        pd.testing.assert_frame_equal(read_table(data, fmt), frame)
+    assert export_name("out", fmt, compression).startswith(f"out.{fmt}")
@@ -0,0 +1,50 @@
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Añadir la carpeta src al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.cache import StepCache
+from src.grouping import AGG_FUNCS, group_aggregate, group_partials
+
+def make_frame(n=2000):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "city": rng.choice(["Madrid", "Lima", "Quito", None], n),
+        "year": rng.integers(2020, 2024, n),
+        "price": rng.normal(1e6, 5, n),
+        "units": rng.integers(0, 100, n),
+    })
+    df.loc[::7, "price"] = np.nan
+    df.loc[df["city"] == "Quito", "price"] = np.nan  # Un grupo sin valores
+    return df
+
+def test_matches_pandas_groupby():
+    df = make_frame()
+    aggregations = [(col, func) for col in ("price", "units") for func in AGG_FUNCS]
+    expected = df.groupby(["city", "year"], observed=True).agg(
+        **{f"{col}_{func}": (col, func) for col, func in aggregations}).reset_index()
+    result = group_aggregate(df, ["city", "year"], aggregations)
+    pd.testing.assert_frame_equal(result, expected, check_exact=False, rtol=1e-9)
+
+def test_single_key_with_categories():
+    df = make_frame()
+    df["city"] = df["city"].astype("category")
+    expected = df.groupby("city", observed=True)["units"].agg("mean").rename("units_mean").reset_index()
+    pd.testing.assert_frame_equal(group_aggregate(df, ["city"], [("units", "mean")]), expected)
+
+def test_partials_reused_from_cache():
+    df = make_frame()
+    cache = StepCache()
+    first = group_aggregate(df, ["city"], [("price", "mean")], cache, "k")
+    partials = group_partials(df, ["city"], ["price"], cache, "k")
+    # Otra función de la misma columna: mismos agregados parciales, sin agrupar de nuevo
+    group_aggregate(df, ["city"], [("price", "max"), ("price", "sum")], cache, "k")
+    assert group_partials(df, ["city"], ["price"], cache, "k") is partials
+    # Una columna nueva amplía una copia y conserva el orden de las filas ya calculado
+    group_aggregate(df, ["city"], [("units", "min")], cache, "k")
+    extended = group_partials(df, ["city"], ["price", "units"], cache, "k")
+    assert extended is not partials and extended.order is partials.order
+    assert set(partials.stats) == {"price"}
+    pd.testing.assert_frame_equal(first, group_aggregate(df, ["city"], [("price", "mean")]))
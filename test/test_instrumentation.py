@@ -0,0 +1,77 @@
+import json
+import tracemalloc
+
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Añadir la carpeta src al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.cache import StepCache
+from src.instrumentation import Capture, Recorder
+from src.plan import clean_step, execute, sink_step, sort_step
+
+def make_frame():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"A": rng.normal(size=1000), "B": rng.choice(["x", "y"], 1000)})
+    df.loc[::10, "A"] = np.nan
+    return df
+
+def test_recorder_sections_and_steps():
+    df = make_frame()
+    cache = StepCache()
+    recorder = Recorder(cache=cache, trace_memory=True)
+    recorder.section("Load data")
+    recorder.annotate(rows_out=len(df), columns_out=df.shape[1])
+    recorder.section("Run actions", df)
+    _, timings = execute([clean_step(), sort_step("A"), sink_step("Show Descriptive Statistics")], df,
+                         on_step=lambda step, before, after: before.describe(), cache=cache, key="frame")
+    recorder.add_steps(timings)
+    recorder.finish()
+    assert not tracemalloc.is_tracing()
+
+    table = recorder.table()
+    assert table["name"].str.strip().tolist() == ["rerun", "Load data", "Run actions", "Basic Data Cleaning",
+                                                  "Sort by 'A' (ascending)", "Show Descriptive Statistics"]
+    assert table["kind"].tolist() == ["run", "section", "section", "step", "step", "step"]
+    assert table.loc[2, "rows_in"] == 1000 and table.loc[3, "rows_out"] == len(df.drop_duplicates())
+    # Con la traza de memoria activa, cada paso tiene su pico; el dibujo de los pasos de salida cuenta en su tiempo
+    assert timings[0]["peak_mb"] > 0 and timings[2]["render_seconds"] > 0
+    assert (table["wall_seconds"] >= 0).all() and table.loc[3, "cache_misses"] == 1
+
+def test_exports():
+    recorder = Recorder()
+    recorder.section("Overview", make_frame())
+    recorder.finish()
+    spans = json.loads(json.dumps(recorder.to_json()))["spans"]
+    assert [span["name"] for span in spans] == ["rerun", "Overview"]
+    assert spans[1]["parent_id"] == spans[0]["span_id"] and "_wall" not in spans[1]
+
+    otel = json.loads(json.dumps(recorder.to_otel()))
+    otel_spans = otel["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert otel_spans[1]["parentSpanId"] == otel_spans[0]["spanId"]
+    assert {"key": "cleanly.rows_in", "value": {"intValue": "1000"}} in otel_spans[1]["attributes"]
+    assert int(otel_spans[1]["endTimeUnixNano"]) >= int(otel_spans[1]["startTimeUnixNano"])
+
+def test_capture():
+    capture = Capture()
+    make_frame().describe()
+    result = capture.stop()
+    assert "function calls" in result["profile_text"] and result["profile_bytes"]
+    assert not tracemalloc.is_tracing()
+
+def test_tracing_and_captures_are_shared_across_sessions():
+    # Dos sesiones con la traza de memoria: la primera en terminar no la apaga para la otra
+    first, second = Recorder(trace_memory=True), Recorder(trace_memory=True)
+    first.finish()
+    assert tracemalloc.is_tracing()
+    second.finish()
+    assert not tracemalloc.is_tracing()
+
+    # cProfile es de todo el proceso: una segunda captura no arranca mientras haya otra en marcha
+    capture = Capture()
+    busy = Capture()
+    assert capture.active and not busy.active and busy.stop() is None
+    assert capture.stop()["profile_text"] and not tracemalloc.is_tracing()
+    assert Capture().stop() is not None
@@ -0,0 +1,88 @@
+import threading
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Añadir la carpeta src al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.cache import StepCache
+from src.jobs import JobManager
+from src.plan import clean_step, execute, execute_job, is_cached, normalize_step, sink_step, step_keys
+
+def blocking(job, gate, log, name):
+    log.append(name)
+    while not gate.wait(0.01):
+        job.check()
+    return name
+
+def wait_running(job):
+    while job.state == "queued":
+        threading.Event().wait(0.01)
+
+def test_submit_reattaches_and_cancels():
+    jobs = JobManager(workers=1)
+    gate = threading.Event()
+    log = []
+    first = jobs.submit("alice", "a", blocking, gate, log, "a")
+    wait_running(first)
+    # Con la misma clave se devuelve el mismo trabajo en lugar de lanzar otro
+    assert jobs.submit("alice", "a", blocking, gate, log, "again") is first
+    queued = jobs.submit("alice", "b", blocking, gate, log, "b")
+    queued.cancel()
+    assert queued.state == "cancelled" and queued.done
+    first.cancel()
+    assert first.wait(5) and first.state == "cancelled"
+    assert log == ["a"]
+
+def test_switching_back_to_a_superseded_plan_runs_it_again():
+    jobs = JobManager(workers=1)
+    gate = threading.Event()
+    log = []
+    plan_a = jobs.submit("alice", "a", blocking, gate, log, "a")
+    wait_running(plan_a)
+    # El usuario cambia a B: A se cancela sin que lo haya pedido
+    jobs.cancel_others("alice", "b")
+    plan_b = jobs.submit("alice", "b", blocking, gate, log, "b")
+    assert plan_a.wait(5) and plan_a.state == "cancelled"
+    # Y vuelve a A: se lanza otra vez en lugar de mostrar A como cancelado
+    jobs.cancel_others("alice", "a")
+    assert jobs.get("a") is None
+    again = jobs.submit("alice", "a", blocking, gate, log, "a again")
+    assert again is not plan_a and again.state != "cancelled"
+    assert plan_b.wait(5) and plan_b.state == "cancelled" and jobs.get("b") is None
+    gate.set()
+    assert again.wait(5) and again.result == "a again"
+
+def test_owners_take_turns():
+    jobs = JobManager(workers=1)
+    gate = threading.Event()
+    log = []
+    running = jobs.submit("alice", "a0", blocking, gate, log, "a0")
+    wait_running(running)
+    for i in range(1, 4):
+        jobs.submit("alice", f"a{i}", blocking, gate, log, f"a{i}")
+    last = jobs.submit("bob", "b0", blocking, gate, log, "b0")
+    gate.set()
+    assert last.wait(5)
+    # Bob no espera a que terminen todos los trabajos de Alice
+    assert log[:3] == ["a0", "a1", "b0"]
+    assert running.result == "a0"
+
+def test_execute_job_fills_cache():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"A": rng.normal(size=100), "B": rng.choice(["x", "y"], 100)})
+    steps = [clean_step(), sink_step("Correlation Matrix"), normalize_step()]
+    keys = step_keys(steps, "frame")
+    assert keys[1] == keys[2]  # Los pasos de salida no cambian la clave
+    cache = StepCache()
+    jobs = JobManager(workers=1)
+    prepared = []
+    job = jobs.submit("alice", "plan", execute_job, steps, df, cache, "frame",
+                      prepare=lambda step, before: prepared.append(step.label))
+    assert job.wait(5) and job.state == "done", job.error
+    assert job.progress == 1.0 and len(job.result) == 3
+    assert prepared == [step.label for step in steps]
+    assert is_cached(steps, cache, "frame")
+    _, timings = execute(steps, df, cache=cache, key="frame")
+    assert [t["cached"] for t in timings] == [True, False, True]
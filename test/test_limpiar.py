@@ -6,7 +6,7 @@ import os
 
 # Añadir la carpeta src al path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from src.limpiar import clean_data, remove_outliers, remove_outliers_iqr
+from src.limpiar import clean_data, column_modes, remove_outliers, remove_outliers_iqr
 
 def test_clean_data():
     # Create a sample DataFrame with missing values and duplicates
@@ -28,6 +28,28 @@ def test_clean_data():
     assert cleaned_df["B"].isnull().sum() == 0
     assert cleaned_df["C"].isnull().sum() == 0
 
+def test_clean_data_fill_values():
+    # Los valores de relleno deben coincidir con la media y la moda de cada columna
+    data = {
+        "A": [1.0, 2.0, np.nan, 5.0, 5.0],
+        "B": [1, 2, 3, 4, 4],
+        "C": ["x", "y", "y", None, "z"],
+        "D": ["b", "a", "a", "b", None]
+    }
+    df = pd.DataFrame(data)
+    cleaned_df = clean_data(df)
+
+    assert cleaned_df.loc[2, "A"] == df.drop_duplicates()["A"].mean()
+    assert cleaned_df.loc[3, "C"] == "y"
+    assert cleaned_df.loc[4, "D"] == "a"  # Empate: se usa el menor valor, igual que mode()[0]
+    assert cleaned_df["B"].dtype == df["B"].dtype
+
+def test_column_modes():
+    df = pd.DataFrame({"A": ["a", "b", "b", None], "B": [None, None, None, None]}, dtype=object)
+    modes = column_modes(df)
+
+    assert modes == {"A": "b"}
+
 def test_remove_outliers():
     # Create a sample DataFrame with outliers
     data = {"A": [1, 2, 3, 10000], "B": [10, 20, 30, 10000]}
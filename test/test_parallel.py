@@ -0,0 +1,45 @@
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Añadir la carpeta src al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.limpiar import clean_data, remove_outliers, remove_outliers_iqr
+from src.parallel import clean_data_parallel, partitions, remove_outliers_iqr_parallel, remove_outliers_parallel
+
+def make_frame():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.standard_t(2, size=(2000, 5)), columns=list("ABCDE"))
+    df.iloc[::7, 1] = np.nan
+    df["F"] = rng.integers(0, 100, 2000)
+    df["G"] = rng.choice(np.array(["x", "y", None], dtype=object), 2000)
+    # Tipos que deja optimize_dtypes: la media se rellena en float32 y los enteros pequeños se quedan como están
+    df["H"] = (rng.normal(size=2000) * 3 + 9999.9).astype(np.float32)
+    df.iloc[::9, -1] = np.nan
+    df["I"] = rng.integers(-100, 100, 2000).astype(np.int8)
+    return pd.concat([df, df.iloc[:20]])
+
+def test_partitions():
+    assert partitions(10, 3) == [(0, 3), (3, 6), (6, 10)]
+    assert partitions(2, 8) == [(0, 1), (1, 2)]
+    assert partitions(0, 4) == []
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+@pytest.mark.parametrize("workers", [1, 3])
+def test_parallel_matches_serial(backend, workers):
+    df = make_frame()
+
+    # El resultado debe ser idéntico al camino serie, sea cual sea el número de workers
+    cleaned = clean_data_parallel(df, workers, backend)
+    pd.testing.assert_frame_equal(cleaned, clean_data(df), check_exact=True)
+    assert cleaned["H"].dtype == np.float32 and cleaned["I"].dtype == np.int8
+    pd.testing.assert_frame_equal(remove_outliers_parallel(df, workers=workers, backend=backend),
+                                  remove_outliers(df), check_exact=True)
+    pd.testing.assert_frame_equal(remove_outliers_iqr_parallel(df, workers, backend),
+                                  remove_outliers_iqr(df), check_exact=True)
+
+def test_parallel_unknown_backend():
+    with pytest.raises(ValueError):
+        remove_outliers_parallel(make_frame(), backend="gpu")
@@ -0,0 +1,78 @@
+import json
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+import os
+import subprocess
+
+# Añadir la carpeta src al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.limpiar import clean_data, remove_outliers
+from src.pipeline import build_steps, fit_pipeline, process_directory, run_pipeline
+
+SPEC = {"steps": ["clean", {"step": "zscore", "z_thresh": 2.5}, "normalize"]}
+
+@pytest.fixture
+def folder(tmp_path):
+    rng = np.random.default_rng(0)
+    source = tmp_path / "in"
+    source.mkdir()
+    for i in range(3):
+        df = pd.DataFrame({"A": rng.normal(size=200), "B": rng.choice(["x", "y", None], 200)})
+        df.loc[::7, "A"] = np.nan
+        df.to_csv(source / f"day{i}.csv", index=False)
+    df.to_parquet(source / "day3.parquet")
+    (source / "broken.parquet").write_text("not parquet")
+    (source / "notes.txt").write_text("not data")
+    return tmp_path
+
+def test_run_pipeline_reuses_cleaning_functions(folder):
+    df = pd.read_csv(folder / "in" / "day0.csv")
+    result, timings = run_pipeline(df, SPEC)
+    expected = remove_outliers(clean_data(df), z_thresh=2.5)
+    pd.testing.assert_series_equal(result["A"], (expected["A"] - expected["A"].min()) / (expected["A"].max() - expected["A"].min()))
+    assert [t["step"] for t in timings] == ["Basic Data Cleaning", "Remove Outliers (Z-Score > 2.5)", "Normalize Data"]
+
+def test_build_steps_rejects_unknown_steps():
+    with pytest.raises(ValueError):
+        build_steps({"steps": ["shuffle"]})
+    with pytest.raises(ValueError):
+        build_steps({"steps": [{"step": "zscore", "threshold": 2}]})
+
+def test_process_directory(folder):
+    summary = process_directory(folder / "in", folder / "out", {**SPEC, "format": "parquet"}, workers=2, backend="thread")
+    files = {os.path.basename(result["file"]): result for result in summary["files"]}
+    assert set(files) == {"day0.csv", "day1.csv", "day2.csv", "day3.parquet", "broken.parquet"}
+    assert files["broken.parquet"]["status"] == "failed"
+    assert summary["totals"]["failed"] == 1
+    out = pd.read_parquet(folder / "out" / "day1.parquet")
+    assert len(out) == files["day1.csv"]["rows_out"] < files["day1.csv"]["rows_in"] == 200
+    json.dumps(summary)  # El resumen se puede guardar como JSON
+
+def test_command_line(folder):
+    spec = folder / "spec.json"
+    spec.write_text(json.dumps(SPEC))
+    script = os.path.join(os.path.dirname(__file__), "..", "src", "pipeline.py")
+    completed = subprocess.run([sys.executable, script, str(spec), str(folder / "in"), str(folder / "out"),
+                                "--pattern", "day*", "--workers", "2"], capture_output=True, text=True)
+    assert completed.returncode == 0, completed.stderr
+    summary = json.loads((folder / "out" / "summary.json").read_text())
+    assert summary["totals"]["files"] == 4 and summary["totals"]["failed"] == 0
+    assert (folder / "out" / "day3.parquet").exists()
+
+def test_process_directory_with_fitted_statistics(folder):
+    spec = {"steps": ["clean", "normalize", "encode"]}
+    fitted = fit_pipeline(folder / "in" / "day0.csv", spec)
+    summary = process_directory(folder / "in", folder / "out", spec, workers=2, backend="thread", fitted=fitted)
+    assert summary["fitted"] and summary["totals"]["failed"] == 1
+    out = pd.read_csv(folder / "out" / "day2.csv")
+    # Los códigos salen del primer fichero: coinciden en todos los lotes
+    expected = fitted.transform(pd.read_csv(folder / "in" / "day2.csv"))
+    assert out["B"].tolist() == expected["B"].tolist()
+    np.testing.assert_allclose(out["A"], expected["A"])
+
+def test_filter_expression_in_spec(folder):
+    df = pd.read_csv(folder / "in" / "day0.csv")
+    result, _ = run_pipeline(df, {"steps": [{"step": "filter", "expression": 'A > 0 and B == "x"'}]})
+    pd.testing.assert_frame_equal(result, df[(df["A"] > 0) & (df["B"] == "x")])
@@ -0,0 +1,76 @@
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Añadir la carpeta src al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.plan import (apply_step, clean_step, delete_step, encode_step, execute, explain, filter_step, iqr_step,
+                      normalize_step, optimize, rename_step, sink_step, sort_step, zscore_step)
+
+def make_frame():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "A": rng.normal(size=200),
+        "B": rng.integers(0, 10, 200).astype(float),
+        "C": rng.choice(["x", "y", "z"], 200),
+        "D": rng.choice(["p", "q"], 200)
+    })
+    df.loc[::9, "A"] = np.nan
+    df.loc[::13, "C"] = None
+    return df
+
+def run_in_order(df, steps):
+    for step in steps:
+        df = apply_step(df, step)
+    return df
+
+@pytest.mark.parametrize("steps", [
+    [clean_step(), sort_step("A"), normalize_step(), encode_step(), delete_step(["D"])],
+    [zscore_step(), rename_step("A", "E"), sort_step("E", False), filter_step("E", "Greater than", "0"), delete_step(["C"])],
+    [encode_step(), normalize_step(), iqr_step(), filter_step("B", "Less than", "5"), sort_step("B")],
+])
+def test_optimized_plan_matches_sequential(steps):
+    df = make_frame()
+    plan, notes = optimize(steps, df.iloc[:0])
+    result, timings = execute(plan, df)
+
+    pd.testing.assert_frame_equal(result, run_in_order(df, steps))
+    assert len(timings) == len(plan)
+
+def test_optimize_pushes_deletes_and_filters():
+    df = make_frame()
+    steps = [zscore_step(), rename_step("A", "E"), sort_step("E"), filter_step("E", "Greater than", "0"),
+             delete_step(["C", "D"])]
+    plan, notes = optimize(steps, df.iloc[:0])
+
+    # Borrar columnas de texto y filtrar se adelantan; el filtro pasa a usar el nombre original
+    assert [step.kind for step in plan] == ["delete", "zscore", "filter", "rename", "sort"]
+    assert plan[2].params["column"] == "A"
+    assert notes
+
+def test_optimize_keeps_numeric_delete_after_outliers():
+    df = make_frame()
+    plan, _ = optimize([zscore_step(), delete_step(["A"])], df.iloc[:0])
+
+    # Borrar una columna numérica cambiaría qué filas son outliers
+    assert [step.kind for step in plan] == ["zscore", "delete"]
+
+def test_optimize_fuses_and_drops_dead_sorts():
+    df = make_frame()
+    steps = [sort_step("A"), normalize_step(), normalize_step(), encode_step(), sort_step("A", False)]
+    plan, notes = optimize(steps, df.iloc[:0])
+
+    assert [step.kind for step in plan] == ["sort", "columnwise", "sort"]
+    assert plan[1].params["ops"] == ["normalize", "encode"]
+    # Sin nada posterior que use el orden, la primera ordenación sobra
+    plan, _ = optimize([sort_step("A"), normalize_step(), sort_step("A", False)], df.iloc[:0])
+    assert [step.kind for step in plan] == ["columnwise", "sort"]
+
+def test_sinks_are_barriers():
+    df = make_frame()
+    plan, _ = optimize([normalize_step(), sink_step("Correlation Matrix"), delete_step(["C"])], df.iloc[:0])
+
+    assert [step.kind for step in plan] == ["columnwise", "sink", "delete"]
+    assert "Correlation Matrix" in explain(plan, [])
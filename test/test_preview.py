@@ -0,0 +1,44 @@
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Añadir la carpeta src al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.cache import StepCache
+from src.preview import page_count, page_window, search_mask, visible_positions
+
+def make_frame():
+    return pd.DataFrame({
+        "A": [3.0, np.nan, 1.0, 2.0, 5.0],
+        "B": ["apple", None, "Banana", "cherry", "APPLE pie"],
+        "C": pd.Categorical(["x", "y", "x", None, "y"]),
+    }, index=[10, 11, 12, 13, 14])
+
+def test_search_mask():
+    df = make_frame()
+    assert search_mask(df, "apple").tolist() == [True, False, False, False, True]
+    assert search_mask(df, "2").tolist() == [False, False, False, True, False]
+    assert search_mask(df, "y").tolist() == [False, True, False, True, True]
+    assert search_mask(df, "none").tolist() == [False] * 5
+    assert search_mask(df, "").all()
+
+def test_visible_positions_sorted_and_searched():
+    df = make_frame()
+    # Orden estable, nulos al final, como sort_values
+    expected = df.sort_values("A", kind="stable", na_position="last")
+    np.testing.assert_array_equal(df.iloc[visible_positions(df, "A")].index, expected.index)
+    descending = visible_positions(df, "A", ascending=False, query="apple")
+    assert df.iloc[descending].index.tolist() == [14, 10]
+
+    cache = StepCache()
+    first = visible_positions(df, "B", query="a", cache=cache, key="frame")
+    assert visible_positions(df, "B", query="a", cache=cache, key="frame") is first
+
+def test_page_window():
+    df = pd.DataFrame({"A": np.arange(103)})
+    positions = visible_positions(df, "A", ascending=False)
+    assert page_count(len(positions), 25) == 5
+    assert page_window(df, positions, 1, 25)["A"].tolist()[:2] == [102, 101]
+    assert page_window(df, positions, 5, 25)["A"].tolist() == [2, 1, 0]
+    assert len(page_window(df, positions, 99, 25)) == 3  # Una página fuera de rango se ajusta a la última
@@ -0,0 +1,72 @@
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Añadir la carpeta src al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.limpiar import fill_values
+from src.plan import apply_step, clean_step, execute, iqr_step, sort_step
+from src.profiling import DataProfile
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    n = 3001
+    df = pd.DataFrame({
+        'A': rng.integers(0, 50, n),
+        'B': rng.standard_t(2, size=n),
+        'C': rng.choice(['x', 'y', 'z'], n),
+        'D': np.nan,
+    })
+    df.loc[::11, 'B'] = np.nan
+    df.loc[::13, 'C'] = None
+    return df
+
+def test_profile_matches_pandas(frame):
+    profile = DataProfile(frame)
+    pd.testing.assert_frame_equal(profile.describe(), frame.describe(), check_exact=True)
+    pd.testing.assert_series_equal(profile.null_counts, frame.isnull().sum(), check_dtype=False)
+    pd.testing.assert_series_equal(profile.cardinality, frame.nunique(), check_dtype=False)
+    assert profile.duplicate_count == frame.duplicated().sum()
+    assert profile.modes['C'] == frame['C'].mode()[0]
+
+def test_outlier_table_matches_per_column_loop(frame):
+    profile = DataProfile(frame)
+    for row in profile.outlier_table().itertuples(index=False):
+        q1, q3 = frame[row.Column].quantile(0.25), frame[row.Column].quantile(0.75)
+        iqr = q3 - q1
+        column = frame[row.Column]
+        assert row[1] == column[(column < q1 - 1.5 * iqr) | (column > q3 + 1.5 * iqr)].count()
+
+def test_fill_values(frame):
+    assert DataProfile(frame.iloc[:0]).fill_values() == {}
+    unique = frame.drop_duplicates()
+    pd.testing.assert_series_equal(pd.Series(DataProfile(unique).fill_values()), pd.Series(fill_values(unique)))
+    # Con duplicados, clean_data calcula los valores después de quitarlos: el perfil no sirve
+    assert DataProfile(pd.concat([unique, unique.iloc[:5]])).fill_values() is None
+
+def test_execute_with_profile(frame):
+    frame = frame.drop_duplicates()
+    profile = DataProfile(frame)
+    for steps in ([clean_step(), iqr_step()], [iqr_step(), clean_step()], [sort_step('A'), iqr_step()]):
+        expected, _ = execute(steps, frame)
+        result, _ = execute(steps, frame, profile=profile)
+        pd.testing.assert_frame_equal(result, expected, check_exact=True)
+
+def test_clean_with_profile_keeps_downcast_dtypes():
+    # Tipos que deja optimize_dtypes: la media se rellena en float32, como hace clean_data sin perfil
+    rng = np.random.default_rng(1)
+    frame = pd.DataFrame({
+        'F': (rng.normal(size=1000) * 3 + 9999.9).astype(np.float32),
+        'I': rng.integers(-100, 100, 1000).astype(np.int8),
+        'G': rng.normal(size=1000),
+    })
+    frame.loc[::7, 'F'] = np.nan
+    frame.loc[::9, 'G'] = np.nan
+    frame = frame.drop_duplicates()
+    expected = apply_step(frame, clean_step())
+    result = apply_step(frame, clean_step(), DataProfile(frame))
+    pd.testing.assert_frame_equal(result, expected, check_exact=True)
+    assert result['F'].dtype == np.float32 and result['I'].dtype == np.int8
@@ -0,0 +1,59 @@
+import pytest
+import pandas as pd
+import numpy as np
+import subprocess
+import sys
+import os
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+# Añadir la carpeta src al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmarks')))
+from src.rendering import draw_scatter, dtype_chart, missing_values_chart, null_fraction_grid, stratified_sample
+from bench_suite import SRC, app_imports
+
+def test_null_fraction_grid():
+    df = pd.DataFrame({"A": [np.nan] * 5 + [1.0] * 5, "B": ["x", None] * 5})
+    grid = null_fraction_grid(df, bins=2)
+    assert grid.shape == (2, 2)
+    np.testing.assert_allclose(grid["A"], [1.0, 0.0])
+    np.testing.assert_allclose(grid["B"], [0.4, 0.6])
+    # Nunca más bloques que filas, y cada fila cuenta una sola vez
+    grid = null_fraction_grid(df, bins=100)
+    assert len(grid) == 10
+    assert grid["A"].sum() == df["A"].isna().sum()
+
+def test_stratified_sample_keeps_sparse_regions():
+    rng = np.random.default_rng(0)
+    x = np.concatenate([rng.normal(size=100_000), [50.0, 60.0]])
+    y = np.concatenate([rng.normal(size=100_000), [50.0, -60.0]])
+    index = stratified_sample(x, y, 2000)
+    assert len(index) < 4000
+    # Los puntos aislados están solos en su celda: siempre se conservan
+    assert {100_000, 100_001} <= set(index)
+
+@pytest.mark.parametrize("method", ["auto", "points", "hexbin", "sample"])
+def test_draw_scatter(method):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"A": rng.normal(size=20_000), "B": rng.normal(size=20_000)})
+    df.loc[::10, "B"] = np.nan
+    fig, ax = plt.subplots()
+    description = draw_scatter(ax, df, "A", "B", method=method)
+    plt.close(fig)
+    assert "18,000" in description
+
+def test_overview_charts():
+    dtype_counts = pd.DataFrame({"Data Type": ["float64", "str"], "Count": [3, 1]})
+    assert dtype_chart(dtype_counts).axes
+    grid = null_fraction_grid(pd.DataFrame({"A": [np.nan, 1.0, 2.0, np.nan]}), bins=2)
+    assert missing_values_chart(grid, 2, 50.0, (4, 1)).axes
+    plt.close("all")
+
+def test_app_imports_do_not_load_plotting():
+    # matplotlib y seaborn se importan al dibujar el primer gráfico, no al arrancar la app
+    imports = "\n".join(app_imports())
+    code = f"import sys\nsys.path.insert(0, {SRC!r})\n{imports}\nassert 'matplotlib' not in sys.modules, 'matplotlib'\n" \
+           "assert 'seaborn' not in sys.modules, 'seaborn'"
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -0,0 +1,48 @@
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Añadir la carpeta src al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.limpiar import remove_outliers, remove_outliers_iqr
+from src.sketches import QuantileSketch
+
+def test_quantile_sketch_error_bound():
+    values = np.random.default_rng(0).normal(size=200_000)
+    sketch = QuantileSketch(error=0.01).update(values)
+    sorted_values = np.sort(values)
+
+    # El error de rango de cada cuantil debe quedar dentro del límite pedido
+    for q in [0.1, 0.25, 0.5, 0.75, 0.9]:
+        rank = np.searchsorted(sorted_values, sketch.quantile(q)) / len(values)
+        assert abs(rank - q) <= 0.01
+    assert len(sketch) < 2000  # Memoria acotada, no proporcional a las filas
+
+def test_quantile_sketch_merge():
+    values = np.random.default_rng(1).uniform(size=100_000)
+    # Sketches construidos por partición y luego combinados
+    merged = QuantileSketch(error=0.01).update(values[:50_000])
+    merged.merge(QuantileSketch(error=0.01, seed=1).update(values[50_000:]))
+
+    assert merged.n == len(values)
+    assert abs(merged.quantile(0.5) - 0.5) <= 0.02
+
+def test_quantile_sketch_invalid_error():
+    with pytest.raises(ValueError):
+        QuantileSketch(error=0)
+
+def test_remove_outliers_approximate():
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame({"A": np.append(rng.normal(size=5000), 10000), "B": np.append(rng.normal(size=5000), 0)})
+
+    exact = remove_outliers(df)
+    approximate = remove_outliers(df, approximate=True, error=0.005)
+    assert 5000 not in approximate.index
+    assert abs(len(approximate) - len(exact)) <= 10
+
+    exact = remove_outliers_iqr(df)
+    approximate = remove_outliers_iqr(df, approximate=True, error=0.005)
+    assert 5000 not in approximate.index
+    assert abs(len(approximate) - len(exact)) <= 10
@@ -0,0 +1,78 @@
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Añadir la carpeta src al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.cache import StepCache
+from src.plan import defer_final_sort, execute, filter_step, optimize, output_key, sink_step, sort_step
+from src.sorting import order_key, sort_order, sort_positions
+from src.summaries import FrameSummary, frame_summary, summary_key
+
+def make_frame():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "A": rng.integers(0, 20, 500).astype(float),
+        "B": rng.integers(-5, 5, 500),
+        "C": rng.choice(["x", "y", "z"], 500),
+        "D": pd.array(rng.integers(0, 4, 500), dtype="Int64"),
+    }, index=rng.permutation(500))
+    df.loc[df.index[::7], "A"] = np.nan
+    df.loc[df.index[::11], "C"] = None
+    df.loc[df.index[::5], "D"] = pd.NA
+    return df
+
+@pytest.mark.parametrize("by, ascending", [
+    ("A", True), ("A", False), ("C", False), ("D", True), (["C", "A"], True), (["D", "B", "A"], [False, True, False]),
+])
+def test_sort_positions_match_sort_values(by, ascending):
+    df = make_frame()
+    expected = df.reset_index(drop=True).sort_values(by, ascending=ascending, kind="stable", na_position="last")
+    order = sort_positions(df, by, ascending)
+    np.testing.assert_array_equal(order, expected.index)
+    # Top-N: las mismas N primeras filas, también con empates en la frontera y con nulos dentro
+    for limit in (0, 1, 7, 100, 480, 600):
+        np.testing.assert_array_equal(sort_positions(df, by, ascending, limit), expected.index[:limit])
+
+def test_sort_order_is_cached_and_reused_for_top_n():
+    df = make_frame()
+    cache = StepCache()
+    full = sort_order(df, ["A", "B"], [False, True], cache=cache, key="frame")
+    assert order_key("frame", ["A", "B"], [False, True]) in cache
+    # Con el orden completo en la caché, el top-N es un corte suyo
+    np.testing.assert_array_equal(sort_order(df, ["A", "B"], [False, True], 10, cache, "frame"), full[:10])
+    assert order_key("frame", ["A", "B"], [False, True], 10) not in cache
+
+    with pytest.raises(ValueError):
+        sort_positions(df, ["A", "B"], [True])
+    with pytest.raises(ValueError):
+        sort_positions(df, "missing")
+
+def test_top_n_sort_step_in_plan():
+    df = make_frame()
+    steps = [sort_step(["A", "B"], False, limit=10), filter_step("B", "Greater than", "0")]
+    plan, _ = optimize(steps, df.iloc[:0])
+
+    # El filtro no pasa delante del top-N: cambiaría qué filas entran
+    assert [step.kind for step in plan] == ["sort", "filter"]
+    assert plan[0].label == "Keep the first 10 rows by 'A' (descending), 'B' (descending)"
+    expected = df.sort_values(["A", "B"], ascending=False, kind="stable", na_position="last").head(10)
+    cache = StepCache()
+    cache.put(summary_key("frame"), FrameSummary(df))
+    result, _ = execute(plan[:1], df, cache=cache, key="frame")
+    pd.testing.assert_frame_equal(result, expected)
+    # El resumen de un top-N no es el de la entrada
+    assert frame_summary(result, cache, output_key(plan[:1], "frame")).rows == 10
+
+def test_defer_final_sort():
+    notes = []
+    steps = [filter_step("B", "Greater than", "0"), sort_step("A"), sink_step("Download Cleaned Data")]
+    plan, final = defer_final_sort(steps, notes)
+
+    assert final is steps[1] and [step.kind for step in plan] == ["filter", "sink"]
+    assert plan[1].params["order"] is final and notes
+    # Un top-N o una ordenación seguida de más pasos se ejecutan en el plan
+    assert defer_final_sort([sort_step("A", limit=5)], [])[1] is None
+    assert defer_final_sort([sort_step("A"), filter_step("B", "Greater than", "0")], [])[1] is None
@@ -0,0 +1,105 @@
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Añadir la carpeta src al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.cache import StepCache
+from src.plan import (clean_step, delete_step, encode_step, execute, expression_filter_step, filter_step, iqr_step,
+                      normalize_step, rename_step, sort_step, zscore_step)
+from src.spill import SpillStore, read_frame, write_frame
+
+def make_frame(rows=1000):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "A": rng.normal(size=rows),
+        "B": rng.integers(0, 50, rows).astype("int16"),
+        "C": rng.choice(["x", "y", "z"], rows),
+        "D": pd.array(rng.integers(0, 4, rows), dtype="Int64"),
+        "E": pd.Categorical(rng.choice(["p", "q"], rows)),
+        "F": pd.date_range("2024-01-01", periods=rows, freq="h"),
+        "G": rng.random(rows) > 0.5,
+    })
+    df.loc[::7, "A"] = np.nan
+    df.loc[::11, "C"] = None
+    df.loc[::5, "D"] = pd.NA
+    return df
+
+def test_round_trip_is_zero_copy(tmp_path):
+    df = make_frame()
+    path = str(tmp_path / "frame.arrow")
+    write_frame(df, path)
+    result = read_frame(path)
+    pd.testing.assert_frame_equal(result, df)
+
+    # Las columnas numéricas son vistas de solo lectura del fichero mapeado, no copias
+    values = result["A"].to_numpy()
+    assert not values.flags.owndata and not values.flags.writeable
+
+    # Un índice que no es un rango también vuelve igual
+    shuffled = df.iloc[::-3]
+    write_frame(shuffled, path)
+    pd.testing.assert_frame_equal(read_frame(path), shuffled)
+
+def test_evicted_frames_spill_and_reload(tmp_path):
+    spill = SpillStore(str(tmp_path))
+    cache = StepCache(budget_mb=1, spill=spill)
+    frame = pd.DataFrame({"A": np.arange(50_000, dtype=float)})  # ~0.4 MB
+    for name in ("first", "second", "third"):
+        cache.put(name, frame)
+
+    # La entrada expulsada no se pierde: pasa a disco y se lee de nuevo sin recalcular
+    assert "first" in spill and "first" in cache
+    pd.testing.assert_frame_equal(cache.get("first"), frame)
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["reloads"] == 1 and stats["spilled"] == 1
+    assert stats["used_mb"] <= 1
+
+    # Guardarla otra vez en memoria borra su copia del disco (y expulsa a "second")
+    cache.put("first", frame)
+    assert spill.keys() == ["second"]
+    cache.clear()
+    assert not os.listdir(tmp_path)
+
+def test_spill_disk_budget(tmp_path):
+    spill = SpillStore(str(tmp_path), budget_mb=1)
+    frame = pd.DataFrame({"A": np.zeros(50_000)})  # ~0.4 MB
+    for name in ("first", "second", "third"):
+        assert spill.write(name, frame)
+    # Se borran los ficheros más antiguos hasta volver al presupuesto de disco
+    assert spill.keys() == ["second", "third"] and spill.used <= 1024 * 1024
+    assert len(os.listdir(tmp_path)) == 2
+    # Lo que no se puede guardar como Arrow (p. ej. columnas con nombre numérico) no se vuelca
+    assert not spill.write("numbers", pd.DataFrame({0: [1, 2]}))
+
+def test_abandoned_sessions_are_evicted(tmp_path):
+    cache = StepCache(spill=SpillStore(str(tmp_path)), session_minutes=1)
+    frame = make_frame()
+    cache.session("alice")
+    cache.put("alice-frame", frame)
+    cache.spill.write("alice-spilled", frame)
+    cache.own("alice-spilled")
+    cache.session("bob")
+    cache.put("bob-frame", frame)
+    cache.get("alice-frame")  # Lo que también usa bob se queda
+
+    cache.sessions["alice"] -= 120  # alice lleva dos minutos sin volver
+    cache.session("bob")
+    assert "alice-spilled" not in cache and "alice-frame" in cache and "bob-frame" in cache
+    assert cache.stats()["sessions"] == 1
+
+    cache.sessions["bob"] -= 120
+    assert set(cache.session("carol")) == {"alice-frame", "bob-frame"}
+    assert cache.stats()["entries"] == 0 and not os.listdir(tmp_path)
+
+def test_plan_runs_on_spilled_frame(tmp_path):
+    df = make_frame().drop(columns="D")  # La limpieza rellena con la media, que no cabe en Int64
+    path = str(tmp_path / "frame.arrow")
+    write_frame(df, path)
+    steps = [clean_step(), filter_step("B", "Greater than", "5"), expression_filter_step("A > -1"), zscore_step(),
+             iqr_step(), sort_step(["C", "A"], False, limit=200), normalize_step(), encode_step(),
+             rename_step("B", "b"), delete_step(["G"])]
+    # Los pasos no escriben sobre su entrada: los mismos resultados con las columnas de solo lectura del memory map
+    result, _ = execute(steps, read_frame(path))
+    pd.testing.assert_frame_equal(result, execute(steps, df)[0])
@@ -0,0 +1,89 @@
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Añadir la carpeta src al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.limpiar import clean_data, remove_outliers, remove_outliers_iqr
+from src.streaming import StepStatistics, clean_csv_in_chunks, median_from_counts, quantile_from_counts
+
+def make_csv(path):
+    # Datos con nulos, duplicados entre bloques y algunos outliers
+    rng = np.random.default_rng(0)
+    n = 600
+    df = pd.DataFrame({
+        "A": rng.integers(0, 50, n).astype(float),
+        "B": rng.normal(size=n).round(2),
+        "C": rng.choice(["x", "y", "z"], n).astype(object)
+    })
+    df.loc[rng.random(n) < 0.1, "A"] = np.nan
+    df.loc[rng.random(n) < 0.1, "C"] = None
+    df.loc[rng.random(n) < 0.02, "B"] = 1000
+    df = pd.concat([df, df.iloc[:50]])
+    df.to_csv(path, index=False)
+    return pd.read_csv(path)
+
+def test_quantiles_from_counts():
+    values = pd.Series([3.0, 1.0, 4.0, 1.0, 5.0, 9.0, 2.0, 6.0])
+    counts = values.value_counts()
+
+    assert median_from_counts(counts) == values.median()
+    assert quantile_from_counts(counts, 0.25) == values.quantile(0.25)
+    assert quantile_from_counts(counts, 0.75) == values.quantile(0.75)
+
+@pytest.mark.parametrize("steps", [["clean"], ["clean", "zscore"], ["iqr", "clean"]])
+def test_clean_csv_in_chunks_matches_in_memory(tmp_path, steps):
+    source = tmp_path / "input.csv"
+    destination = tmp_path / "output.csv"
+    df = make_csv(source)
+
+    # Resultado esperado: los mismos pasos sobre el fichero completo en memoria
+    functions = {"clean": clean_data, "zscore": remove_outliers, "iqr": remove_outliers_iqr}
+    for step in steps:
+        df = functions[step](df)
+
+    summary = clean_csv_in_chunks(source, destination, steps, chunksize=100)
+    result = pd.read_csv(destination)
+
+    assert summary["rows_out"] == len(df)
+    pd.testing.assert_frame_equal(result, df.reset_index(drop=True))
+
+def test_clean_csv_in_chunks_unknown_step(tmp_path):
+    with pytest.raises(ValueError):
+        clean_csv_in_chunks(tmp_path / "input.csv", tmp_path / "output.csv", ["normalize"])
+
+def test_clean_csv_in_chunks_approximate(tmp_path):
+    source = tmp_path / "input.csv"
+    destination = tmp_path / "output.csv"
+    df = remove_outliers(clean_data(make_csv(source)))
+
+    summary = clean_csv_in_chunks(source, destination, ["clean", "zscore"], chunksize=100, approximate=True)
+
+    # Con sketches los umbrales son aproximados, pero los outliers extremos se eliminan igual
+    assert abs(summary["rows_out"] - len(df)) <= 5
+    assert pd.read_csv(destination)["B"].max() < 1000
+
+@pytest.mark.parametrize("step", ["zscore", "iqr"])
+def test_statistics_stay_bounded_on_distinct_floats(step):
+    # Por defecto, una columna de floats todos distintos pasa a un sketch al superar exact_limit valores
+    rng = np.random.default_rng(1)
+    stats = StepStatistics(step, exact_limit=1000)
+    sizes = []
+    for _ in range(20):
+        chunk = pd.DataFrame({"A": rng.normal(size=5000), "B": rng.integers(0, 10, 5000)})
+        stats.update(chunk)
+        sizes.append(sum(len(level) for level in stats.sketches["A"].levels))
+    assert "A" not in stats.counts and len(stats.counts["B"]) == 10  # B sigue contándose exactamente
+    assert max(sizes[10:]) <= 2 * max(sizes[:5])  # El estado de A no crece con las filas leídas
+
+    fitted = stats.finish(100_000, {"A": "float", "B": "int"})
+    first, second = ("median", "mad") if step == "zscore" else ("q1", "q3")
+    assert set(fitted[first].index) == set(fitted[second].index) == {"A", "B"}
+    if step == "iqr":
+        assert abs(fitted["q1"]["A"] - (-0.674)) < 0.05 and fitted["q3"]["B"] in (6.0, 7.0)
+    # Con approximate=False se cuenta todo (umbrales exactos, memoria proporcional a los valores distintos)
+    exact = StepStatistics(step, approximate=False, exact_limit=1000)
+    exact.update(pd.DataFrame({"A": rng.normal(size=5000)}))
+    assert len(exact.counts["A"]) == 5000 and not exact.sketches
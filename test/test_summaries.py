@@ -0,0 +1,84 @@
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Añadir la carpeta src al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.cache import StepCache, chain_key
+from src.plan import (clean_step, delete_step, execute, filter_step, iqr_step, rename_step, signature, sort_step,
+                      zscore_step)
+from src.summaries import FrameSummary, derive_summary, frame_summary, summary_key
+
+def make_frame(n=3000):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "A": rng.normal(size=n),
+        "B": rng.integers(0, 5, n).astype(np.float64),
+        "C": rng.choice(["x", "y", "z"], n).astype(object),
+    })
+    df.loc[::13, "A"] = np.nan
+    df.loc[::17, "B"] = np.nan
+    df.loc[::19, "C"] = None
+    return pd.concat([df, df.iloc[:100]], ignore_index=True)
+
+def assert_same_summary(derived, fresh):
+    assert derived.rows == fresh.rows and derived.nulls == fresh.nulls
+    for col in fresh.counts:
+        if fresh.counts[col] is None:
+            assert derived.counts[col] is None
+        else:
+            pd.testing.assert_series_equal(derived.counts[col].sort_index(), fresh.counts[col].sort_index(),
+                                           check_index_type=False)
+    for col, (_, _, fine) in fresh.histograms.items():
+        assert derived.histograms[col][2].sum() == fine.sum()
+
+def test_build():
+    df = make_frame()
+    summary = FrameSummary(df)
+    assert summary.nulls == df.isna().sum().to_dict()
+    pd.testing.assert_series_equal(summary.value_counts("C"), df["C"].value_counts(), check_index_type=False)
+    assert summary.value_counts("A") is None  # Demasiados valores para un gráfico de barras
+    assert summary.value_counts("B").sort_index().index.tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+    edges, counts = summary.histogram("A")
+    assert len(counts) == 20 and counts.sum() == df["A"].notna().sum()
+    assert edges[0] == df["A"].min() and np.isclose(edges[-1], df["A"].max())
+    grid, density = summary.kde("A")
+    assert np.isclose(np.trapezoid(density, grid), 1, atol=0.02)
+
+def test_derived_after_steps_matches_rebuilt():
+    df = make_frame()
+    summary = FrameSummary(df)
+    for step in [clean_step(), zscore_step(2), filter_step("C", "==", "x"), sort_step("A"), delete_step(["B"]),
+                 rename_step("A", "D")]:
+        before = df
+        df, _ = execute([step], df)
+        summary = derive_summary(summary, step, before, df)
+        assert_same_summary(summary, FrameSummary(df))
+    assert summary.columns == ["D", "C"]
+
+def test_execute_updates_cached_summaries():
+    df = make_frame()
+    cache = StepCache()
+    frame_summary(df, cache, "k")
+    steps = [clean_step(), filter_step("A", ">", 0)]
+    result, _ = execute(steps, df, cache=cache, key="k")
+    key = "k"
+    for step in steps:
+        key = chain_key(key, signature(step))
+        assert summary_key(key) in cache
+    assert_same_summary(frame_summary(result, cache, key), FrameSummary(result))
+
+def test_histogram_rebinned_after_removing_an_extreme_value():
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({"A": np.append(rng.normal(size=2000), 1e6)})
+    for step in [zscore_step(), iqr_step()]:
+        summary = FrameSummary(df)
+        result, _ = execute([step], df)
+        derived = derive_summary(summary, step, df, result)
+        # Sin el extremo, las barras se reparten sobre el rango nuevo como en un resumen hecho desde cero
+        edges, counts = derived.histogram("A")
+        fresh_edges, fresh_counts = FrameSummary(result).histogram("A")
+        assert len(counts) == len(fresh_counts) == 20
+        np.testing.assert_allclose(edges, fresh_edges)
+        np.testing.assert_array_equal(counts, fresh_counts)
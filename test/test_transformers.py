@@ -0,0 +1,58 @@
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Añadir la carpeta src al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.limpiar import clean_data, remove_outliers, remove_outliers_iqr
+from src.plan import clean_step, encode_step, execute, iqr_step, normalize_step, sort_step, zscore_step
+from src.transformers import CategoryEncoder, FittedPipeline, IQRFilter, MinMaxScaler, ZScoreFilter
+
+def make_batch(seed, n=500):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "A": rng.normal(size=n),
+        "B": rng.integers(0, 100, n),
+        "C": rng.choice(["x", "y", "z", None], n).astype(object),
+    })
+    df.loc[::11, "A"] = np.nan
+    df.loc[::50, "A"] = 40.0
+    return pd.concat([df, df.iloc[:20]], ignore_index=True)
+
+def test_fitted_filters_match_functions():
+    df = clean_data(make_batch(0))
+    pd.testing.assert_frame_equal(ZScoreFilter(2.5).fit(df).transform(df), remove_outliers(df, z_thresh=2.5))
+    pd.testing.assert_frame_equal(IQRFilter().fit(df).transform(df), remove_outliers_iqr(df))
+
+def test_pipeline_matches_plan_on_fitting_batch():
+    df = make_batch(0)
+    steps = [clean_step(), zscore_step(), iqr_step(), sort_step("B"), normalize_step(), encode_step()]
+    expected, _ = execute(steps, df)
+    pd.testing.assert_frame_equal(FittedPipeline.from_steps(steps).fit_transform(df), expected)
+
+def test_new_batches_reuse_statistics(tmp_path):
+    first, second = make_batch(0), make_batch(1)
+    pipeline = FittedPipeline.from_steps([clean_step(), normalize_step(), encode_step()]).fit(first)
+    path = tmp_path / "fitted.json.gz"
+    pipeline.save(path)
+    loaded = FittedPipeline.load(path)
+
+    result = loaded.transform(second)
+    pd.testing.assert_frame_equal(result, pipeline.transform(second))
+    # Rellenos, escala y códigos del primer lote, no del segundo
+    encoder = loaded.transformers[2]
+    assert result["C"].isin(range(len(encoder.categories["C"]))).all()
+    filled = clean_data(second, values=pipeline.transformers[0].values)
+    codes = {value: code for code, value in enumerate(encoder.categories["C"])}
+    assert result["C"].tolist() == [codes[value] for value in filled["C"]]
+    scaler = loaded.transformers[1]
+    np.testing.assert_allclose(result["B"], (filled["B"] - scaler.minimum["B"]) / (scaler.maximum["B"] - scaler.minimum["B"]))
+
+def test_unseen_categories_and_columns():
+    encoder = CategoryEncoder().fit(pd.DataFrame({"C": ["a", "b", None]}, dtype=object))
+    out = encoder.transform(pd.DataFrame({"C": ["b", "new", None], "D": [1, 2, 3]}, dtype=object))
+    assert out["C"].tolist() == [1, -1, -1]
+    scaler = MinMaxScaler().fit(pd.DataFrame({"A": [0.0, 10.0]}))
+    out = scaler.transform(pd.DataFrame({"A": [5.0, 20.0], "E": [1.0, 2.0]}))
+    assert out["A"].tolist() == [0.5, 2.0] and out["E"].tolist() == [1.0, 2.0]